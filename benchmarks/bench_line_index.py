@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+脚本文件加载性能对比：读取全文与 mmap 行索引
+
+用法：
+    python benchmarks/bench_line_index.py [--count 1000000]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.file_handler import FileHandler
+from src.utils.line_index import LineIndex
+
+# 基准测试使用的网元参数
+PARAMS = {
+    "domain": "dra.ims.sdt",
+    "cfn": "cg.dra.ims.sdt",
+    "password": "123456",
+    "sifc_id": "100",
+    "scscf": "scscfpool01",
+    "cc": "86",
+    "lata": "10"
+}
+
+def full_read(file_path):
+    """按原实现读取并解码全文，再按行切分
+    
+    Args:
+        file_path: 脚本文件路径
+        
+    Returns:
+        int: 行数
+    """
+    success, content = FileHandler.load_script(file_path)
+    return len(content.split("\n"))
+
+def index_build(file_path):
+    """不使用索引文件，扫描建立行偏移表
+    
+    Args:
+        file_path: 脚本文件路径
+        
+    Returns:
+        int: 行数
+    """
+    with LineIndex(file_path, use_sidecar=False) as line_index:
+        return line_index.line_count
+
+def sidecar_load(file_path):
+    """从已保存的索引文件加载行偏移表，并随机读取若干行
+    
+    Args:
+        file_path: 脚本文件路径
+        
+    Returns:
+        int: 行数
+    """
+    with LineIndex(file_path) as line_index:
+        step = max(line_index.line_count // 1000, 1)
+        for index in range(0, line_index.line_count, step):
+            line_index.line_at(index)
+        return line_index.line_count
+
+def measure(name, func, *args):
+    """运行一次并输出耗时
+    
+    Args:
+        name: 测试名称
+        func: 被测函数，返回行数
+        args: 函数参数
+        
+    Returns:
+        float: 耗时（秒）
+    """
+    started = time.perf_counter()
+    lines = func(*args)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<10} {lines:>12,} 行  {elapsed:>8.3f} 秒")
+    return elapsed
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="脚本文件加载性能对比")
+    parser.add_argument("--count", type=int, default=1000000, help="号码数量，默认 1000000")
+    parser.add_argument("--start", default="+861088889001", help="起始号码")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "script.txt")
+        FileHandler.write_script_job(args.start, args.count, PARAMS, file_path)
+        print(f"脚本文件: {os.path.getsize(file_path) / 1024 / 1024:.1f} MB")
+        
+        before = measure("read", full_read, file_path)
+        after = measure("index", index_build, file_path)
+        
+        # 第一次建立索引并保存索引文件，之后直接加载
+        LineIndex(file_path).close()
+        measure("sidecar", sidecar_load, file_path)
+        if after:
+            print(f"加速比: {before / after:.2f}x")
+
+if __name__ == "__main__":
+    main() 
\ No newline at end of file
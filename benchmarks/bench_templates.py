@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+模板渲染性能对比：逐行 str.format 与预编译模板
+
+用法：
+    python benchmarks/bench_templates.py [--count 1000000]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.generator import ScriptGenerator
+
+# 基准测试使用的网元参数
+PARAMS = {
+    "domain": "dra.ims.sdt",
+    "cfn": "cg.dra.ims.sdt",
+    "password": "123456",
+    "sifc_id": "100",
+    "scscf": "scscfpool01",
+    "cc": "86",
+    "lata": "10"
+}
+
+def legacy_render(generator, start_number, count, params):
+    """按原实现逐行调用 str.format 生成全部命令行
+    
+    Args:
+        generator: 脚本生成器，仅使用其模板
+        start_number: 起始号码
+        count: 号码数量
+        params: 参数字典
+        
+    Returns:
+        int: 生成的命令行数
+    """
+    templates = generator.templates
+    base = int(start_number.lstrip('+'))
+    prefix = '+' if start_number.startswith('+') else ''
+    phone_numbers = [f"{prefix}{base + i}" for i in range(count)]
+    
+    lines = 0
+    for key in templates:
+        for phone in phone_numbers:
+            fields = dict(params, phone=phone)
+            if key == 'uspp_aliasegroup':
+                fields['alias_id'] = generator._extract_alias_id(phone)
+            elif key == 'enum_naptr':
+                fields['reversed_number'] = generator._reverse_number_for_enum(phone)
+            templates[key].format(**fields)
+            lines += 1
+    return lines
+
+def compiled_render(generator, start_number, count, params):
+    """使用预编译模板的流式生成接口生成全部命令行
+    
+    Args:
+        generator: 脚本生成器
+        start_number: 起始号码
+        count: 号码数量
+        params: 参数字典
+        
+    Returns:
+        int: 生成的命令行数
+    """
+    lines = 0
+    for chunk in generator.iter_full_script(start_number, count, params):
+        lines += chunk.count("\n")
+    return lines
+
+def measure(name, func, *args):
+    """运行一次并输出每秒行数
+    
+    Args:
+        name: 测试名称
+        func: 被测函数，返回行数
+        args: 函数参数
+        
+    Returns:
+        float: 每秒行数
+    """
+    started = time.perf_counter()
+    lines = func(*args)
+    elapsed = time.perf_counter() - started
+    rate = lines / elapsed if elapsed else 0.0
+    print(f"{name:<10} {lines:>12,} 行  {elapsed:>8.2f} 秒  {rate:>14,.0f} 行/秒")
+    return rate
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="模板渲染性能对比")
+    parser.add_argument("--count", type=int, default=1000000, help="号码数量，默认 1000000")
+    parser.add_argument("--start", default="+861088889001", help="起始号码")
+    args = parser.parse_args()
+    
+    generator = ScriptGenerator()
+    before = measure("str.format", legacy_render, generator, args.start, args.count, PARAMS)
+    after = measure("compiled", compiled_render, generator, args.start, args.count, PARAMS)
+    if before:
+        print(f"加速比: {after / before:.2f}x")
+
+if __name__ == "__main__":
+    main() 
\ No newline at end of file
@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+脚本生成流水线基准测试
+
+每个测试项在独立子进程中运行，记录耗时、每秒行数、每秒MB数和峰值内存，
+结果保存为 JSON，可用 --compare 与之前的结果对比。
+
+用法：
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 1000,100000 --output results.json
+    python benchmarks/run_benchmarks.py --compare baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import datetime
+import tempfile
+import subprocess
+import multiprocessing
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# 基准测试使用的起始号码和网元参数
+START_NUMBER = "+861088889001"
+PARAMS = {
+    "domain": "dra.ims.sdt",
+    "cfn": "cg.dra.ims.sdt",
+    "password": "123456",
+    "sifc_id": "100",
+    "scscf": "scscfpool01",
+    "cc": "86",
+    "lata": "10"
+}
+
+# 默认测试规模
+DEFAULT_SIZES = "1000,100000,1000000,10000000"
+
+def _phone_numbers(count):
+    """构造号码列表"""
+    base = int(START_NUMBER[1:])
+    return [f"+{base + i}" for i in range(count)]
+
+def bench_full_script(count):
+    """generate_full_script：在内存中生成完整脚本"""
+    from src.core.generator import ScriptGenerator
+    script = ScriptGenerator().generate_full_script(START_NUMBER, count, PARAMS)
+    return script.count("\n") + 1, len(script.encode('utf-8'))
+
+def bench_stream_script(count):
+    """iter_full_script：流式生成完整脚本"""
+    from src.core.generator import ScriptGenerator
+    lines = 0
+    size = 0
+    for chunk in ScriptGenerator().iter_full_script(START_NUMBER, count, PARAMS):
+        lines += chunk.count("\n")
+        size += len(chunk.encode('utf-8'))
+    return lines + 1, size
+
+def _bench_section(method, count):
+    """单个网元脚本生成"""
+    from src.core.generator import ScriptGenerator
+    script = getattr(ScriptGenerator(), method)(_phone_numbers(count), PARAMS)
+    return script.count("\n") + 1, len(script.encode('utf-8'))
+
+def bench_uspp_script(count):
+    """generate_uspp_script"""
+    return _bench_section('generate_uspp_script', count)
+
+def bench_enum_script(count):
+    """generate_enum_script"""
+    return _bench_section('generate_enum_script', count)
+
+def bench_sss_script(count):
+    """generate_sss_script"""
+    return _bench_section('generate_sss_script', count)
+
+def bench_reverse_enum(count):
+    """_reverse_number_for_enum：逐个号码反转"""
+    from src.core.generator import ScriptGenerator
+    generator = ScriptGenerator()
+    size = 0
+    for phone in _phone_numbers(count):
+        size += len(generator._reverse_number_for_enum(phone))
+    return count, size
+
+def bench_validate_numbers(count):
+    """InputValidator.validate_phone_number：逐个号码验证"""
+    from src.core.validator import InputValidator
+    valid = 0
+    for phone in _phone_numbers(count):
+        valid += InputValidator.validate_phone_number(phone)
+    return valid, 0
+
+def bench_validate_params(count):
+    """InputValidator.validate_params：重复验证参数字典"""
+    from src.core.validator import InputValidator
+    for _ in range(count):
+        InputValidator.validate_params(PARAMS)
+    return count, 0
+
+def bench_save_script(count):
+    """FileHandler.save_script：生成后整体写入文件"""
+    from src.core.generator import ScriptGenerator
+    from src.utils.file_handler import FileHandler
+    script = ScriptGenerator().generate_full_script(START_NUMBER, count, PARAMS)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        FileHandler.save_script(script, os.path.join(temp_dir, "script.txt"))
+    return script.count("\n") + 1, len(script.encode('utf-8'))
+
+def bench_write_script_job(count):
+    """FileHandler.write_script_job：边生成边写入文件"""
+    from src.utils.file_handler import FileHandler
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "script.txt")
+        FileHandler.write_script_job(START_NUMBER, count, PARAMS, file_path)
+        size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as f:
+            lines = sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1024*1024), b"")) + 1
+    return lines, size
+
+def bench_write_with_rollback(count):
+    """FileHandler.write_script_job：同一次生成写出放号脚本和删号脚本"""
+    from src.utils.file_handler import FileHandler
+    with tempfile.TemporaryDirectory() as temp_dir:
+        lines = size = 0
+        paths = (os.path.join(temp_dir, "script.txt"), os.path.join(temp_dir, "rollback.txt"))
+        FileHandler.write_script_job(START_NUMBER, count, PARAMS, paths[0], rollback_path=paths[1])
+        for file_path in paths:
+            size += os.path.getsize(file_path)
+            with open(file_path, 'rb') as f:
+                lines += sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1024*1024), b"")) + 1
+    return lines, size
+
+def bench_parse_script(count):
+    """ScriptParser.load：解析并校验已生成的脚本文件，建立号码覆盖索引"""
+    from src.core.parser import ScriptParser
+    from src.utils.file_handler import FileHandler
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "script.txt")
+        FileHandler.write_script_job(START_NUMBER, count, PARAMS, file_path)
+        size = os.path.getsize(file_path)
+        parser = ScriptParser.load(file_path)
+        parser.missing()
+    return parser.line_count, size
+
+def bench_diff_scripts(count):
+    """ScriptDiff.load：解析两个参数不同的脚本，按命令和号码比较并输出增量脚本"""
+    from src.core.diff import ScriptDiff
+    from src.utils.file_handler import FileHandler
+    with tempfile.TemporaryDirectory() as temp_dir:
+        old_path = os.path.join(temp_dir, "old.txt")
+        new_path = os.path.join(temp_dir, "new.txt")
+        FileHandler.write_script_job(START_NUMBER, count, PARAMS, old_path)
+        FileHandler.write_script_job(START_NUMBER, count, dict(PARAMS, lata="11"), new_path)
+        size = os.path.getsize(old_path) + os.path.getsize(new_path)
+        diff = ScriptDiff.load(old_path, new_path)
+        delta = "".join(diff.iter_delta_script())
+    return diff.old.line_count + diff.new.line_count, size + len(delta)
+
+def bench_load_template_set(count):
+    """TemplateSet.from_file：读取并编译完整模板集，最多加载 10000 次"""
+    from src.core.generator import ScriptGenerator
+    from src.core.template import TemplateSet
+    generator = ScriptGenerator()
+    loads = min(count, 10000)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "templates.json")
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "name": "default",
+                "templates": generator.templates,
+                "rollback_templates": generator.rollback_templates,
+            }, f, ensure_ascii=False)
+        for _ in range(loads):
+            TemplateSet.from_file(file_path)
+        size = os.path.getsize(file_path)
+    return loads, size * loads
+
+def bench_import_numbers(count):
+    """NumberImporter.load：导入并验证打乱顺序的号码列表，去重后合并为号码段"""
+    import random
+    from src.core.importer import NumberImporter
+    base = int(START_NUMBER.lstrip('+'))
+    values = list(range(base, base + count * 2, 2))
+    random.Random(0).shuffle(values)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "numbers.txt")
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(f"+{value}" for value in values))
+        size = os.path.getsize(file_path)
+        importer = NumberImporter.load(file_path)
+        importer.number_runs()
+    return importer.line_count, size
+
+def bench_validate_manifest(count):
+    """ParamSchema.validate_rows：一次校验全部清单行，最多 100000 行"""
+    from src.core.generator import ScriptGenerator
+    from src.core.schema import ParamSchema
+    base = int(START_NUMBER.lstrip('+'))
+    rows = [
+        dict(PARAMS, start_number=f"+{base + index * 100}", count=100, lata=str(index % 100))
+        for index in range(min(count, 100000))
+    ]
+    ParamSchema.for_generator(ScriptGenerator(), 10000000, job_fields=True).validate_rows(rows)
+    return len(rows), 0
+
+# 测试项：名称 -> (函数, 是否需要在内存中保存全部结果)
+BENCHMARKS = {
+    'generate_full_script': (bench_full_script, True),
+    'iter_full_script': (bench_stream_script, False),
+    'generate_uspp_script': (bench_uspp_script, True),
+    'generate_enum_script': (bench_enum_script, True),
+    'generate_sss_script': (bench_sss_script, True),
+    'reverse_number_for_enum': (bench_reverse_enum, True),
+    'validate_phone_number': (bench_validate_numbers, True),
+    'validate_params': (bench_validate_params, False),
+    'save_script': (bench_save_script, True),
+    'write_script_job': (bench_write_script_job, False),
+    'write_with_rollback': (bench_write_with_rollback, False),
+    'parse_script': (bench_parse_script, False),
+    'diff_scripts': (bench_diff_scripts, False),
+    'load_template_set': (bench_load_template_set, False),
+    'import_numbers': (bench_import_numbers, True),
+    'validate_manifest': (bench_validate_manifest, True),
+}
+
+def _peak_rss_mb():
+    """获取当前进程的峰值内存（MB），不支持的平台返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位，Linux 以KB为单位
+    if sys.platform == 'darwin':
+        return peak / 1024 / 1024
+    return peak / 1024
+
+def _run_case(name, count, queue):
+    """子进程中运行单个测试项"""
+    func, _ = BENCHMARKS[name]
+    started = time.perf_counter()
+    lines, size = func(count)
+    elapsed = time.perf_counter() - started
+    queue.put({
+        'name': name,
+        'count': count,
+        'seconds': elapsed,
+        'lines': lines,
+        'bytes': size,
+        'lines_per_sec': lines / elapsed if elapsed else None,
+        'mb_per_sec': size / 1024 / 1024 / elapsed if elapsed and size else None,
+        'peak_rss_mb': _peak_rss_mb(),
+    })
+
+def run_case(name, count):
+    """在独立子进程中运行测试项，保证峰值内存互不影响
+    
+    Args:
+        name: 测试项名称
+        count: 测试规模
+        
+    Returns:
+        dict: 测试结果
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_run_case, args=(name, count, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def _git_commit():
+    """获取当前提交号"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _format_rate(value, unit):
+    """格式化速率"""
+    return f"{value:>14,.0f} {unit}" if value else f"{'-':>14} {unit}"
+
+def print_result(result, baseline=None):
+    """输出单项结果，提供基线时附加对比"""
+    line = (
+        f"{result['name']:<24} {result['count']:>10,} "
+        f"{result['seconds']:>9.3f}s "
+        f"{_format_rate(result['lines_per_sec'], '行/秒')} "
+        f"{(result['mb_per_sec'] or 0):>8.1f} MB/秒 "
+        f"{(result['peak_rss_mb'] or 0):>8.1f} MB"
+    )
+    if baseline and baseline.get('seconds'):
+        line += f"  对比基线 {baseline['seconds'] / result['seconds']:.2f}x"
+    print(line)
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="脚本生成流水线基准测试")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"测试规模，逗号分隔，默认 {DEFAULT_SIZES}")
+    parser.add_argument("--only", help="只运行指定测试项，逗号分隔")
+    parser.add_argument("--max-in-memory", type=int, default=1000000,
+                        help="需要在内存中保存全部结果的测试项的最大规模，默认 1000000")
+    parser.add_argument("--output", help="结果 JSON 文件，默认 benchmarks/results/<时间>_<提交>.json")
+    parser.add_argument("--compare", help="用于对比的历史结果 JSON 文件")
+    args = parser.parse_args()
+    
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    
+    baseline = {}
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            for result in json.load(f)['results']:
+                baseline[(result['name'], result['count'])] = result
+    
+    results = []
+    for name in names:
+        _, in_memory = BENCHMARKS[name]
+        for count in sizes:
+            if in_memory and count > args.max_in_memory:
+                continue
+            result = run_case(name, count)
+            print_result(result, baseline.get((name, count)))
+            results.append(result)
+    
+    commit = _git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    
+    output = args.output
+    if not output:
+        results_dir = os.path.join(ROOT_DIR, "benchmarks", "results")
+        os.makedirs(results_dir, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join(results_dir, f"{timestamp}_{commit or 'unknown'}.json")
+    
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    print(f"结果已保存到: {output}")
+
+if __name__ == "__main__":
+    main() 
\ No newline at end of file
@@ -0,0 +1,582 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+IMS号码生成器命令行入口
+
+无需图形界面，适用于服务器上的批量放号任务，例如：
+    python -m src.cli --start +861088889001 --count 100000 -o script.txt
+"""
+
+import sys
+import json
+import argparse
+
+# 生成器、台账（sqlite3）、清单、导入、校验等模块在用到时才导入，
+# 使 --help 和单次生成的启动时间不受未使用功能的影响
+
+# 网元参数名称及说明
+PARAM_FIELDS = (
+    ("domain", "域名"),
+    ("cfn", "CFN"),
+    ("password", "密码"),
+    ("sifc_id", "SIFC ID"),
+    ("scscf", "SCSCF"),
+    ("cc", "国家码"),
+    ("lata", "LATA"),
+)
+
+def build_parser():
+    """创建命令行参数解析器
+    
+    Returns:
+        argparse.ArgumentParser: 参数解析器
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="IMS号码放号脚本生成工具（命令行版）"
+    )
+    parser.add_argument("-s", "--start", help="起始号码，如 +861088889001")
+    parser.add_argument("-n", "--count", type=int, help="号码数量")
+    parser.add_argument("-c", "--config", help="JSON 配置文件，格式与 config.json 相同")
+    parser.add_argument("-o", "--output", help="输出文件路径，省略时输出到标准输出")
+    parser.add_argument("-w", "--workers", type=int, help="生成脚本使用的工作进程数，默认单个任务为 1，清单为CPU核数")
+    parser.add_argument("-m", "--manifest", help="批量任务清单（JSON 或 CSV），每个任务生成单独文件，指定 -o 时合并输出")
+    parser.add_argument("-d", "--output-dir", help="批量任务单独输出文件所在目录")
+    parser.add_argument("--delta-from", help="上次任务记录（JSON），只生成与其相比发生变化的命令")
+    parser.add_argument("--save-job", help="生成成功后将本次任务记录保存到该文件，供下次 --delta-from 使用")
+    parser.add_argument("--cache", action="store_true", help="使用脚本缓存，重复生成相同任务时直接读取")
+    parser.add_argument("-t", "--templates", action="append", default=[],
+                        help="模板集文件（JSON），覆盖其中包含的默认模板，可多次指定")
+    parser.add_argument("--dump-templates", action="store_true", help="以模板集文件格式输出当前模板后退出")
+    parser.add_argument("--compress", choices=("gzip", "zstd"),
+                        help="压缩输出文件；省略时按 -o 的后缀（.gz、.zst）判断")
+    parser.add_argument("--per-ne", action="store_true",
+                        help="按网元分别输出到 -d 指定的目录，并生成 manifest.json")
+    parser.add_argument("--split-lines", type=int, help="按网元输出时每个分片的最大行数")
+    parser.add_argument("--split-mb", type=float, help="按网元输出时每个分片压缩前的最大MB数")
+    parser.add_argument("--no-ledger", action="store_true", help="不检查也不记录放号台账")
+    parser.add_argument("-x", "--exclude", help="排除号码文件，每行一个号码或 首号码-尾号码 区间，这些号码不会生成命令")
+    parser.add_argument("-i", "--numbers", help="号码列表文件（TXT 每行一个号码或区间，或 CSV），为其中的不连续号码生成脚本")
+    parser.add_argument("--error-report", help="号码列表中无效行的报告输出文件；与 --verify 一起使用时为完整校验报告，"
+                                               "与 --diff 一起使用时为差异明细")
+    parser.add_argument("--verify", help="校验已生成的脚本文件：各网元行数、缺失和重复号码、参数一致性；"
+                                         "配合 --save-job 可将脚本还原为任务描述")
+    parser.add_argument("--rollback-script", action="store_true",
+                        help="按删号模板校验 --verify 指定的脚本，默认根据段标题或首条命令自动识别")
+    parser.add_argument("--diff", nargs=2, metavar=("OLD", "NEW"),
+                        help="按命令和号码比较两个已生成的脚本，输出从 OLD 变为 NEW 的增量脚本")
+    parser.add_argument("--rollback", help="同时生成删号脚本到该文件（需要 -o），与放号脚本在同一次生成中产生")
+    
+    # 网元参数，优先级高于配置文件
+    group = parser.add_argument_group("网元参数")
+    for name, label in PARAM_FIELDS:
+        group.add_argument(f"--{name.replace('_', '-')}", dest=name, help=label)
+    
+    return parser
+
+def load_job(args):
+    """合并默认配置、配置文件和命令行参数
+    
+    Args:
+        args: 解析后的命令行参数
+        
+    Returns:
+        tuple: (起始号码, 号码数量, 参数字典, 号码数量上限)
+    """
+    from src.utils.config import ConfigManager
+    
+    # 默认使用用户保存的配置
+    config = dict(ConfigManager().get_config())
+    
+    # 配置文件覆盖默认配置
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+    
+    params = {name: str(config.get(name, "")) for name, _ in PARAM_FIELDS}
+    
+    # 命令行参数覆盖配置文件
+    for name, _ in PARAM_FIELDS:
+        value = getattr(args, name)
+        if value is not None:
+            params[name] = value
+    
+    start_number = args.start or config.get("start_number") or config.get("last_start_number")
+    count = args.count if args.count is not None else int(config.get("count") or config.get("last_count"))
+    
+    return start_number, count, params, config.get("max_count")
+
+def validate_job(start_number, count, params, max_count=None, generator=None):
+    """验证任务参数
+    
+    Args:
+        start_number: 起始号码
+        count: 号码数量
+        params: 参数字典
+        max_count: 号码数量上限
+        generator: 脚本生成器，必填参数为其模板集引用的参数
+        
+    Returns:
+        tuple: (是否有效, 错误消息)
+    """
+    from src.core.validator import InputValidator
+    
+    valid, error_msg = InputValidator.validate_params(params, generator)
+    if not valid:
+        return False, error_msg
+    
+    if not start_number or not InputValidator.validate_phone_number(start_number):
+        return False, "起始号码格式无效"
+    
+    if not InputValidator.validate_count(count, max_count):
+        return False, f"号码数量必须在1-{max_count or InputValidator.MAX_COUNT}之间"
+    
+    return True, ""
+
+def write_stdout(chunks):
+    """将脚本流式输出到标准输出
+    
+    Args:
+        chunks: 脚本数据块的可迭代对象
+    """
+    sys.stdout.reconfigure(encoding='utf-8')
+    for chunk in chunks:
+        sys.stdout.write(chunk)
+    sys.stdout.flush()
+
+def run_manifest(args, logger, exclusions=None):
+    """执行批量任务清单
+    
+    Args:
+        args: 解析后的命令行参数
+        logger: 日志记录器
+        exclusions: 排除索引 ExclusionIndex，可选
+        
+    Returns:
+        int: 退出码
+    """
+    from src.core.batch import BatchRunner, load_manifest
+    from src.utils.config import ConfigManager
+    from src.utils.ledger import ProvisioningLedger
+    
+    # 清单中未指定的参数使用配置文件或默认配置
+    defaults = dict(ConfigManager().get_config())
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            defaults.update(json.load(f))
+    for name, _ in PARAM_FIELDS:
+        value = getattr(args, name)
+        if value is not None:
+            defaults[name] = value
+    
+    jobs = load_manifest(args.manifest, defaults)
+    runner = BatchRunner(
+        jobs, args.workers, defaults.get("max_count"), args.templates,
+        exclusions, None if args.no_ledger else ProvisioningLedger(), args.compress
+    )
+    
+    # 全部任务验证通过后才开始生成
+    errors = runner.validate()
+    for index, name, error_msg in errors:
+        logger.error(f"任务 {index + 1} ({name}) 参数错误: {error_msg}")
+    if errors:
+        return 2
+    
+    # 清单中的任务之间或与历史任务重叠时给出警告
+    for index, name, other_index, other_name, count in runner.find_job_overlaps():
+        logger.warning(f"任务 {index + 1} ({name}) 与清单中的任务 {other_index + 1} ({other_name}) 有 {count} 个号码重叠")
+    for index, name, overlaps in runner.find_overlaps():
+        logger.warning(f"任务 {index + 1} ({name}) 号码重叠: {ProvisioningLedger.describe_overlaps(overlaps)}")
+    
+    failed = 0
+    for job, success, result in runner.run(args.output_dir, args.output):
+        if success:
+            logger.info(f"生成脚本: 任务={job.name}, 起始号码={job.start_number}, 数量={job.count}, 文件={result}")
+        else:
+            failed += 1
+            logger.error(f"生成脚本错误: 任务={job.name}, {result}")
+    
+    return 1 if failed else 0
+
+def run_numbers(args, logger, generator, exclusions=None):
+    """为号码列表文件中的号码生成脚本
+    
+    Args:
+        args: 解析后的命令行参数
+        logger: 日志记录器
+        generator: 脚本生成器
+        exclusions: 排除索引 ExclusionIndex，可选
+        
+    Returns:
+        int: 退出码
+    """
+    from src.core.importer import NumberImporter
+    from src.core.number_range import NumberRuns, format_number
+    from src.core.validator import InputValidator
+    from src.utils.file_handler import FileHandler
+    from src.utils.ledger import ProvisioningLedger
+    
+    try:
+        _, _, params, max_count = load_job(args)
+    except (OSError, ValueError, TypeError) as e:
+        logger.error(f"读取配置错误: {str(e)}")
+        return 2
+    
+    valid, error_msg = InputValidator.validate_params(params, generator)
+    if not valid:
+        logger.error(f"参数错误: {error_msg}")
+        return 2
+    
+    if args.compress and not args.output:
+        logger.error("压缩输出需要指定 -o")
+        return 2
+    
+    try:
+        importer = NumberImporter.load(args.numbers)
+    except OSError as e:
+        logger.error(f"读取号码列表错误: {str(e)}")
+        return 2
+    
+    # 逐行错误报告
+    logger.info(f"导入号码列表: {args.numbers}, {importer.summary()}")
+    for line_number, line, message in importer.errors[:10]:
+        logger.warning(f"号码列表第 {line_number} 行{message}: {line}")
+    if args.error_report:
+        with open(args.error_report, 'w', encoding='utf-8') as f:
+            f.write(importer.error_report())
+    
+    phone_numbers = importer.number_runs()
+    if exclusions is not None:
+        phone_numbers = NumberRuns([exclusions.apply(number_range) for number_range in phone_numbers.ranges])
+    
+    count = len(phone_numbers)
+    if not InputValidator.validate_count(count, max_count):
+        logger.error(f"号码数量必须在1-{max_count or InputValidator.MAX_COUNT}之间，当前为 {count}")
+        return 2
+    
+    first = phone_numbers.ranges[0]
+    start_number = format_number(first.prefix, first.width, first.start)
+    intervals = phone_numbers.intervals()
+    
+    # 与历史任务重叠时给出警告
+    ledger = None if args.no_ledger else ProvisioningLedger()
+    if ledger is not None:
+        overlaps = ledger.find_overlaps(start_number, count, intervals=intervals)
+        if overlaps:
+            logger.warning(f"号码重叠: {ProvisioningLedger.describe_overlaps(overlaps)}")
+    
+    if args.output:
+        success, result = FileHandler.write_with_rollback(
+            lambda rollback_sink: generator.iter_number_script(
+                phone_numbers, params, args.workers or 1, rollback_sink=rollback_sink
+            ),
+            args.output, args.rollback, generator, compression=args.compress
+        )
+        if not success:
+            logger.error(f"生成脚本错误: {result}")
+            return 1
+        logger.info(f"生成脚本: 号码列表={args.numbers}, 数量={count}, 文件={result}")
+    else:
+        try:
+            write_stdout(generator.iter_number_script(phone_numbers, params, args.workers or 1))
+        except BrokenPipeError:
+            return 0
+    
+    if ledger is not None:
+        ledger.record_job(start_number, count, params, name=args.numbers, output=args.output, intervals=intervals)
+    return 0
+
+def run_verify(args, logger, generator):
+    """校验已生成的脚本文件
+    
+    Args:
+        args: 解析后的命令行参数
+        logger: 日志记录器
+        generator: 脚本生成器，按其模板解析脚本
+        
+    Returns:
+        int: 退出码，脚本有缺失、重复或错误时为1
+    """
+    from src.core.parser import ScriptParser
+    from src.utils.file_handler import FileHandler
+    
+    try:
+        rollback = args.rollback_script or ScriptParser.detect_rollback(args.verify, generator)
+        parser = ScriptParser.load(args.verify, generator, rollback)
+    except (OSError, ValueError) as e:
+        logger.error(f"读取脚本错误: {str(e)}")
+        return 2
+    
+    kind = "删号脚本" if rollback else "脚本"
+    logger.info(f"校验{kind}: {args.verify}, {parser.summary()}")
+    for key, runs in parser.missing().items():
+        first, last, _ = runs[0]
+        logger.warning(f"{key} 缺失 {sum(count for _, _, count in runs)} 个号码，首个缺失区间 {first}-{last}")
+    for key, count in parser.duplicates.items():
+        if count:
+            logger.warning(f"{key} 重复 {count} 条")
+    for line_number, line, message in parser.errors[:10]:
+        logger.warning(f"脚本第 {line_number} 行{message}: {line}")
+    if args.error_report:
+        with open(args.error_report, 'w', encoding='utf-8') as f:
+            f.write(parser.report())
+    
+    # 没有识别出任何号码时无从检查缺失和重复，不视为通过
+    if not parser.number_runs().ranges:
+        logger.error(f"{kind}中没有可识别的号码命令")
+        return 1
+    
+    # 还原任务描述：号码连续且参数相同时为任务记录，否则为批量任务清单；
+    # 有无法识别的行、重复或缺失时不保存，参数不同的号码按参数分别还原
+    if args.save_job and not parser.restorable:
+        logger.error(f"{kind}有错误、重复或缺失号码，未保存任务描述: {args.save_job}")
+        return 1
+    if args.save_job:
+        jobs = parser.jobs()
+        if len(jobs) == 1:
+            success, result = FileHandler.save_job_record(jobs[0], args.save_job)
+            if not success:
+                logger.error(f"保存任务记录错误: {result}")
+                return 1
+            logger.info(f"任务记录: {result}")
+        else:
+            # 各任务只写出与 defaults 不同的参数
+            defaults = parser.script_params()
+            manifest = {
+                "defaults": defaults,
+                "jobs": [
+                    dict({"start_number": job["start_number"], "count": job["count"]},
+                         **{name: value for name, value in job["params"].items() if defaults.get(name) != value})
+                    for job in jobs
+                ],
+            }
+            with open(args.save_job, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=4, ensure_ascii=False)
+            logger.info(f"号码不连续或参数不同，已保存为 {len(jobs)} 个任务的清单: {args.save_job}")
+    
+    return 0 if parser.ok else 1
+
+def run_diff(args, logger, generator):
+    """比较两个已生成的脚本并输出增量脚本
+    
+    Args:
+        args: 解析后的命令行参数
+        logger: 日志记录器
+        generator: 脚本生成器，按其模板解析脚本
+        
+    Returns:
+        int: 退出码
+    """
+    from src.core.diff import ScriptDiff
+    from src.utils.file_handler import FileHandler
+    
+    if args.compress and not args.output:
+        logger.error("压缩输出需要指定 -o")
+        return 2
+    
+    old_path, new_path = args.diff
+    try:
+        diff = ScriptDiff.load(old_path, new_path, generator)
+    except (OSError, ValueError) as e:
+        logger.error(f"比较脚本错误: {str(e)}")
+        return 2
+    
+    # 无法识别的行不参与比较
+    for path, parser in ((old_path, diff.old), (new_path, diff.new)):
+        if parser.error_count:
+            logger.warning(f"{path} 有 {parser.error_count} 行错误，可用 --verify 查看")
+    
+    logger.info(f"比较脚本: {old_path} -> {new_path}, {diff.summary()}")
+    if args.error_report:
+        with open(args.error_report, 'w', encoding='utf-8') as f:
+            f.write(diff.report())
+    
+    chunks = diff.iter_delta_script()
+    if args.output:
+        success, result = FileHandler.write_script_chunks(chunks, args.output, compression=args.compress)
+        if not success:
+            logger.error(f"生成脚本错误: {result}")
+            return 1
+        logger.info(f"增量脚本: {result}")
+    else:
+        try:
+            write_stdout(chunks)
+        except BrokenPipeError:
+            return 0
+    return 0
+
+def main(argv=None):
+    """主函数
+    
+    Args:
+        argv: 命令行参数列表，默认使用 sys.argv
+        
+    Returns:
+        int: 退出码
+    """
+    args = build_parser().parse_args(argv)
+    
+    from src.core.generator import ScriptGenerator
+    from src.core.template import TemplateSet
+    from src.utils.file_handler import FileHandler
+    from src.utils.logger import Logger
+    
+    logger = Logger()
+    
+    # 加载模板集，覆盖默认模板
+    generator = ScriptGenerator()
+    try:
+        for template_file in args.templates:
+            generator.apply_template_set(TemplateSet.load(template_file))
+    except (OSError, ValueError) as e:
+        logger.error(f"加载模板集错误: {str(e)}")
+        return 2
+    
+    if args.dump_templates:
+        template_set = {
+            "name": "default",
+            "templates": generator.templates,
+            "rollback_templates": generator.rollback_templates,
+        }
+        write_stdout([json.dumps(template_set, indent=4, ensure_ascii=False), "\n"])
+        return 0
+    
+    if args.verify:
+        return run_verify(args, logger, generator)
+    if args.diff:
+        return run_diff(args, logger, generator)
+    
+    # 加载排除号码
+    exclusions = None
+    if args.exclude:
+        from src.core.exclusion import ExclusionIndex
+        try:
+            exclusions = ExclusionIndex.load(args.exclude)
+        except (OSError, ValueError) as e:
+            logger.error(f"读取排除号码错误: {str(e)}")
+            return 2
+        if args.delta_from:
+            logger.error("增量模式暂不支持排除号码")
+            return 2
+    
+    if args.rollback and not args.output:
+        logger.error("删号脚本需要同时指定 -o")
+        return 2
+    if args.rollback and (args.manifest or args.delta_from or args.per_ne or args.split_lines or args.split_mb):
+        logger.error("删号脚本不能与清单、增量或按网元输出同时使用")
+        return 2
+    
+    if args.numbers:
+        if args.manifest or args.delta_from or args.per_ne or args.split_lines or args.split_mb:
+            logger.error("号码列表不能与清单、增量或按网元输出同时使用")
+            return 2
+        return run_numbers(args, logger, generator, exclusions)
+    
+    if args.manifest:
+        try:
+            return run_manifest(args, logger, exclusions)
+        except (OSError, ValueError) as e:
+            logger.error(f"读取清单错误: {str(e)}")
+            return 2
+    
+    try:
+        start_number, count, params, max_count = load_job(args)
+    except (OSError, ValueError, TypeError) as e:
+        logger.error(f"读取配置错误: {str(e)}")
+        return 2
+    
+    valid, error_msg = validate_job(start_number, count, params, max_count, generator)
+    if not valid:
+        logger.error(f"参数错误: {error_msg}")
+        return 2
+    
+    current_job = {"start_number": start_number, "count": count, "params": params}
+    
+    # 按网元分片输出
+    split = args.per_ne or args.split_lines or args.split_mb
+    if split and args.delta_from:
+        logger.error("增量模式不支持按网元分片输出")
+        return 2
+    if args.compress and not args.output and not split:
+        logger.error("压缩输出需要指定 -o 或按网元输出")
+        return 2
+    
+    # 与历史任务重叠时给出警告；增量脚本本身就是针对已放号码，不检查也不记录
+    ledger = None
+    if not args.no_ledger and not args.delta_from:
+        from src.utils.ledger import ProvisioningLedger
+        ledger = ProvisioningLedger()
+        overlaps = ledger.find_overlaps(start_number, count, exclusions)
+        if overlaps:
+            logger.warning(f"号码重叠: {ProvisioningLedger.describe_overlaps(overlaps)}")
+    
+    if split:
+        max_bytes = int(args.split_mb * 1024 * 1024) if args.split_mb else None
+        success, result = FileHandler.write_split_job(
+            start_number, count, params, args.output_dir or ".", args.split_lines, max_bytes,
+            args.compress, generator, exclusions=exclusions
+        )
+        if not success:
+            logger.error(f"生成脚本错误: {result}")
+            return 1
+        logger.info(f"生成脚本: 起始号码={start_number}, 数量={count}, 清单={result}")
+        if ledger is not None:
+            ledger.record_job(start_number, count, params, exclusions, output=result)
+        return 0
+    
+    # 增量模式只输出与上次任务相比发生变化的命令
+    if args.delta_from:
+        success, previous_job = FileHandler.load_job_record(args.delta_from)
+        if not success:
+            logger.error(f"读取任务记录错误: {previous_job}")
+            return 2
+        make_chunks = lambda rollback_sink: generator.iter_delta_script(previous_job, current_job)
+    elif args.cache and (args.workers or 1) <= 1:
+        from src.utils.cache import ScriptCache
+        cache = ScriptCache()
+        make_chunks = lambda rollback_sink: cache.iter_full_script(
+            generator, start_number, count, params, exclusions=exclusions, rollback_sink=rollback_sink
+        )
+    else:
+        make_chunks = lambda rollback_sink: generator.iter_full_script(
+            start_number, count, params, args.workers or 1, exclusions=exclusions, rollback_sink=rollback_sink
+        )
+    
+    if exclusions is not None:
+        from src.core.number_range import parse_start_number
+        start = parse_start_number(start_number)[2]
+        logger.info(f"排除号码: {exclusions.count_in(start, start + count)} 个")
+    
+    if args.output:
+        success, result = FileHandler.write_with_rollback(
+            make_chunks, args.output, args.rollback, generator, compression=args.compress
+        )
+        if not success:
+            logger.error(f"生成脚本错误: {result}")
+            return 1
+        logger.info(f"生成脚本: 起始号码={start_number}, 数量={count}, 文件={result}")
+        if args.rollback:
+            logger.info(f"删号脚本: {args.rollback}")
+    else:
+        try:
+            write_stdout(make_chunks(None))
+        except BrokenPipeError:
+            # 下游管道提前关闭（如 head），不视为错误
+            return 0
+    
+    # 记入放号台账
+    if ledger is not None:
+        ledger.record_job(start_number, count, params, exclusions, output=args.output)
+    
+    # 保存本次任务记录
+    if args.save_job:
+        success, result = FileHandler.save_job_record(current_job, args.save_job)
+        if not success:
+            logger.error(f"保存任务记录错误: {result}")
+            return 1
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main()) 
\ No newline at end of file
@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+批量任务模块，一次运行处理清单中的多个号码段
+"""
+
+import os
+import csv
+import json
+import heapq
+import shutil
+import tempfile
+
+from src.core.generator import ScriptGenerator
+from src.core.schema import ParamSchema
+from src.core.template import PARAM_NAMES, TemplateSet
+from src.core.validator import InputValidator
+from src.utils.file_handler import COMPRESSION_SUFFIXES, FileHandler
+from src.utils.ledger import ProvisioningLedger
+
+class BatchJob:
+    """批量清单中的单个号码段任务"""
+    
+    __slots__ = ('name', 'start_number', 'count', 'params', 'output')
+    
+    def __init__(self, name, start_number, count, params, output=None):
+        """初始化任务
+        
+        Args:
+            name: 任务名称
+            start_number: 起始号码
+            count: 号码数量
+            params: 参数字典
+            output: 单独输出文件路径，可选
+        """
+        self.name = name
+        self.start_number = start_number
+        self.count = count
+        self.params = params
+        self.output = output
+    
+    def file_name(self, compression=None):
+        """获取任务默认的输出文件名
+        
+        Args:
+            compression: 压缩格式，gzip、zstd 或 None，决定文件后缀
+            
+        Returns:
+            str: 文件名
+        """
+        return f"{self.name}_{self.start_number.lstrip('+')}.txt{COMPRESSION_SUFFIXES.get(compression, '')}"
+
+def _build_job(index, row, defaults):
+    """根据清单中的一行构造任务
+    
+    Args:
+        index: 行序号，从0开始
+        row: 清单行字典
+        defaults: 默认参数字典
+        
+    Returns:
+        BatchJob: 任务
+    """
+    params = {name: str(defaults.get(name, "")) for name in PARAM_NAMES}
+    for name in PARAM_NAMES:
+        value = row.get(name)
+        if value not in (None, ""):
+            params[name] = str(value)
+    
+    count = row.get('count')
+    try:
+        count = int(count)
+    except (TypeError, ValueError):
+        pass
+    
+    name = row.get('name') or f"job{index + 1:03d}"
+    return BatchJob(name, str(row.get('start_number') or ""), count, params, row.get('output') or None)
+
+def load_manifest(file_path, defaults=None):
+    """加载批量任务清单
+    
+    支持两种格式：
+    - JSON：任务列表，或 {"defaults": {...}, "jobs": [...]}
+    - CSV：首行为表头，列名为 name、start_number、count、output 及各网元参数，空单元格使用默认值
+    
+    Args:
+        file_path: 清单文件路径
+        defaults: 默认参数字典，通常为 ConfigManager 的配置
+        
+    Returns:
+        list: BatchJob 列表
+    """
+    defaults = dict(defaults or {})
+    
+    if file_path.lower().endswith('.csv'):
+        with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            defaults.update(data.get('defaults', {}))
+            rows = data.get('jobs', [])
+        else:
+            rows = data
+    
+    return [_build_job(index, row, defaults) for index, row in enumerate(rows)]
+
+def _run_job(start_number, count, params, file_path, template_files=(), exclusions=None, compression=None):
+    """在工作进程中生成单个任务的脚本文件
+    
+    Args:
+        start_number: 起始号码
+        count: 号码数量
+        params: 参数字典
+        file_path: 输出文件路径
+        template_files: 模板集文件路径列表
+        exclusions: 排除索引 ExclusionIndex，可选
+        compression: 压缩格式，见 FileHandler.write_script_chunks
+        
+    Returns:
+        tuple: (是否成功, 文件路径或错误消息)
+    """
+    generator = ScriptGenerator()
+    for template_file in template_files:
+        generator.apply_template_set(TemplateSet.load(template_file))
+    return FileHandler.write_script_job(
+        start_number, count, params, file_path, generator=generator, exclusions=exclusions,
+        compression=compression
+    )
+
+class BatchRunner:
+    """批量任务执行器，先统一验证，再并发生成"""
+    
+    def __init__(self, jobs, workers=None, max_count=None, template_files=(), exclusions=None, ledger=None,
+                 compression=None):
+        """初始化执行器
+        
+        Args:
+            jobs: BatchJob 列表
+            workers: 并发进程数，默认为CPU核数
+            max_count: 单个任务的号码数量上限，默认为 InputValidator.MAX_COUNT
+            template_files: 模板集文件路径列表，按顺序覆盖默认模板
+            exclusions: 排除索引 ExclusionIndex，各任务中被排除的号码不生成命令
+            ledger: 放号台账 ProvisioningLedger，指定时生成成功的任务会记入台账
+            compression: 压缩格式，gzip、zstd 或 None；None 时按各输出文件的后缀（.gz、.zst）判断
+        """
+        self.jobs = jobs
+        self.workers = workers or os.cpu_count() or 1
+        self.max_count = max_count
+        self.template_files = tuple(template_files)
+        self.exclusions = exclusions
+        self.ledger = ledger
+        self.compression = compression
+    
+    def validate(self):
+        """验证全部任务，不在第一个错误处停止
+        
+        Returns:
+            list: 错误列表，每项为 (任务序号, 任务名称, 错误消息)
+        """
+        # 校验规则按模板集实际引用的参数编译
+        generator = ScriptGenerator()
+        for template_file in self.template_files:
+            generator.apply_template_set(TemplateSet.load(template_file))
+        schema = ParamSchema.for_generator(generator, self.max_count or InputValidator.MAX_COUNT, job_fields=True)
+        
+        rows = (dict(job.params, start_number=job.start_number, count=job.count) for job in self.jobs)
+        return [
+            (index, self.jobs[index].name, message)
+            for index, _, message in schema.validate_rows(rows)
+        ]
+    
+    def find_overlaps(self):
+        """检查各任务是否与台账中的历史任务重叠
+        
+        Returns:
+            list: 重叠列表，每项为 (任务序号, 任务名称, ProvisioningLedger.find_overlaps 的结果)
+        """
+        if self.ledger is None:
+            return []
+        
+        overlaps = []
+        for index, job in enumerate(self.jobs):
+            found = self.ledger.find_overlaps(job.start_number, job.count, self.exclusions)
+            if found:
+                overlaps.append((index, job.name, found))
+        return overlaps
+    
+    def find_job_overlaps(self):
+        """检查清单中的任务之间是否有号码重叠
+        
+        全部任务的号码区间按起点排序后扫描一遍，用按终点排列的堆保存尚未结束的区间：
+        当前区间与堆中每个区间都相交，终点不超过当前起点的区间先出堆，不需要两两比较全部区间。
+        
+        Returns:
+            list: 重叠列表，每项为 (任务序号, 任务名称, 先出现的任务序号, 其名称, 重叠号码数)，按任务序号排列
+        """
+        intervals = sorted(
+            (prefix, width, start, end, index)
+            for index, job in enumerate(self.jobs)
+            for prefix, width, start, end in ProvisioningLedger.job_intervals(job.start_number, job.count, self.exclusions)
+        )
+        
+        # 只有前缀和位数都相同的号码才可能重叠，换组时清空
+        counts = {}
+        group = None
+        active = []
+        for prefix, width, start, end, index in intervals:
+            if (prefix, width) != group:
+                group, active = (prefix, width), []
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+            for other_end, other in active:
+                if other != index:
+                    pair = (max(index, other), min(index, other))
+                    counts[pair] = counts.get(pair, 0) + min(end, other_end) - start
+            heapq.heappush(active, (end, index))
+        
+        return [
+            (index, self.jobs[index].name, other, self.jobs[other].name, count)
+            for (index, other), count in sorted(counts.items())
+        ]
+    
+    def run(self, output_dir=None, merged_path=None):
+        """并发生成全部任务
+        
+        Args:
+            output_dir: 单独输出文件所在目录，任务未指定 output 时使用
+            merged_path: 合并输出文件路径，指定时按清单顺序合并为一个文件
+            
+        Returns:
+            list: 结果列表，每项为 (任务, 是否成功, 文件路径或错误消息)
+        """
+        temp_dir = None
+        if merged_path:
+            # 合并模式下先以未压缩文本生成到临时目录，再按清单顺序拼接并压缩
+            directory = os.path.dirname(merged_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            temp_dir = tempfile.mkdtemp(prefix=".batch.", dir=directory or None)
+        
+        from concurrent.futures import ProcessPoolExecutor
+        
+        try:
+            paths = []
+            for index, job in enumerate(self.jobs):
+                if temp_dir:
+                    paths.append(os.path.join(temp_dir, f"{index:06d}.txt"))
+                else:
+                    paths.append(job.output or os.path.join(output_dir or "", job.file_name(self.compression)))
+            
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [
+                    executor.submit(
+                        _run_job, job.start_number, job.count, job.params, path,
+                        self.template_files, self.exclusions, None if temp_dir else self.compression
+                    )
+                    for job, path in zip(self.jobs, paths)
+                ]
+                results = [(job, *future.result()) for job, future in zip(self.jobs, futures)]
+            
+            if temp_dir and all(success for _, success, _ in results):
+                success, result = self._merge(paths, merged_path, self.compression)
+                results = [(job, success, result) for job, _, _ in results]
+            
+            # 生成成功的任务记入台账
+            if self.ledger is not None:
+                for job, success, result in results:
+                    if success:
+                        self.ledger.record_job(
+                            job.start_number, job.count, job.params, self.exclusions, job.name, result
+                        )
+            
+            return results
+        
+        finally:
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    @staticmethod
+    def _merge(paths, merged_path, compression=None):
+        """按顺序合并多个脚本文件
+        
+        Args:
+            paths: 待合并的未压缩文件路径列表
+            merged_path: 合并输出文件路径
+            compression: 压缩格式，见 FileHandler.write_script_chunks
+            
+        Returns:
+            tuple: (是否成功, 文件路径或错误消息)
+        """
+        def iter_chunks():
+            for index, path in enumerate(paths):
+                # 各任务脚本之间空一行
+                if index:
+                    yield "\n\n"
+                with open(path, 'r', encoding='utf-8', newline='') as f:
+                    yield from iter(lambda: f.read(1024*1024), "")
+        
+        return FileHandler.write_script_chunks(iter_chunks(), merged_path, compression=compression) 
\ No newline at end of file
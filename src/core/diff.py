@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+脚本语义比较模块
+
+两个已生成的脚本分别由 ScriptParser 流式解析为各模板的号码覆盖索引，
+再按 (模板, 号码) 对齐比较，得到各网元新增、删除和参数变化的命令，并可输出为增量脚本。
+"""
+
+from src.core.generator import ScriptGenerator
+from src.core.number_range import NumberRange, format_number
+from src.core.parser import MAX_VARIANTS, PRESENCE, ScriptParser, segments
+
+class ScriptDiff:
+    """两个脚本的语义比较结果
+    
+    覆盖索引中每个号码1字节，保存该号码命令的参数组合编号，号码数值本身就是连接键。
+    比较时先把两边的编号换成共同的编号，再整段做按位运算找出新增、删除和变化的号码，
+    内存只与号码跨度有关，与脚本行数和行长度无关。
+    """
+    
+    def __init__(self, old, new):
+        """比较两个已解析的脚本
+        
+        Args:
+            old: 原脚本的 ScriptParser
+            new: 新脚本的 ScriptParser，两者应使用相同的模板集
+            
+        Raises:
+            ValueError: 某模板两边的参数组合合计超过 MAX_VARIANTS 种
+        """
+        self.old = old
+        self.new = new
+        self.generator = new.generator
+        
+        # 模板键 -> [(号码段, 原参数), ...] / [(号码段, 新参数), ...] / [(号码段, 原参数, 新参数), ...]
+        self.removed = {}
+        self.added = {}
+        self.changed = {}
+        
+        old_groups = old.number_groups()
+        new_groups = new.number_groups()
+        keys = [
+            key for _, _, section_keys in self.generator.SECTIONS for key in section_keys
+            if key in new.patterns and new.patterns[key].number_field is not None
+        ]
+        for group in sorted(set(old_groups) | set(new_groups)):
+            bounds = [bound for bound in (old_groups.get(group), new_groups.get(group)) if bound]
+            start = min(low for low, _ in bounds)
+            end = max(high for _, high in bounds)
+            
+            # 按放号顺序比较，先删后加重建的号码传递给依赖模板，依赖命令即使参数未变也重新下发
+            forced = {}
+            for key in keys:
+                rebuilt = self._compare(key, group, start, end, forced.get(key, 0))
+                if rebuilt and key in self.generator.rollback_templates:
+                    for dependent in self.generator.DEPENDENTS.get(key, ()):
+                        forced[dependent] = forced.get(dependent, 0) | rebuilt
+    
+    @classmethod
+    def load(cls, old_path, new_path, generator=None):
+        """解析并比较两个脚本文件
+        
+        Args:
+            old_path: 原脚本文件路径
+            new_path: 新脚本文件路径
+            generator: 脚本生成器，按其模板解析两个脚本
+            
+        Returns:
+            ScriptDiff: 比较结果
+            
+        Raises:
+            OSError: 文件读取失败
+            ValueError: 参数组合过多，或读取 .zst 文件但未安装 zstandard
+        """
+        generator = generator or ScriptGenerator()
+        return cls(ScriptParser.load(old_path, generator), ScriptParser.load(new_path, generator))
+    
+    def _compare(self, key, group, start, end, forced=0):
+        """比较一个模板在一组号码上的命令
+        
+        Args:
+            key: 模板键
+            group: (前缀, 位数, 页号)
+            start: 起始数值
+            end: 结束数值（不含）
+            forced: 需要重新下发的号码标记，第 i 位对应数值 start + i，两边都有命令时记为变化
+            
+        Returns:
+            int: 两边都有命令且记为变化的号码标记，格式同 forced
+        """
+        prefix, width, _ = group
+        
+        # 两边的参数组合编号换成共同编号，相同参数的编号相同
+        shared = []
+        tables = []
+        for parser in (self.old, self.new):
+            table = bytearray(256)
+            for variant, params in enumerate(parser.patterns[key].variants, 1):
+                if params not in shared:
+                    shared.append(params)
+                table[variant] = shared.index(params) + 1
+            tables.append(bytes(table))
+        if len(shared) > MAX_VARIANTS:
+            raise ValueError(f"{key} 的参数组合超过 {MAX_VARIANTS} 种，无法比较")
+        
+        size = end - start
+        before = self.old.variants(key, group, start, end).translate(tables[0])
+        after = self.new.variants(key, group, start, end).translate(tables[1])
+        if before == after and not forced:
+            return 0
+        
+        def flags(value):
+            return int.from_bytes(value.translate(PRESENCE), 'little')
+        
+        had = flags(before)
+        has = flags(after)
+        differs = flags((int.from_bytes(before, 'little') ^ int.from_bytes(after, 'little')).to_bytes(size, 'little'))
+        rebuilt = had & has & (differs | forced)
+        targets = (
+            (self.removed, had & ~has, (before,)),
+            (self.added, has & ~had, (after,)),
+            (self.changed, rebuilt, (before, after)),
+        )
+        for target, selected, sources in targets:
+            if not selected:
+                continue
+            runs = target.setdefault(key, [])
+            for first, last, variants in segments(selected.to_bytes(size, 'little'), sources):
+                params = tuple(shared[variant - 1] for variant in variants)
+                
+                # 与上一页末尾参数相同且相接的区间合并为一段
+                previous = runs[-1] if runs else None
+                if (previous and previous[1:] == params and first == 0
+                        and (previous[0].prefix, previous[0].width) == (prefix, width)
+                        and previous[0].start + previous[0].count == start):
+                    runs[-1] = (NumberRange(prefix, width, previous[0].start, previous[0].count + last),) + params
+                else:
+                    runs.append((NumberRange(prefix, width, start + first, last - first),) + params)
+        return rebuilt
+    
+    def counts(self):
+        """各模板新增、删除和变化的命令数
+        
+        Returns:
+            dict: 模板键 -> (新增, 删除, 变化)，按放号顺序排列，只包含有差异的模板
+        """
+        result = {}
+        for key in self.new.patterns:
+            numbers = tuple(
+                sum(len(entry[0]) for entry in target.get(key, ()))
+                for target in (self.added, self.removed, self.changed)
+            )
+            if any(numbers):
+                result[key] = numbers
+        return result
+    
+    @property
+    def identical(self):
+        """两个脚本的命令是否完全相同"""
+        return not self.removed and not self.added and not self.changed
+    
+    def iter_delta_script(self):
+        """流式输出增量脚本：删除和变化的 ADD 命令按原参数先删，新增和变化的命令按新参数放号
+        
+        重建的 ADD 命令的依赖命令已在比较时记为变化，随之重建或重设，与 ScriptGenerator.iter_delta_script 一致。
+        
+        Yields:
+            str: 脚本数据块，两个脚本相同时不输出
+        """
+        def order(entry):
+            number_range = entry[0]
+            return number_range.prefix, number_range.width, number_range.start
+        
+        removals = {
+            key: sorted(self.removed.get(key, []) + [entry[:2] for entry in self.changed.get(key, ())], key=order)
+            for _, _, keys in self.generator.ROLLBACK_SECTIONS for key in keys
+        }
+        additions = {
+            key: sorted(self.added.get(key, []) + [(entry[0], entry[2]) for entry in self.changed.get(key, ())], key=order)
+            for _, _, keys in self.generator.SECTIONS for key in keys
+        }
+        yield from self.generator.iter_delta_sections(removals, additions)
+    
+    def summary(self):
+        """生成比较结果说明
+        
+        Returns:
+            str: 说明文字
+        """
+        sections = {}
+        for key, numbers in self.counts().items():
+            totals = sections.setdefault(self.new.patterns[key].section, [0, 0, 0])
+            for index, number in enumerate(numbers):
+                totals[index] += number
+        if not sections:
+            return "两个脚本的命令相同"
+        return "，".join(
+            f"{name.upper()} 新增 {added} 条、删除 {removed} 条、变化 {changed} 条"
+            for name, (added, removed, changed) in sections.items()
+        )
+    
+    def report(self):
+        """生成差异明细
+        
+        Returns:
+            str: 每行一个号码区间，格式为 模板键<TAB>+/-/~<TAB>首号码-尾号码<TAB>数量<TAB>参数变化
+        """
+        def span(number_range):
+            last = number_range.start + number_range.count - 1
+            return (f"{format_number(number_range.prefix, number_range.width, number_range.start)}-"
+                    f"{format_number(number_range.prefix, number_range.width, last)}")
+        
+        lines = [self.summary()]
+        for key in self.new.patterns:
+            for number_range, _ in self.removed.get(key, ()):
+                lines.append(f"{key}\t-\t{span(number_range)}\t{len(number_range)}")
+            for number_range, _ in self.added.get(key, ()):
+                lines.append(f"{key}\t+\t{span(number_range)}\t{len(number_range)}")
+            for number_range, old_params, new_params in self.changed.get(key, ()):
+                changes = ", ".join(
+                    f"{name}: {old_params[name]} -> {new_params[name]}"
+                    for name in old_params if old_params[name] != new_params.get(name)
+                ) or "依赖命令重建"
+                lines.append(f"{key}\t~\t{span(number_range)}\t{len(number_range)}\t{changes}")
+        return "\n".join(lines) 
\ No newline at end of file
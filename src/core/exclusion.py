@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+号码排除索引模块
+
+已在网号码、靓号、预留测试号码等需要从放号脚本中跳过的号码，
+以合并后的有序区间保存，按二分查找判断号码是否被排除。
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from src.core.number_range import NumberRange, parse_start_number
+
+class ExclusionIndex:
+    """排除号码索引，保存为互不重叠、按起点排序的半开区间 [起点, 终点)"""
+    
+    __slots__ = ('starts', 'ends', 'path')
+    
+    def __init__(self, intervals=(), path=None):
+        """根据区间列表建立索引
+        
+        Args:
+            intervals: (起始数值, 结束数值) 列表，均包含在内，可重叠、无需排序
+            path: 来源文件路径，可选
+        """
+        self.starts = array('Q')
+        self.ends = array('Q')
+        self.path = path
+        
+        # 排序后合并重叠和相邻的区间
+        for first, last in sorted(intervals):
+            if self.ends and first <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], last + 1)
+            else:
+                self.starts.append(first)
+                self.ends.append(last + 1)
+    
+    @staticmethod
+    def _parse_value(text, line_number):
+        """解析单个号码的数值部分
+        
+        Args:
+            text: 号码文本
+            line_number: 行号，用于错误消息
+            
+        Returns:
+            int: 号码数值
+            
+        Raises:
+            ValueError: 号码格式无效
+        """
+        text = text.strip()
+        digits = text[1:] if text.startswith('+') else text
+        if not digits.isdigit():
+            raise ValueError(f"第 {line_number} 行号码格式无效: {text}")
+        return parse_start_number(text)[2]
+    
+    @classmethod
+    def load(cls, file_path):
+        """从文件加载排除号码
+        
+        文件每行一个号码或一个号码区间（首尾号码以 - 或 ~ 连接，均包含在内），
+        空行和 # 开头的注释行会被忽略，例如：
+        
+            +861088889005
+            +861088889100-+861088889199
+            
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            ExclusionIndex: 排除索引
+            
+        Raises:
+            OSError: 文件读取失败
+            ValueError: 号码或区间格式无效
+        """
+        intervals = []
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                
+                separator = '~' if '~' in line else '-'
+                if separator in line:
+                    first_text, last_text = line.split(separator, 1)
+                    first = cls._parse_value(first_text, line_number)
+                    last = cls._parse_value(last_text, line_number)
+                    if first > last:
+                        raise ValueError(f"第 {line_number} 行区间首号码大于尾号码: {line}")
+                else:
+                    first = last = cls._parse_value(line, line_number)
+                intervals.append((first, last))
+        
+        return cls(intervals, file_path)
+    
+    def __len__(self):
+        """被排除的号码总数"""
+        return sum(end - start for start, end in zip(self.starts, self.ends))
+    
+    def __contains__(self, number):
+        """判断号码是否被排除
+        
+        Args:
+            number: 号码字符串或数值
+        """
+        value = parse_start_number(number)[2] if isinstance(number, str) else number
+        position = bisect_right(self.starts, value) - 1
+        return position >= 0 and value < self.ends[position]
+    
+    def intervals_in(self, start, end):
+        """获取与 [start, end) 相交的排除区间，并截取到该范围内
+        
+        Args:
+            start: 起始数值
+            end: 结束数值（不含）
+            
+        Returns:
+            list: (起点, 终点) 半开区间列表
+        """
+        first = max(bisect_right(self.starts, start) - 1, 0)
+        last = bisect_left(self.starts, end)
+        return [
+            (max(s, start), min(e, end))
+            for s, e in zip(self.starts[first:last], self.ends[first:last])
+            if s < end and e > start
+        ]
+    
+    def count_in(self, start, end):
+        """统计 [start, end) 内被排除的号码数量
+        
+        Args:
+            start: 起始数值
+            end: 结束数值（不含）
+            
+        Returns:
+            int: 被排除的号码数量
+        """
+        return sum(e - s for s, e in self.intervals_in(start, end))
+    
+    def apply(self, number_range):
+        """为号码段附加排除标记
+        
+        Args:
+            number_range: NumberRange 号码段
+            
+        Returns:
+            NumberRange: 跳过被排除号码的号码段，没有需要排除的号码时返回原号码段
+        """
+        intervals = self.intervals_in(number_range.start, number_range.end)
+        if not intervals:
+            return number_range
+        
+        # 按区间整段清零，代价只与区间数量有关
+        mask = bytearray(b'\x01') * number_range.count
+        if number_range.mask is not None:
+            mask[:] = number_range.mask
+        for s, e in intervals:
+            mask[s - number_range.start:e - number_range.start] = bytes(e - s)
+        
+        return NumberRange(
+            number_range.prefix, number_range.width, number_range.start, number_range.count, bytes(mask)
+        ) 
\ No newline at end of file
@@ -5,9 +5,87 @@
 IMS号码脚本生成器核心模块
 """
 
+import time
+from collections import deque
+from itertools import islice
+
+from src.core.number_range import NumberRange, NumberRuns
+from src.core.template import NUMBER_FIELDS, CompiledTemplate
+
+# 工作进程内使用的生成器实例，由进程池初始化函数设置
+_worker_generator = None
+
+def _init_worker(generator):
+    """进程池初始化函数，保存生成器供后续任务使用
+    
+    Args:
+        generator: 脚本生成器
+    """
+    global _worker_generator
+    _worker_generator = generator
+
+def _render_block_task(key, params, number_range, with_rollback=False):
+    """在工作进程中渲染一段号码的单个模板
+    
+    Args:
+        key: 模板键
+        params: 参数字典
+        number_range: 本段号码段 NumberRange 或号码集合 NumberRuns
+        with_rollback: 是否同时渲染对应的删号命令
+        
+    Returns:
+        str: 本段脚本数据块；with_rollback 为True时返回 (放号数据块, 删号数据块)
+    """
+    if not with_rollback:
+        return "".join(_worker_generator.iter_block(key, number_range, params))
+    
+    rollback_chunks = []
+    text = "".join(_worker_generator.iter_block(
+        key, number_range, params, rollback_sink=lambda _, chunk: rollback_chunks.append(chunk)
+    ))
+    return text, "".join(rollback_chunks)
+
 class ScriptGenerator:
     """脚本生成器类，用于生成IMS号码放号脚本"""
     
+    # 脚本分段布局：(网元名称, 段标题, 按输出顺序排列的模板键)
+    SECTIONS = (
+        ('uspp', "//******************************USPP网元放号********************************************************",
+         ('uspp_pvi', 'uspp_pui_sip', 'uspp_pui_tel', 'uspp_impregset', 'uspp_aliasegroup')),
+        ('enum', "\n\n//******************************ENUM网元放号********************************************************\n",
+         ('enum_naptr',)),
+        ('sss', "\n\n\n//******************************SSS网元放号********************************************************",
+         ('sss_osu_sbr', 'sss_osu_oip')),
+    )
+    
+    # 删号脚本分段布局，与放号顺序相反：先SSS，再ENUM，最后USPP（先PUI后PVI）
+    ROLLBACK_SECTIONS = (
+        ('sss', "//******************************SSS网元删号********************************************************",
+         ('sss_osu_sbr',)),
+        ('enum', "\n\n\n//******************************ENUM网元删号********************************************************",
+         ('enum_naptr',)),
+        ('uspp', "\n\n\n//******************************USPP网元删号********************************************************",
+         ('uspp_pui_tel', 'uspp_pui_sip', 'uspp_pvi')),
+    )
+    
+    # 依赖关系：ADD 命令先删后加重建时，删除会连带清除依赖它的号码数据，依赖命令需随之重新下发。
+    # PUI 依附于 PVI，注册集和别名组依附于 PUI，OIP 依附于 SBR
+    DEPENDENTS = {
+        'uspp_pvi': ('uspp_pui_sip', 'uspp_pui_tel'),
+        'uspp_pui_sip': ('uspp_impregset', 'uspp_aliasegroup'),
+        'uspp_pui_tel': ('uspp_impregset', 'uspp_aliasegroup'),
+        'sss_osu_sbr': ('sss_osu_oip',),
+    }
+    
+    # 流式输出时每个数据块包含的命令行数
+    CHUNK_SIZE = 1000
+    
+    # 号码数量低于此值时不启用多进程，直接串行生成
+    PARALLEL_THRESHOLD = 50000
+    
+    # 多进程生成时每个任务包含的号码数量
+    PARALLEL_CHUNK_SIZE = 20000
+    
     def __init__(self):
         """初始化生成器"""
         self.templates = {
@@ -20,6 +98,18 @@ class ScriptGenerator:
             'sss_osu_sbr': 'ADD OSU SBR:PUI="tel:{phone}",NETTYPE=1,CC={cc},LATA={lata},TYPE="IMS",OFFLCHG="ON",CORHT="LC"&"DDD"&"IDD"&"SPCS"&"HF"&"HKMACAOTW"&"LT",CIRHT="LC"&"DDD"&"IDD"&"SPCS"&"HF"&"HKMACAOTW"&"LT",CTXOUTRHT="GRPIN"&"GRPOUT"&"GRPOUTNUM",CTXINRHT="GRPIN"&"GRPOUT"&"GRPOUTNUM",IMSUSERTYPE="NMIMS";',
             'sss_osu_oip': 'SET OSU OIP:PUI="sip:{phone}@{domain}",NF="TEL";'
         }
+        
+        # 删号（回退）命令模板，键与放号模板对应；SET 类命令随号码删除，无需单独回退
+        self.rollback_templates = {
+            'uspp_pvi': 'RMV NEWPVI:PVI={phone}@{domain};',
+            'uspp_pui_sip': 'RMV NEWPUI:PUI=sip:{phone}@{domain};',
+            'uspp_pui_tel': 'RMV NEWPUI:PUI=tel:{phone};',
+            'enum_naptr': 'RMV NaptrRec:name={reversed_number}.e164.arpa;',
+            'sss_osu_sbr': 'RMV OSU SBR:PUI="tel:{phone}";'
+        }
+        
+        # 已编译模板缓存
+        self._compiled_templates = {}
     
     def _reverse_number_for_enum(self, number):
         """将电话号码反转为ENUM格式
@@ -50,159 +140,638 @@ class ScriptGenerator:
             return phone[1:]
         return phone
     
+    def _parse_number_range(self, start_number, count, exclusions=None):
+        """解析起始号码，得到可重复遍历的号码段
+        
+        Args:
+            start_number: 起始号码，如 +861088889001
+            count: 号码数量
+            exclusions: 排除索引 ExclusionIndex，可选
+            
+        Returns:
+            NumberRange: 号码段，已跳过被排除的号码
+        """
+        number_range = NumberRange.from_start_number(start_number, count)
+        if exclusions is not None:
+            number_range = exclusions.apply(number_range)
+        return number_range
+    
+    def apply_template_set(self, template_set):
+        """应用模板集，覆盖模板集中包含的模板，其余模板保持不变
+        
+        Args:
+            template_set: TemplateSet 对象
+            
+        Raises:
+            ValueError: 模板集包含生成器不支持的模板键
+        """
+        targets = ((False, template_set.templates), (True, template_set.rollback_templates))
+        for rollback, compiled_templates in targets:
+            sources = self.rollback_templates if rollback else self.templates
+            unknown = set(compiled_templates) - set(sources)
+            if unknown:
+                raise ValueError(f"模板集 {template_set.name} 包含未知模板: {', '.join(sorted(unknown))}")
+        
+        # 模板集加载时已编译，直接放入已编译模板缓存
+        for rollback, compiled_templates in targets:
+            sources = self.rollback_templates if rollback else self.templates
+            for key, compiled in compiled_templates.items():
+                sources[key] = compiled.source
+                self._compiled_templates[(key, rollback)] = compiled
+    
+    def _compile_template(self, key, rollback=False):
+        """获取已编译的模板，模板内容变化时重新编译
+        
+        Args:
+            key: 模板键，如 uspp_pvi
+            rollback: 是否为删号模板
+            
+        Returns:
+            CompiledTemplate: 已编译的模板
+        """
+        source = (self.rollback_templates if rollback else self.templates)[key]
+        cache_key = (key, rollback)
+        compiled = self._compiled_templates.get(cache_key)
+        if compiled is None or compiled.source != source:
+            compiled = CompiledTemplate(key, source)
+            self._compiled_templates[cache_key] = compiled
+        return compiled
+    
+    def bind_template(self, key, params, rollback=False):
+        """编译模板并绑定任务常量参数
+        
+        Args:
+            key: 模板键，如 uspp_pvi
+            params: 参数字典
+            rollback: 是否为删号模板
+            
+        Returns:
+            BoundTemplate: 已绑定参数的模板
+        """
+        return self._compile_template(key, rollback).bind(params)
+    
+    def template_params(self, key):
+        """获取模板引用的任务参数名
+        
+        Args:
+            key: 模板键，如 uspp_pvi
+            
+        Returns:
+            frozenset: 参数名集合，不含逐号码字段
+        """
+        return self._compile_template(key).fields - frozenset(NUMBER_FIELDS)
+    
+    def affected_templates(self, old_params, new_params):
+        """找出参数变化后输出会改变的模板
+        
+        Args:
+            old_params: 原参数字典
+            new_params: 新参数字典
+            
+        Returns:
+            list: 按输出顺序排列的模板键
+        """
+        changed = {
+            name for name in set(old_params) | set(new_params)
+            if old_params.get(name) != new_params.get(name)
+        }
+        return [
+            key for _, _, keys in self.SECTIONS for key in keys
+            if self.template_params(key) & changed
+        ]
+    
+    def rebuilt_templates(self, keys):
+        """找出重新下发指定模板时需要一并重新下发的模板
+        
+        有删号模板的 ADD 命令通过先删后加重建，依赖它的命令（包括依赖的依赖）随之重建或重设；
+        SET 命令直接重设，不影响其他命令。
+        
+        Args:
+            keys: 需要重新下发的模板键
+            
+        Returns:
+            set: 包含依赖模板在内的模板键集合
+        """
+        result = set()
+        pending = list(keys)
+        while pending:
+            key = pending.pop()
+            if key in result:
+                continue
+            result.add(key)
+            if key in self.rollback_templates:
+                pending.extend(self.DEPENDENTS.get(key, ()))
+        return result
+    
+    def render_line(self, bound, phone):
+        """渲染单个号码的一行命令
+        
+        Args:
+            bound: bind_template 返回的已绑定模板
+            phone: 电话号码
+            
+        Returns:
+            str: 命令行
+        """
+        return bound.render_lines(self._number_columns([phone], set(bound.slots)), 1)[0]
+    
+    def _number_columns(self, phones, fields):
+        """计算一批号码的逐号码字段
+        
+        Args:
+            phones: 号码列表
+            fields: 需要的字段名集合
+            
+        Returns:
+            dict: 字段名到值列表的映射
+        """
+        columns = {'phone': phones}
+        if 'alias_id' in fields:
+            columns['alias_id'] = [self._extract_alias_id(phone) for phone in phones]
+        if 'reversed_number' in fields:
+            columns['reversed_number'] = [self._reverse_number_for_enum(phone) for phone in phones]
+        return columns
+    
+    def _iter_column_chunks(self, phone_numbers, fields):
+        """将号码按 CHUNK_SIZE 分批并计算逐号码字段
+        
+        NumberRange 号码段和 NumberRuns 号码集合整批计算，其它号码列表逐个计算。
+        
+        Args:
+            phone_numbers: 电话号码列表、NumberRange 号码段或 NumberRuns 号码集合
+            fields: 需要的字段名集合
+            
+        Yields:
+            tuple: (字段名到值列表的映射, 本批号码数量)
+        """
+        if isinstance(phone_numbers, (NumberRange, NumberRuns)):
+            for chunk in phone_numbers.chunks(self.CHUNK_SIZE):
+                yield chunk.columns(fields), len(chunk)
+            return
+        
+        iterator = iter(phone_numbers)
+        while True:
+            chunk = list(islice(iterator, self.CHUNK_SIZE))
+            if not chunk:
+                return
+            yield self._number_columns(chunk, fields), len(chunk)
+    
+    def iter_block(self, key, phone_numbers, params, progress=None, rollback=False, rollback_sink=None):
+        """流式生成单个模板对应的全部命令行
+        
+        模板在开始时绑定一次常量参数，循环内只填入逐号码字段。
+        每个数据块形如 "\\n行1\\n行2..."，多个数据块直接拼接即为该模板的完整输出。
+        
+        Args:
+            key: 模板键，如 uspp_pvi
+            phone_numbers: 电话号码列表或 NumberRange 号码段
+            params: 参数字典
+            progress: 进度回调 progress(模板键, 已完成号码数, 号码总数)，可选
+            rollback: 是否使用删号模板
+            rollback_sink: 删号命令接收函数 rollback_sink(模板键, 数据块)，可选；
+                该模板有删号模板时，每批号码的删号命令与放号命令使用同一批逐号码字段一起渲染
+                
+        Yields:
+            str: 脚本数据块
+        """
+        bound = self.bind_template(key, params, rollback)
+        fields = set(bound.slots)
+        total = len(phone_numbers) if progress else 0
+        done = 0
+        
+        undo = None
+        if rollback_sink is not None and not rollback and key in self.rollback_templates:
+            undo = self.bind_template(key, params, True)
+            fields.update(undo.slots)
+        
+        for columns, size in self._iter_column_chunks(phone_numbers, fields):
+            yield "\n" + "\n".join(bound.render_lines(columns, size))
+            if undo is not None:
+                rollback_sink(key, "\n" + "\n".join(undo.render_lines(columns, size)))
+            
+            if progress:
+                done += size
+                progress(key, done, total)
+    
+    def iter_section(self, section, phone_numbers, params, progress=None, rollback_sink=None):
+        """流式生成单个网元的放号脚本
+        
+        Args:
+            section: 网元名称，uspp、enum 或 sss
+            phone_numbers: 电话号码列表或 NumberRange 号码段，需可重复遍历
+            params: 参数字典
+            progress: 进度回调，见 iter_block
+            rollback_sink: 删号命令接收函数，见 iter_block
+            
+        Yields:
+            str: 脚本数据块，按顺序拼接后与 generate_*_script 的结果一致
+        """
+        for name, header, keys in self.SECTIONS:
+            if name != section:
+                continue
+            
+            # 段标题
+            yield header
+            
+            # 各模板之间以空行分隔
+            for index, key in enumerate(keys):
+                if index:
+                    yield "\n\n"
+                yield from self.iter_block(key, phone_numbers, params, progress, rollback_sink=rollback_sink)
+            return
+        
+        raise ValueError(f"未知的网元: {section}")
+    
+    def iter_uspp_script(self, phone_numbers, params):
+        """流式生成USPP网元放号脚本
+        
+        Args:
+            phone_numbers: 电话号码列表或 NumberRange 号码段
+            params: 参数字典，包含domain, cfn, password, sifc_id, scscf等
+            
+        Yields:
+            str: 脚本数据块
+        """
+        return self.iter_section('uspp', phone_numbers, params)
+    
+    def iter_enum_script(self, phone_numbers, params):
+        """流式生成ENUM网元放号脚本
+        
+        Args:
+            phone_numbers: 电话号码列表或 NumberRange 号码段
+            params: 参数字典，包含domain等
+            
+        Yields:
+            str: 脚本数据块
+        """
+        return self.iter_section('enum', phone_numbers, params)
+    
+    def iter_sss_script(self, phone_numbers, params):
+        """流式生成SSS网元放号脚本
+        
+        Args:
+            phone_numbers: 电话号码列表或 NumberRange 号码段
+            params: 参数字典，包含cc, lata, domain等
+            
+        Yields:
+            str: 脚本数据块
+        """
+        return self.iter_section('sss', phone_numbers, params)
+    
+    def _iter_parallel(self, phone_numbers, params, workers, progress=None, rollback_sink=None):
+        """使用进程池生成完整脚本，按原有段落顺序合并结果
+        
+        号码区间按 PARALLEL_CHUNK_SIZE 切分，每个模板的每一段作为一个任务提交；
+        同时在途的任务数量有上限，结果按提交顺序依次输出，内存占用保持有界。
+        
+        Args:
+            phone_numbers: NumberRange 号码段或 NumberRuns 号码集合
+            params: 参数字典
+            workers: 工作进程数
+            progress: 进度回调，见 iter_block
+            rollback_sink: 删号命令接收函数，见 iter_block；各模板的删号数据块按号码顺序依次送出
+            
+        Yields:
+            str: 脚本数据块
+        """
+        total = len(phone_numbers)
+        
+        # 按输出顺序排列的固定文本和渲染任务
+        def iter_plan():
+            for _, header, keys in self.SECTIONS:
+                yield header
+                for index, key in enumerate(keys):
+                    if index:
+                        yield "\n\n"
+                    done = 0
+                    for chunk in phone_numbers.chunks(self.PARALLEL_CHUNK_SIZE):
+                        done += len(chunk)
+                        yield key, params, chunk, done
+        
+        window = workers * 4
+        pending = deque()
+        
+        def pop_result():
+            text, key, done = pending.popleft()
+            if isinstance(text, str):
+                return text
+            text = text.result()
+            if isinstance(text, tuple):
+                text, rollback_text = text
+                rollback_sink(key, rollback_text)
+            if progress:
+                progress(key, done, total)
+            return text
+        
+        # 进程池模块导入较慢，只在并行生成时导入
+        from concurrent.futures import ProcessPoolExecutor
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as executor:
+            for item in iter_plan():
+                if isinstance(item, str):
+                    pending.append((item, None, 0))
+                else:
+                    key, _, chunk, done = item
+                    with_rollback = rollback_sink is not None and key in self.rollback_templates
+                    pending.append((executor.submit(_render_block_task, key, params, chunk, with_rollback), key, done))
+                
+                # 按顺序输出已提交的最早结果
+                while len(pending) > window:
+                    yield pop_result()
+            
+            while pending:
+                yield pop_result()
+    
+    def iter_full_script(self, start_number, count, params, workers=1, progress=None, exclusions=None,
+                         rollback_sink=None):
+        """流式生成完整的放号脚本
+        
+        号码按需生成，不会一次性构造号码列表或整份脚本，内存占用与号码数量无关。
+        
+        Args:
+            start_number: 起始号码，如 +861088889001
+            count: 号码数量
+            params: 参数字典
+            workers: 工作进程数，大于1且号码数量不低于 PARALLEL_THRESHOLD 时启用多进程
+            progress: 进度回调 progress(模板键, 已完成号码数, 号码总数)，可选
+            exclusions: 排除索引 ExclusionIndex，被排除的号码在各网元脚本中都会跳过
+            rollback_sink: 删号命令接收函数，见 iter_block；生成过程中同时产生删号脚本，
+                全部接收后用 iter_rollback_sections 按删号顺序拼接
+                
+        Yields:
+            str: 脚本数据块，按顺序拼接后与 generate_full_script 的结果一致
+        """
+        phone_numbers = self._parse_number_range(start_number, count, exclusions)
+        yield from self.iter_number_script(phone_numbers, params, workers, progress, rollback_sink)
+    
+    def iter_number_script(self, phone_numbers, params, workers=1, progress=None, rollback_sink=None):
+        """流式生成指定号码的完整放号脚本
+        
+        Args:
+            phone_numbers: NumberRange 号码段或 NumberRuns 号码集合，如导入的号码列表
+            params: 参数字典
+            workers: 工作进程数，大于1且号码数量不低于 PARALLEL_THRESHOLD 时启用多进程
+            progress: 进度回调 progress(模板键, 已完成号码数, 号码总数)，可选
+            rollback_sink: 删号命令接收函数，见 iter_block
+            
+        Yields:
+            str: 脚本数据块
+        """
+        # 大批量任务使用多进程生成
+        if workers and workers > 1 and len(phone_numbers) >= self.PARALLEL_THRESHOLD:
+            yield from self._iter_parallel(phone_numbers, params, workers, progress, rollback_sink)
+            return
+        
+        for name, _, _ in self.SECTIONS:
+            yield from self.iter_section(name, phone_numbers, params, progress, rollback_sink)
+    
+    def iter_rollback_sections(self, blocks):
+        """按删号顺序（SSS、ENUM、USPP）拼接各模板的删号数据块
+        
+        Args:
+            blocks: 模板键到删号数据块可迭代对象的映射，如 rollback_sink 收集的结果；缺少的模板视为没有号码
+            
+        Yields:
+            str: 删号脚本数据块
+        """
+        for _, header, keys in self.ROLLBACK_SECTIONS:
+            yield header
+            for index, key in enumerate(keys):
+                if index:
+                    yield "\n\n"
+                yield from blocks.get(key, ())
+    
+    def iter_rollback_script(self, start_number, count, params, exclusions=None):
+        """单独流式生成删号脚本
+        
+        与 iter_full_script 的 rollback_sink 得到的删号脚本相同，需要同时输出放号脚本时应使用后者。
+        
+        Args:
+            start_number: 起始号码
+            count: 号码数量
+            params: 参数字典
+            exclusions: 排除索引 ExclusionIndex，可选
+            
+        Yields:
+            str: 删号脚本数据块
+        """
+        phone_numbers = self._parse_number_range(start_number, count, exclusions)
+        yield from self.iter_rollback_sections({
+            key: self.iter_block(key, phone_numbers, params, rollback=True)
+            for _, _, keys in self.ROLLBACK_SECTIONS for key in keys
+        })
+    
+    def _split_ranges(self, previous, current):
+        """比较前后两个号码段
+        
+        Args:
+            previous: 原号码段
+            current: 新号码段
+            
+        Returns:
+            tuple: (删除的号码段列表, 新增的号码段列表, 保留的号码段列表)
+        """
+        # 前缀或位数不同时视为完全不同的号码段
+        if (previous.prefix, previous.width) != (current.prefix, current.width):
+            return [previous], [current], []
+        
+        old_start, old_end = previous.start, previous.end
+        new_start, new_end = current.start, current.end
+        
+        def make(start, end, source):
+            return source.span(start - source.start, end - start)
+        
+        removed = []
+        added = []
+        kept = []
+        
+        common_start, common_end = max(old_start, new_start), min(old_end, new_end)
+        if common_start < common_end:
+            kept.append(make(common_start, common_end, current))
+        
+        # 两段之差最多为首尾两部分
+        for start, end, source, target in (
+            (old_start, min(old_end, new_start), previous, removed),
+            (max(old_start, new_end), old_end, previous, removed),
+            (new_start, min(new_end, old_start), current, added),
+            (max(new_start, old_end), new_end, current, added),
+        ):
+            if start < end:
+                target.append(make(start, end, source))
+        
+        return removed, added, kept
+    
+    def iter_delta_script(self, previous_job, current_job):
+        """流式生成增量脚本，只包含与上次放号相比发生变化的命令
+        
+        - 从号码段中移除的号码：按删号顺序输出删号命令
+        - 新增的号码：输出全部放号命令
+        - 保留的号码：只重新输出引用参数发生变化的模板；ADD 类命令先删后加，SET 类命令直接重设。
+          先删后加会连带清除依赖的号码数据，因此依赖命令（PVI 下的 PUI、注册集、别名组，SBR 下的 OIP）
+          即使参数未变也一并重建或重设
+          
+        Args:
+            previous_job: 上次任务，字典包含 start_number、count、params
+            current_job: 本次任务，格式同上
+            
+        Yields:
+            str: 脚本数据块
+        """
+        old_params = previous_job['params']
+        new_params = current_job['params']
+        previous = self._parse_number_range(previous_job['start_number'], int(previous_job['count']))
+        current = self._parse_number_range(current_job['start_number'], int(current_job['count']))
+        
+        removed, added, kept = self._split_ranges(previous, current)
+        changed = self.rebuilt_templates(self.affected_templates(old_params, new_params))
+        
+        # 删号部分：移除的号码，以及保留号码中需要重建的 ADD 命令
+        removals = {
+            key: [(r, old_params) for r in sorted(removed + (kept if key in changed else []), key=lambda r: r.start)]
+            for _, _, keys in self.ROLLBACK_SECTIONS for key in keys
+        }
+        
+        # 放号部分：新增号码的全部命令，以及保留号码中变化的模板
+        additions = {
+            key: [(r, new_params) for r in sorted(added + (kept if key in changed else []), key=lambda r: r.start)]
+            for _, _, keys in self.SECTIONS for key in keys
+        }
+        
+        yield from self.iter_delta_sections(removals, additions)
+    
+    def iter_delta_sections(self, removals, additions):
+        """按增量脚本的布局输出命令：先按删号顺序输出删号命令，再按放号顺序输出放号命令
+        
+        Args:
+            removals: 模板键 -> [(号码段, 参数字典), ...]，按删号模板输出
+            additions: 模板键 -> [(号码段, 参数字典), ...]，按放号模板输出
+            
+        Yields:
+            str: 脚本数据块，没有任何命令时不输出
+        """
+        started = False
+        targets = ((True, self.ROLLBACK_SECTIONS, removals), (False, self.SECTIONS, additions))
+        for rollback, sections, blocks in targets:
+            for _, header, keys in sections:
+                present = [key for key in keys if any(len(r) for r, _ in blocks.get(key, ()))]
+                if not present:
+                    continue
+                
+                # 各段之间统一空两行，首段前不留空行
+                text = header.strip("\n")
+                yield "\n\n\n" + text if started else text
+                started = True
+                for index, key in enumerate(present):
+                    if index:
+                        yield "\n\n"
+                    for number_range, params in blocks[key]:
+                        yield from self.iter_block(key, number_range, params, rollback=rollback)
+    
+    def generate_delta_script(self, previous_job, current_job):
+        """生成增量脚本
+        
+        Args:
+            previous_job: 上次任务，字典包含 start_number、count、params
+            current_job: 本次任务，格式同上
+            
+        Returns:
+            str: 增量脚本，无变化时为空字符串
+        """
+        return "".join(self.iter_delta_script(previous_job, current_job))
+    
+    def estimate_job(self, start_number, count, params, sample_size=2000, exclusions=None):
+        """估算任务的输出大小和生成耗时
+        
+        输出大小按每个模板首尾号码的行长度推算；耗时通过生成少量样本号码实测后线性外推。
+        
+        Args:
+            start_number: 起始号码
+            count: 号码数量
+            params: 参数字典
+            sample_size: 用于计时的样本号码数量
+            exclusions: 排除索引 ExclusionIndex，可选
+            
+        Returns:
+            dict: 包含 lines（行数）、bytes（字节数）、seconds（预计秒数）
+        """
+        phone_numbers = self._parse_number_range(start_number, count, exclusions)
+        count = len(phone_numbers)
+        lines = 1
+        size = 0
+        
+        for _, header, keys in self.SECTIONS:
+            size += len(header.encode('utf-8'))
+            lines += header.count("\n")
+            for index, key in enumerate(keys):
+                if index:
+                    size += 2
+                    lines += 2
+                if not count:
+                    continue
+                bound = self.bind_template(key, params)
+                first = self.render_line(bound, phone_numbers[0])
+                last = self.render_line(bound, phone_numbers[-1])
+                average = (len(first.encode('utf-8')) + len(last.encode('utf-8'))) / 2
+                size += int((average + 1) * count)
+                lines += count
+        
+        # 生成样本并计时
+        sample = min(count, sample_size)
+        started = time.perf_counter()
+        for _ in self.iter_full_script(start_number, sample, params):
+            pass
+        elapsed = time.perf_counter() - started
+        seconds = elapsed * count / sample if sample else 0.0
+        
+        return {'lines': lines, 'bytes': size, 'seconds': seconds}
+    
     def generate_uspp_script(self, phone_numbers, params):
         """生成USPP网元放号脚本
         
         Args:
-            phone_numbers: 电话号码列表
+            phone_numbers: 电话号码列表或 NumberRange 号码段
             params: 参数字典，包含domain, cfn, password, sifc_id, scscf等
             
         Returns:
             生成的USPP脚本
         """
-        script_parts = ["//******************************USPP网元放号********************************************************"]
-        
-        # 生成PVI部分
-        for phone in phone_numbers:
-            script_parts.append(self.templates['uspp_pvi'].format(
-                phone=phone,
-                domain=params['domain'],
-                cfn=params['cfn'],
-                password=params['password']
-            ))
-        
-        script_parts.append("\n")
-        
-        # 生成SIP PUI部分
-        for phone in phone_numbers:
-            script_parts.append(self.templates['uspp_pui_sip'].format(
-                phone=phone,
-                domain=params['domain'],
-                sifc_id=params['sifc_id'],
-                scscf=params['scscf']
-            ))
-        
-        script_parts.append("\n")
-        
-        # 生成TEL PUI部分
-        for phone in phone_numbers:
-            script_parts.append(self.templates['uspp_pui_tel'].format(
-                phone=phone,
-                domain=params['domain'],
-                sifc_id=params['sifc_id'],
-                scscf=params['scscf']
-            ))
-        
-        script_parts.append("\n")
-        
-        # 生成IMPREGSET部分
-        for phone in phone_numbers:
-            script_parts.append(self.templates['uspp_impregset'].format(
-                phone=phone,
-                domain=params['domain']
-            ))
-        
-        script_parts.append("\n")
-        
-        # 生成ALIASEGROUP部分
-        for phone in phone_numbers:
-            script_parts.append(self.templates['uspp_aliasegroup'].format(
-                phone=phone,
-                domain=params['domain'],
-                alias_id=self._extract_alias_id(phone)
-            ))
-        
-        return "\n".join(script_parts)
+        return "".join(self.iter_uspp_script(phone_numbers, params))
     
     def generate_enum_script(self, phone_numbers, params):
         """生成ENUM网元放号脚本
         
         Args:
-            phone_numbers: 电话号码列表
+            phone_numbers: 电话号码列表或 NumberRange 号码段
             params: 参数字典，包含domain等
             
         Returns:
             生成的ENUM脚本
         """
-        script_parts = ["\n\n//******************************ENUM网元放号********************************************************\n"]
-        
-        for phone in phone_numbers:
-            reversed_number = self._reverse_number_for_enum(phone)
-            script_parts.append(self.templates['enum_naptr'].format(
-                reversed_number=reversed_number,
-                phone=phone,
-                domain=params['domain']
-            ))
-        
-        return "\n".join(script_parts)
+        return "".join(self.iter_enum_script(phone_numbers, params))
     
     def generate_sss_script(self, phone_numbers, params):
         """生成SSS网元放号脚本
         
         Args:
-            phone_numbers: 电话号码列表
+            phone_numbers: 电话号码列表或 NumberRange 号码段
             params: 参数字典，包含cc, lata, domain等
             
         Returns:
             生成的SSS脚本
         """
-        script_parts = ["\n\n\n//******************************SSS网元放号********************************************************"]
-        
-        # 生成OSU SBR部分
-        for phone in phone_numbers:
-            script_parts.append(self.templates['sss_osu_sbr'].format(
-                phone=phone,
-                cc=params['cc'],
-                lata=params['lata']
-            ))
-        
-        script_parts.append("\n")
-        
-        # 生成OSU OIP部分
-        for phone in phone_numbers:
-            script_parts.append(self.templates['sss_osu_oip'].format(
-                phone=phone,
-                domain=params['domain']
-            ))
-        
-        return "\n".join(script_parts)
+        return "".join(self.iter_sss_script(phone_numbers, params))
     
-    def generate_full_script(self, start_number, count, params):
+    def generate_full_script(self, start_number, count, params, workers=1, exclusions=None):
         """生成完整的放号脚本
         
         Args:
             start_number: 起始号码，如 +861088889001
             count: 号码数量
             params: 参数字典
+            workers: 工作进程数，默认串行生成
+            exclusions: 排除索引 ExclusionIndex，可选
             
         Returns:
             完整的放号脚本
         """
-        # 生成号码列表
-        phone_numbers = []
-        
-        # 解析起始号码
-        prefix = ""
-        number_part = ""
-        
-        if start_number.startswith('+'):
-            prefix = '+'
-            number_part = start_number[1:]
-        else:
-            number_part = start_number
-        
-        # 找到数字部分的起始位置
-        base_number = int(number_part)
-        
-        # 生成号码列表
-        for i in range(count):
-            current_number = base_number + i
-            phone_numbers.append(f"{prefix}{current_number}")
-        
-        # 生成各部分脚本
-        uspp_script = self.generate_uspp_script(phone_numbers, params)
-        enum_script = self.generate_enum_script(phone_numbers, params)
-        sss_script = self.generate_sss_script(phone_numbers, params)
-        
-        # 合并完整脚本
-        return uspp_script + enum_script + sss_script 
\ No newline at end of file
+        return "".join(self.iter_full_script(start_number, count, params, workers, exclusions=exclusions)) 
\ No newline at end of file
@@ -0,0 +1,354 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+号码列表导入模块
+
+从 TXT/CSV 文件流式导入不连续的号码列表（每行一个号码或一个号码区间），
+按块整体验证格式，去重后合并为号码段，可直接交给生成器生成放号脚本。
+"""
+
+import re
+import csv
+import operator
+from array import array
+from bisect import bisect_right
+from collections import deque
+from itertools import compress, islice, repeat
+
+from src.core.number_range import NumberRange, NumberRuns, parse_start_number
+from src.core.validator import InputValidator
+
+
+class NumberImporter:
+    """号码列表导入器
+    
+    文件按块读取，每块先用一次正则匹配整体验证，全部合法时批量转换；
+    否则该块逐行验证，并记录出错的行号、内容和原因。号码按前缀和位数分组保存为整数，
+    导入完成后去重、排序，相邻号码合并为号码段，间隔不超过 MAX_GAP 的号码以排除标记合并到同一号码段。
+    """
+    
+    # 每次读取的字符数，实际在行边界处切分
+    CHUNK_SIZE = 4 * 1024 * 1024
+    
+    # 号码间隔不超过该值时合并到同一号码段
+    MAX_GAP = 256
+    
+    # 号码跨度不超过该值时用位图去重（每个号码1字节）
+    BITMAP_LIMIT = 64 * 1024 * 1024
+    
+    # 最多保存的错误行数，超出部分只计数
+    MAX_ERRORS = 10000
+    
+    # CSV 中号码所在列的列名
+    NUMBER_COLUMNS = ('number', 'phone', 'msisdn', 'start_number', '号码')
+    
+    def __init__(self, max_errors=None):
+        """初始化导入器
+        
+        Args:
+            max_errors: 最多保存的错误行数，默认为 MAX_ERRORS
+        """
+        self.max_errors = self.MAX_ERRORS if max_errors is None else max_errors
+        self.errors = []
+        self.error_count = 0
+        self.line_count = 0
+        self.duplicates = 0
+        
+        # (前缀, 位数) -> 号码数值 / 号码区间
+        self._values = {}
+        self._intervals = {}
+        self._runs = None
+    
+    @classmethod
+    def load(cls, file_path, max_errors=None):
+        """导入号码文件
+        
+        Args:
+            file_path: 文件路径，.csv 文件按表头选择号码列，其它文件每行一个号码或区间
+            max_errors: 最多保存的错误行数
+            
+        Returns:
+            NumberImporter: 导入结果
+            
+        Raises:
+            OSError: 文件读取失败
+        """
+        importer = cls(max_errors)
+        importer.import_file(file_path)
+        return importer
+    
+    def import_file(self, file_path):
+        """导入号码文件
+        
+        Args:
+            file_path: 文件路径
+            
+        Raises:
+            OSError: 文件读取失败
+        """
+        # Excel 导出的 CSV 常带 BOM
+        with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+            if file_path.lower().endswith('.csv'):
+                self._import_csv(f)
+            else:
+                self._import_text(f)
+    
+    def _import_text(self, f):
+        """导入每行一个号码或区间的文本
+        
+        Args:
+            f: 文本文件对象
+        """
+        line_number = 1
+        while True:
+            # 读满一块后补齐到行尾
+            text = f.read(self.CHUNK_SIZE)
+            if not text:
+                break
+            if not text.endswith("\n"):
+                text += f.readline()
+            
+            self.feed(text, line_number)
+            line_number += text.count("\n")
+    
+    def _import_csv(self, f):
+        """导入 CSV 文件，取号码列
+        
+        首行中有 NUMBER_COLUMNS 中的列名时视为表头并取该列，否则取第一列。
+        
+        Args:
+            f: 文本文件对象
+        """
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first is None:
+            return
+        
+        # 判断首行是否为表头
+        names = [name.strip().lower() for name in first]
+        column = next((names.index(name) for name in self.NUMBER_COLUMNS if name in names), None)
+        if column is None:
+            column = 0
+            if first and InputValidator.validate_phone_number(first[0].strip()):
+                self.feed(first[0], 1)
+        
+        line_number = 2
+        while True:
+            fields = [row[column] if len(row) > column else "" for row in islice(reader, 100000)]
+            if not fields:
+                break
+            self.feed("\n".join(fields), line_number)
+            line_number += len(fields)
+    
+    def feed(self, text, first_line=1):
+        """导入一块文本
+        
+        Args:
+            text: 文本，每行一个号码或区间
+            first_line: 第一行的行号，用于错误报告
+        """
+        self._runs = None
+        if "\r" in text:
+            text = text.replace("\r\n", "\n")
+        
+        # 整块都是前缀、位数一致的合法号码时批量转换：各行等长，
+        # 每个 + 都在行首（或没有 +），去掉换行和 + 后全部是数字
+        lines = text.split("\n")
+        if lines[-1] == "":
+            lines.pop()
+        widths = set(map(len, lines))
+        if len(widths) == 1:
+            plus = text.count('+')
+            width = widths.pop() - (1 if plus else 0)
+            digits = text.replace("\n", "").replace("+", "")
+            if (
+                8 <= width <= 15 and digits.isascii() and digits.isdigit()
+                and (not plus or (plus == len(lines) and text[0] == '+' and text.count("\n+") == plus - 1))
+            ):
+                self._values.setdefault(('+' if plus else '', width), array('Q')).extend(map(int, lines))
+                self.line_count += len(lines)
+                return
+        
+        for offset, line in enumerate(lines):
+            self._feed_line(line, first_line + offset)
+    
+    def _feed_line(self, line, line_number):
+        """逐行导入
+        
+        Args:
+            line: 行文本
+            line_number: 行号
+        """
+        content = line.split('#', 1)[0].strip()
+        if not content:
+            return
+        self.line_count += 1
+        
+        separator = '~' if '~' in content else '-'
+        if separator in content:
+            first_text, last_text = (part.strip() for part in content.split(separator, 1))
+            if not InputValidator.validate_phone_number(first_text) or not InputValidator.validate_phone_number(last_text):
+                self._error(line_number, line, "号码区间格式无效")
+                return
+            prefix, width, first = parse_start_number(first_text)
+            last_prefix, last_width, last = parse_start_number(last_text)
+            if (prefix, width) != (last_prefix, last_width):
+                self._error(line_number, line, "区间首尾号码的前缀或位数不一致")
+                return
+            if first > last:
+                self._error(line_number, line, "区间首号码大于尾号码")
+                return
+            self._intervals.setdefault((prefix, width), []).append((first, last + 1))
+            return
+        
+        if not InputValidator.validate_phone_number(content):
+            self._error(line_number, line, "号码格式无效")
+            return
+        prefix, width, value = parse_start_number(content)
+        self._values.setdefault((prefix, width), array('Q')).append(value)
+    
+    def _error(self, line_number, line, message):
+        """记录错误行
+        
+        Args:
+            line_number: 行号
+            line: 行文本
+            message: 错误原因
+        """
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line_number, line.strip(), message))
+    
+    def _build_group(self, prefix, width, values, intervals):
+        """去重并合并一组前缀、位数相同的号码
+        
+        号码跨度不超过 BITMAP_LIMIT 时用位图去重，位图本身即为号码段的保留标记；
+        否则用集合去重后排序。
+        
+        Args:
+            prefix: 号码前缀
+            width: 数字位数
+            values: 号码数值数组
+            intervals: 半开区间列表
+            
+        Returns:
+            list: NumberRange 列表，按起始数值排序
+        """
+        bounds = list(intervals)
+        if len(values):
+            bounds.append((min(values), max(values) + 1))
+        low = min(start for start, _ in bounds)
+        high = max(end for _, end in bounds)
+        total = len(values) + sum(end - start for start, end in intervals)
+        if high - low > self.BITMAP_LIMIT:
+            return self._build_sparse_group(prefix, width, values, intervals)
+        
+        bitmap = bytearray(high - low)
+        for start, end in intervals:
+            bitmap[start - low:end - low] = b'\x01' * (end - start)
+        deque(map(bitmap.__setitem__, map(operator.sub, values, repeat(low)), repeat(1)), 0)
+        self.duplicates += total - bitmap.count(1)
+        
+        # 连续超过 MAX_GAP 个空位处为号码段分界
+        ranges = []
+        position = 0
+        for gap in re.finditer(b'\x00{%d,}' % (self.MAX_GAP + 1), bitmap):
+            ranges.append(NumberRange(prefix, width, low + position, gap.start() - position, bytes(bitmap[position:gap.start()])))
+            position = gap.end()
+        ranges.append(NumberRange(prefix, width, low + position, len(bitmap) - position, bytes(bitmap[position:])))
+        return ranges
+    
+    def _build_sparse_group(self, prefix, width, values, intervals):
+        """用集合去重并合并一组跨度很大的号码
+        
+        Args:
+            prefix: 号码前缀
+            width: 数字位数
+            values: 号码数值数组
+            intervals: 半开区间列表
+            
+        Returns:
+            list: NumberRange 列表，按起始数值排序
+        """
+        ranges = []
+        
+        # 合并区间，区间之间的重叠计为重复
+        merged = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                self.duplicates += max(0, min(end, merged[-1][1]) - start)
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        ranges.extend(NumberRange(prefix, width, start, end - start) for start, end in merged)
+        
+        unique = sorted(set(values))
+        self.duplicates += len(values) - len(unique)
+        
+        # 去掉已包含在区间中的号码
+        if merged:
+            starts = [start for start, _ in merged]
+            ends = [end for _, end in merged]
+            
+            def outside(value):
+                position = bisect_right(starts, value) - 1
+                return position < 0 or value >= ends[position]
+            
+            kept = list(filter(outside, unique))
+            self.duplicates += len(unique) - len(kept)
+            unique = kept
+        
+        # 间隔超过 MAX_GAP 的位置为号码段分界
+        gaps = map(operator.sub, unique[1:], unique)
+        breaks = list(compress(range(1, len(unique)), map(operator.lt, repeat(self.MAX_GAP), gaps)))
+        for first, last in zip([0] + breaks, breaks + [len(unique)]) if unique else ():
+            start = unique[first]
+            count = unique[last - 1] - start + 1
+            mask = None
+            if count != last - first:
+                mask = bytearray(count)
+                deque(map(mask.__setitem__, map(operator.sub, unique[first:last], repeat(start)), repeat(1)), 0)
+                mask = bytes(mask)
+            ranges.append(NumberRange(prefix, width, start, count, mask))
+        
+        return sorted(ranges, key=operator.attrgetter('start'))
+    
+    def number_runs(self):
+        """获取去重后的号码集合
+        
+        Returns:
+            NumberRuns: 号码集合，按前缀、位数和号码数值排序
+        """
+        if self._runs is None:
+            self.duplicates = 0
+            ranges = []
+            for key in sorted(set(self._values) | set(self._intervals)):
+                ranges.extend(self._build_group(*key, self._values.get(key, ()), self._intervals.get(key, ())))
+            self._runs = NumberRuns(ranges)
+        return self._runs
+    
+    def __len__(self):
+        """去重后的号码数量"""
+        return len(self.number_runs())
+    
+    def error_report(self):
+        """生成逐行错误报告
+        
+        Returns:
+            str: 每行一个错误，格式为 行号<TAB>原因<TAB>内容
+        """
+        lines = [f"{line_number}\t{message}\t{line}" for line_number, line, message in self.errors]
+        if self.error_count > len(self.errors):
+            lines.append(f"另有 {self.error_count - len(self.errors)} 行错误未列出")
+        return "\n".join(lines)
+    
+    def summary(self):
+        """生成导入结果说明
+        
+        Returns:
+            str: 说明文字
+        """
+        runs = self.number_runs()
+        return (f"共 {self.line_count} 行，有效号码 {len(runs)} 个（{len(runs.ranges)} 个号码段），"
+                f"重复 {self.duplicates} 个，错误 {self.error_count} 行") 
\ No newline at end of file
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+脚本行布局模块，支持按行号随机访问脚本而无需生成完整脚本
+"""
+
+from bisect import bisect_right
+
+class ScriptLayout:
+    """完整放号脚本的行布局
+    
+    脚本由段标题等固定文本和逐号码命令块组成，布局只记录各部分的起始行号，
+    任意一行都可以按需渲染，适合在界面中预览数百万行的脚本。
+    """
+    
+    def __init__(self, generator, start_number, count, params, cache=None, exclusions=None):
+        """根据任务参数构建布局
+        
+        Args:
+            generator: 脚本生成器
+            start_number: 起始号码
+            count: 号码数量
+            params: 参数字典
+            cache: 脚本缓存 ScriptCache，可选
+            exclusions: 排除索引 ExclusionIndex，可选
+        """
+        self.generator = generator
+        self.cache = cache
+        self.exclusions = exclusions
+        self.start_number = start_number
+        self.count = count
+        self.params = params
+        self.phone_numbers = generator._parse_number_range(start_number, count, exclusions)
+        
+        # 实际生成的号码数量和被排除的号码数量
+        self.number_count = len(self.phone_numbers)
+        self.excluded = count - self.number_count
+        
+        # 各段的起始行号，以及段内容：固定文本行列表或 (模板键, 已绑定模板)
+        self._starts = []
+        self._segments = []
+        
+        # 网元段标题：(网元名称, 标题行号)
+        self.sections = []
+        
+        self.line_count = 0
+        self._build()
+    
+    def _append_text(self, text):
+        """追加固定文本
+        
+        Args:
+            text: 固定文本，首行接在当前最后一行之后
+        """
+        parts = text.split("\n")
+        if self._segments and isinstance(self._segments[-1], list):
+            self._segments[-1][-1] += parts[0]
+            lines = parts[1:]
+        elif not self._segments:
+            lines = parts
+        elif parts[0]:
+            raise ValueError("固定文本必须以换行开始")
+        else:
+            lines = parts[1:]
+        
+        if not lines:
+            return
+        if self._segments and isinstance(self._segments[-1], list):
+            self._segments[-1].extend(lines)
+        else:
+            self._starts.append(self.line_count)
+            self._segments.append(list(lines))
+        self.line_count += len(lines)
+    
+    def _append_block(self, key):
+        """追加逐号码命令块
+        
+        Args:
+            key: 模板键
+        """
+        if not self.number_count:
+            return
+        self._starts.append(self.line_count)
+        self._segments.append((key, self.generator.bind_template(key, self.params)))
+        self.line_count += self.number_count
+    
+    def _build(self):
+        """按生成器的段落布局构建行索引"""
+        for name, header, keys in self.generator.SECTIONS:
+            # 标题行为段标题中第一个非空行
+            offset = next((i for i, line in enumerate(header.split("\n")) if line), 0)
+            if self._segments:
+                offset -= 1
+            self.sections.append((name, self.line_count + offset))
+            self._append_text(header)
+            
+            for index, key in enumerate(keys):
+                if index:
+                    self._append_text("\n\n")
+                self._append_block(key)
+    
+    def update_params(self, params):
+        """更新任务参数，只重新绑定引用了变化参数的模板块
+        
+        Args:
+            params: 新参数字典
+            
+        Returns:
+            list: 重新绑定的模板块 (模板键, 起始行号, 结束行号)，按输出顺序排列
+        """
+        affected = set(self.generator.affected_templates(self.params, params))
+        self.params = dict(params)
+        
+        spans = []
+        for position, segment in enumerate(self._segments):
+            if isinstance(segment, list) or segment[0] not in affected:
+                continue
+            key = segment[0]
+            self._segments[position] = (key, self.generator.bind_template(key, self.params))
+            start = self._starts[position]
+            spans.append((key, start, start + self.number_count - 1))
+        return spans
+    
+    def line_at(self, index):
+        """获取指定行的文本
+        
+        Args:
+            index: 行号，从0开始
+            
+        Returns:
+            str: 行文本
+        """
+        if not 0 <= index < self.line_count:
+            raise IndexError("行号超出范围")
+        
+        position = bisect_right(self._starts, index) - 1
+        segment = self._segments[position]
+        offset = index - self._starts[position]
+        
+        if isinstance(segment, list):
+            return segment[offset]
+        
+        _, bound = segment
+        return self.generator.render_line(bound, self.phone_numbers[offset])
+    
+    def iter_chunks(self, workers=1, progress=None):
+        """流式生成完整脚本
+        
+        Args:
+            workers: 工作进程数
+            progress: 进度回调，见 ScriptGenerator.iter_full_script
+            
+        Yields:
+            str: 脚本数据块
+        """
+        # 单进程生成时优先使用缓存
+        if self.cache is not None and workers <= 1:
+            return self.cache.iter_full_script(
+                self.generator, self.start_number, self.count, self.params, progress, self.exclusions
+            )
+        return self.generator.iter_full_script(
+            self.start_number, self.count, self.params, workers, progress, self.exclusions
+        ) 
\ No newline at end of file
@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+号码段批量计算模块
+
+连续号码段内的号码只有末几位不同，按末4位分组后，高位部分每组只格式化一次，
+末4位及其ENUM反转形式直接查预先计算好的表，整段号码的字符串拼接都在C层完成。
+"""
+
+import re
+import operator
+from array import array
+from bisect import bisect_right
+from itertools import chain, compress, repeat
+
+# 查表的末位位数
+SUFFIX_DIGITS = 4
+SUFFIX_MODULUS = 10 ** SUFFIX_DIGITS
+
+# 末4位字符串，如 "0001"
+_SUFFIXES = [f"{i:0{SUFFIX_DIGITS}d}" for i in range(SUFFIX_MODULUS)]
+
+# 末4位的ENUM反转形式，如 "1.0.0.0"
+_REVERSED_SUFFIXES = ['.'.join(reversed(suffix)) for suffix in _SUFFIXES]
+
+# 带排除标记的号码段按序号定位时，每隔多少个号码记录一次累计保留数量
+RANK_INTERVAL = 1024
+
+def parse_start_number(start_number):
+    """解析起始号码
+    
+    Args:
+        start_number: 起始号码，如 +861088889001
+        
+    Returns:
+        tuple: (前缀, 数字位数, 数值)，如 ('+', 12, 861088889001)
+    """
+    prefix = ""
+    number_part = start_number
+    
+    if start_number.startswith('+'):
+        prefix = '+'
+        number_part = start_number[1:]
+    
+    return prefix, len(number_part), int(number_part)
+
+def format_number(prefix, width, value):
+    """格式化单个号码，保留前导零
+    
+    Args:
+        prefix: 号码前缀
+        width: 数字位数
+        value: 数值
+        
+    Returns:
+        str: 号码
+    """
+    return f"{prefix}{value:0{width}d}"
+
+def number_columns(prefix, width, start, count, fields):
+    """批量计算一段连续号码的逐号码字段
+    
+    Args:
+        prefix: 号码前缀，如 + 或空字符串
+        width: 数字位数，不足时补前导零
+        start: 起始数值
+        count: 号码数量
+        fields: 需要的字段名集合，phone 总会计算
+        
+    Returns:
+        dict: 字段名到值列表的映射，包含 phone，按需包含 alias_id、reversed_number
+    """
+    # 位数太短时无法按末4位分组，逐个计算
+    if width <= SUFFIX_DIGITS:
+        digits = [f"{value:0{width}d}" for value in range(start, start + count)]
+        columns = {'phone': [prefix + d for d in digits] if prefix else digits}
+        if 'alias_id' in fields:
+            columns['alias_id'] = digits
+        if 'reversed_number' in fields:
+            columns['reversed_number'] = ['.'.join(reversed(d)) for d in digits]
+        return columns
+    
+    want_alias = 'alias_id' in fields and prefix
+    want_reversed = 'reversed_number' in fields
+    high_width = width - SUFFIX_DIGITS
+    
+    phones = []
+    aliases = [] if want_alias else None
+    reversed_numbers = [] if want_reversed else None
+    
+    value = start
+    end = start + count
+    while value < end:
+        high, low = divmod(value, SUFFIX_MODULUS)
+        span = min(SUFFIX_MODULUS - low, end - value)
+        
+        # 高位部分每组只格式化一次
+        high_digits = f"{high:0{high_width}d}"
+        suffixes = _SUFFIXES[low:low + span]
+        
+        phones.extend(map((prefix + high_digits).__add__, suffixes))
+        if want_alias:
+            aliases.extend(map(high_digits.__add__, suffixes))
+        if want_reversed:
+            reversed_high = '.' + '.'.join(reversed(high_digits))
+            reversed_numbers.extend(map(operator.add, _REVERSED_SUFFIXES[low:low + span], repeat(reversed_high)))
+        
+        value += span
+    
+    columns = {'phone': phones}
+    if 'alias_id' in fields:
+        # 无前缀时别名ID与号码相同
+        columns['alias_id'] = aliases if want_alias else phones
+    if want_reversed:
+        columns['reversed_number'] = reversed_numbers
+    return columns 
+
+class NumberRange:
+    """连续号码段，按需生成号码字符串，可重复遍历
+    
+    号码段只保存前缀、位数、起始数值和数量，不保存号码字符串；可附带排除标记，
+    被排除的号码在遍历、按序号访问和批量计算字段时都会跳过。
+    """
+    
+    __slots__ = ('prefix', 'width', 'start', 'count', 'mask', 'size', '_rank')
+    
+    def __init__(self, prefix, width, start, count, mask=None):
+        """初始化号码段
+        
+        Args:
+            prefix: 号码前缀，如 + 或空字符串
+            width: 数字位数，不足时补前导零
+            start: 起始数值
+            count: 号码段跨度（含被排除的号码）
+            mask: 保留标记，长度为 count 的 bytes，0 表示排除；None 表示全部保留
+        """
+        self.prefix = prefix
+        self.width = width
+        self.start = start
+        self.count = count
+        
+        # 没有排除任何号码时不保留标记
+        if mask is not None and mask.count(0) == 0:
+            mask = None
+        self.mask = mask
+        self.size = count if mask is None else count - mask.count(0)
+        self._rank = None
+    
+    @classmethod
+    def from_start_number(cls, start_number, count):
+        """根据起始号码创建号码段
+        
+        Args:
+            start_number: 起始号码，如 +861088889001
+            count: 号码数量
+            
+        Returns:
+            NumberRange: 号码段
+        """
+        prefix, width, start = parse_start_number(start_number)
+        return cls(prefix, width, start, count)
+    
+    @property
+    def end(self):
+        """号码段结束数值（不含）"""
+        return self.start + self.count
+    
+    @property
+    def excluded(self):
+        """被排除的号码数量"""
+        return self.count - self.size
+    
+    def __len__(self):
+        return self.size
+    
+    def __iter__(self):
+        prefix = self.prefix
+        width = self.width
+        numbers = (f"{prefix}{value:0{width}d}" for value in range(self.start, self.end))
+        if self.mask is None:
+            return numbers
+        return compress(numbers, self.mask)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.size)
+            if step != 1:
+                raise ValueError("号码段切片不支持步长")
+            if start >= stop:
+                return self.span(0, 0)
+            first = self._position(start)
+            last = self._position(stop - 1)
+            return self.span(first, last - first + 1)
+        
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("号码序号超出范围")
+        return format_number(self.prefix, self.width, self.start + self._position(index))
+    
+    def __repr__(self):
+        return (f"NumberRange({format_number(self.prefix, self.width, self.start)}, "
+                f"count={self.count}, excluded={self.excluded})")
+    
+    def _position(self, index):
+        """将保留号码的序号转换为号码段内的偏移
+        
+        Args:
+            index: 保留号码的序号
+            
+        Returns:
+            int: 号码段内的偏移
+        """
+        mask = self.mask
+        if mask is None:
+            return index
+        
+        # 首次访问时建立累计保留数量表，之后二分定位到所在区间
+        if self._rank is None:
+            rank = array('Q')
+            kept = 0
+            for offset in range(0, self.count, RANK_INTERVAL):
+                rank.append(kept)
+                kept += mask[offset:offset + RANK_INTERVAL].count(1)
+            self._rank = rank
+        block = bisect_right(self._rank, index) - 1
+        position = block * RANK_INTERVAL
+        remaining = index - self._rank[block]
+        while True:
+            position = mask.find(1, position)
+            if not remaining:
+                return position
+            remaining -= 1
+            position += 1
+    
+    def span(self, offset, count):
+        """截取号码段的一部分，保留对应的排除标记
+        
+        Args:
+            offset: 起始偏移（含被排除的号码）
+            count: 跨度
+            
+        Returns:
+            NumberRange: 子号码段
+        """
+        offset = max(0, min(offset, self.count))
+        count = max(0, min(count, self.count - offset))
+        mask = None if self.mask is None else self.mask[offset:offset + count]
+        return NumberRange(self.prefix, self.width, self.start + offset, count, mask)
+    
+    def chunks(self, size):
+        """按固定跨度切分号码段
+        
+        Args:
+            size: 每段跨度
+            
+        Yields:
+            NumberRange: 子号码段，全部被排除的子段会跳过
+        """
+        for offset in range(0, self.count, size):
+            chunk = self.span(offset, size)
+            if chunk.size:
+                yield chunk
+    
+    def columns(self, fields):
+        """批量计算号码段内保留号码的逐号码字段
+        
+        Args:
+            fields: 需要的字段名集合
+            
+        Returns:
+            dict: 字段名到值列表的映射，见 number_columns
+        """
+        columns = number_columns(self.prefix, self.width, self.start, self.count, fields)
+        if self.mask is None:
+            return columns
+        return {name: list(compress(values, self.mask)) for name, values in columns.items()}
+
+class NumberRuns:
+    """由多个号码段按顺序组成的号码集合，用于导入的不连续号码列表
+    
+    与 NumberRange 提供相同的遍历、切分和批量计算字段接口，可直接交给生成器。
+    """
+    
+    __slots__ = ('ranges', 'size')
+    
+    def __init__(self, ranges):
+        """初始化号码集合
+        
+        Args:
+            ranges: NumberRange 列表，按输出顺序排列，不含保留号码的号码段会被忽略
+        """
+        self.ranges = [number_range for number_range in ranges if number_range.size]
+        self.size = sum(number_range.size for number_range in self.ranges)
+    
+    def __len__(self):
+        return self.size
+    
+    def __iter__(self):
+        return chain.from_iterable(self.ranges)
+    
+    def __repr__(self):
+        return f"NumberRuns(ranges={len(self.ranges)}, size={self.size})"
+    
+    def chunks(self, size):
+        """按号码数量切分，较短的号码段合并到同一批
+        
+        Args:
+            size: 每批最多的号码数量
+            
+        Yields:
+            NumberRuns: 子号码集合
+        """
+        batch = []
+        batch_size = 0
+        for number_range in self.ranges:
+            for chunk in number_range.chunks(size):
+                if batch and batch_size + chunk.size > size:
+                    yield NumberRuns(batch)
+                    batch = []
+                    batch_size = 0
+                batch.append(chunk)
+                batch_size += chunk.size
+        if batch:
+            yield NumberRuns(batch)
+    
+    def intervals(self):
+        """获取保留号码的数值区间
+        
+        Returns:
+            list: (前缀, 位数, 起点, 终点) 列表，起点、终点为半开区间，格式同 ProvisioningLedger.job_intervals
+        """
+        intervals = []
+        for number_range in self.ranges:
+            prefix, width, start = number_range.prefix, number_range.width, number_range.start
+            if number_range.mask is None:
+                intervals.append((prefix, width, start, number_range.end))
+                continue
+            intervals.extend(
+                (prefix, width, start + kept.start(), start + kept.end())
+                for kept in re.finditer(b'\x01+', number_range.mask)
+            )
+        return intervals
+    
+    def columns(self, fields):
+        """批量计算全部号码的逐号码字段
+        
+        Args:
+            fields: 需要的字段名集合
+            
+        Returns:
+            dict: 字段名到值列表的映射，见 number_columns
+        """
+        if len(self.ranges) == 1:
+            return self.ranges[0].columns(fields)
+        
+        columns = {}
+        for number_range in self.ranges:
+            for name, values in number_range.columns(fields).items():
+                columns.setdefault(name, []).extend(values)
+        return columns 
\ No newline at end of file
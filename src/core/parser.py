@@ -0,0 +1,902 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+MML 脚本解析与校验模块
+
+按生成器的命令模板流式解析已生成的脚本：识别每行命令对应的模板，提取号码和网元参数，
+按模板建立号码覆盖索引，报告缺失、重复的号码和前后不一致的参数，并可将脚本还原为任务描述。
+"""
+
+import io
+import re
+import gzip
+import operator
+from collections import deque
+from itertools import compress, repeat
+
+from src.core.generator import ScriptGenerator
+from src.core.number_range import NumberRange, NumberRuns, format_number, parse_start_number
+from src.core.template import NUMBER_FIELDS, PARAM_NAMES
+
+# 逐号码字段在命令中的格式
+NUMBER_FIELD_PATTERNS = {
+    'phone': r'\+?\d+',
+    'alias_id': r'\d+',
+    'reversed_number': r'\d(?:\.\d)*',
+}
+
+# 网元参数在命令中的格式：不跨越 MML 参数分隔符
+PARAM_FIELD_PATTERN = r'[^,;"]*?'
+
+# 每个模板最多区分的参数组合数，覆盖索引中以1字节保存组合编号，0 表示号码未出现
+MAX_VARIANTS = 255
+
+# 将组合编号转换为是否出现的 bytes.translate 转换表
+PRESENCE = bytes([0] + [1] * 255)
+
+# 覆盖索引按号码数值分页，每页最多 2**PAGE_BITS 个号码；页内只分配实际出现的号码跨度，
+# 相距很远的号码（如不同区号）分属不同页，内存与号码数量而非号码跨度相关
+PAGE_BITS = 20
+
+def segments(selected, sources):
+    """将选中的号码切分为参数组合不变的区间
+    
+    Args:
+        selected: 选中标记，非0 表示选中
+        sources: 参数组合编号序列的元组，每个长度与 selected 相同
+        
+    Yields:
+        tuple: (起始偏移, 结束偏移, 各序列在该区间的编号)
+    """
+    for run in re.finditer(b'[^\x00]+', selected):
+        # 区间内各序列编号变化的位置即为切分点
+        cuts = {run.start(), run.end()}
+        for source in sources:
+            cuts.update(run.start() + match.end() for match in re.finditer(b'(.)\\1*', source[run.start():run.end()], re.S))
+        cuts = sorted(cuts)
+        for first, last in zip(cuts, cuts[1:]):
+            yield first, last, tuple(source[first] for source in sources)
+
+class _CommandPattern:
+    """单个模板的解析规则
+    
+    未知参数时用通用正则逐行解析，号码字段和网元参数都作为分组；
+    从脚本中得到参数后再生成只含号码字段分组的绑定正则，用于整块匹配。
+    """
+    
+    __slots__ = ('key', 'section', 'template', 'prefix', 'generic', 'number_names', 'param_names',
+                 'number_field', 'params', 'bound', 'bound_prefix', 'variants')
+    
+    def __init__(self, template, section):
+        """编译解析规则
+        
+        Args:
+            template: CompiledTemplate 已编译的模板
+            section: 所属网元名称
+        """
+        self.key = template.key
+        self.section = section
+        self.template = template
+        self.prefix = template.literals[0]
+        
+        # 各字段按首次出现的顺序排列
+        names = list(dict.fromkeys(template.names))
+        self.number_names = tuple(name for name in names if name in NUMBER_FIELDS)
+        self.param_names = tuple(name for name in names if name not in NUMBER_FIELDS)
+        self.number_field = next((name for name in NUMBER_FIELDS if name in self.number_names), None)
+        self.generic = self._compile()
+        
+        self.params = None
+        self.bound = None
+        self.bound_prefix = None
+        
+        # 脚本中出现过的参数组合，编号从1开始，第一个即为 params
+        self.variants = []
+    
+    def _compile(self, params=None, multiline=False):
+        """生成匹配该模板命令行的正则
+        
+        Args:
+            params: 网元参数字典，指定时参数作为固定文本，否则作为分组
+            multiline: 是否生成按行匹配整块文本的正则
+            
+        Returns:
+            re.Pattern: 正则表达式
+        """
+        parts = ['(?m)^' if multiline else '', re.escape(self.template.literals[0])]
+        seen = set()
+        for name, literal in zip(self.template.names, self.template.literals[1:]):
+            if params is not None and name in params:
+                parts.append(re.escape(format(params[name])))
+            elif name in seen:
+                # 同一字段在一行中多次出现时取值必须相同
+                parts.append(f'(?P={name})')
+            else:
+                seen.add(name)
+                parts.append(f'(?P<{name}>{NUMBER_FIELD_PATTERNS.get(name, PARAM_FIELD_PATTERN)})')
+            parts.append(re.escape(literal))
+        if multiline:
+            parts.append('$')
+        return re.compile(''.join(parts))
+    
+    def bind(self, params):
+        """设置从脚本中得到的网元参数，并生成绑定正则
+        
+        Args:
+            params: 网元参数字典
+        """
+        self.params = params
+        self.bound = self._compile(params, multiline=True)
+        self.bound_prefix = self.template.bind(params).fragments[0]
+        self.variants.append(params)
+    
+    def variant(self, params):
+        """获取参数组合的编号，新的组合追加到末尾
+        
+        Args:
+            params: 网元参数字典
+            
+        Returns:
+            int: 组合编号，超过 MAX_VARIANTS 时返回None
+        """
+        try:
+            return self.variants.index(params) + 1
+        except ValueError:
+            if len(self.variants) >= MAX_VARIANTS:
+                return None
+            self.variants.append(params)
+            return len(self.variants)
+
+class _Coverage:
+    """一页前缀、位数相同的号码在各模板中的覆盖情况
+    
+    每个模板一个字节数组，0 表示号码未出现，否则为该号码命令的参数组合编号。
+    """
+    
+    __slots__ = ('prefix', 'width', 'base', 'size', 'maps')
+    
+    def __init__(self, prefix, width, keys):
+        """初始化
+        
+        Args:
+            prefix: 号码前缀
+            width: 数字位数
+            keys: 模板键列表
+        """
+        self.prefix = prefix
+        self.width = width
+        self.base = None
+        self.size = 0
+        self.maps = {key: bytearray() for key in keys}
+    
+    def add(self, key, values, variant=1):
+        """记录一批号码
+        
+        Args:
+            key: 模板键
+            values: 号码数值列表
+            variant: 这批命令的参数组合编号
+            
+        Returns:
+            list: 此前已出现过的号码数值（重复号码）
+        """
+        low = min(values)
+        high = max(values)
+        if self.base is None:
+            self.base = low
+        
+        # 按需扩展各模板的字节数组，保持起点和长度一致
+        if low < self.base:
+            padding = bytes(self.base - low)
+            for bitmap in self.maps.values():
+                bitmap[0:0] = padding
+            self.size += len(padding)
+            self.base = low
+        if high - self.base >= self.size:
+            padding = bytes(high - self.base + 1 - self.size)
+            for bitmap in self.maps.values():
+                bitmap.extend(padding)
+            self.size += len(padding)
+        
+        bitmap = self.maps[key]
+        offsets = list(map(operator.sub, values, repeat(self.base)))
+        
+        # 生成器输出的号码按升序排列，此时一批内部不会重复，只需检查此前是否出现过
+        if all(map(operator.lt, offsets, offsets[1:])):
+            seen = list(compress(values, map(bitmap.__getitem__, offsets)))
+            deque(map(bitmap.__setitem__, offsets, repeat(variant)), 0)
+            return seen
+        
+        seen = []
+        for value, offset in zip(values, offsets):
+            if bitmap[offset]:
+                seen.append(value)
+            bitmap[offset] = variant
+        return seen
+    
+    def union(self):
+        """出现在任一模板中的号码
+        
+        Returns:
+            bytes: 覆盖标记，1 表示至少在一个模板中出现
+        """
+        union = 0
+        for bitmap in self.maps.values():
+            union |= int.from_bytes(bitmap.translate(PRESENCE), 'little')
+        return union.to_bytes(self.size, 'little')
+    
+    def missing(self, key, union):
+        """某模板缺失的号码
+        
+        Args:
+            key: 模板键
+            union: union() 的结果
+            
+        Returns:
+            bytes: 缺失标记，1 表示该号码出现在其它模板中但不在此模板中
+        """
+        present = int.from_bytes(union, 'little')
+        return (present & ~int.from_bytes(self.maps[key].translate(PRESENCE), 'little')).to_bytes(self.size, 'little')
+    
+    def runs(self, flags):
+        """将标记转换为连续号码区间
+        
+        Args:
+            flags: 长度为 size 的标记，非0 表示选中
+            
+        Returns:
+            list: (起始数值, 数量) 列表
+        """
+        return [(self.base + match.start(), match.end() - match.start()) for match in re.finditer(b'[^\x00]+', flags)]
+    
+    def window(self, key, start, end):
+        """取某模板一段号码的参数组合编号
+        
+        Args:
+            key: 模板键
+            start: 起始数值
+            end: 结束数值（不含）
+            
+        Returns:
+            bytes: 长度为 end - start，超出已记录范围的号码为0
+        """
+        bitmap = self.maps[key]
+        low = max(start, self.base)
+        high = min(end, self.base + self.size)
+        if low >= high:
+            return bytes(end - start)
+        return bytes(low - start) + bytes(bitmap[low - self.base:high - self.base]) + bytes(end - high)
+
+class ScriptParser:
+    """放号脚本解析器
+    
+    文件按块读取，每块先用各模板的绑定正则整体匹配，所有命令行都能匹配且号码字段一致时批量记录号码；
+    否则该块逐行解析，并记录无法识别的命令、参数不一致等错误的行号、内容和原因。
+    号码按前缀、位数和数值所在页分组，每个模板一个字节数组记录号码是否出现，据此找出缺失和重复的号码。
+    """
+    
+    # 每次读取的字符数，实际在行边界处切分
+    CHUNK_SIZE = 4 * 1024 * 1024
+    
+    # 最多保存的错误行数和重复号码数，超出部分只计数
+    MAX_ERRORS = 10000
+    
+    def __init__(self, generator=None, rollback=False, max_errors=None):
+        """初始化解析器
+        
+        Args:
+            generator: 脚本生成器，使用其当前模板集，默认新建
+            rollback: 是否按删号模板解析删号脚本
+            max_errors: 最多保存的错误行数，默认为 MAX_ERRORS
+        """
+        self.generator = generator or ScriptGenerator()
+        self.rollback = rollback
+        self.max_errors = self.MAX_ERRORS if max_errors is None else max_errors
+        
+        sections = self.generator.ROLLBACK_SECTIONS if rollback else self.generator.SECTIONS
+        self.patterns = {
+            key: _CommandPattern(self.generator._compile_template(key, rollback), name)
+            for name, _, keys in sections for key in keys
+        }
+        
+        self.line_count = 0
+        self.key_lines = dict.fromkeys(self.patterns, 0)
+        self.errors = []
+        self.error_count = 0
+        
+        # 其中命令参数与该模板首次出现的参数不同的错误数，如合并输出的清单脚本中各任务参数不同
+        self.param_error_count = 0
+        self.duplicates = dict.fromkeys(self.patterns, 0)
+        self.duplicate_samples = []
+        
+        # 参数名 -> (取值, 首次出现的模板键)
+        self._param_values = {}
+        
+        # (前缀, 位数, 页号) -> _Coverage
+        self._coverage = {}
+        
+        # 模板中只有别名ID或ENUM反转号码时，号码前缀取脚本中其它命令的号码前缀
+        self._prefix = None
+    
+    @classmethod
+    def load(cls, file_path, generator=None, rollback=False, max_errors=None):
+        """解析脚本文件
+        
+        Args:
+            file_path: 脚本文件路径，.gz / .zst 文件按压缩格式读取
+            generator: 脚本生成器
+            rollback: 是否为删号脚本
+            max_errors: 最多保存的错误行数
+            
+        Returns:
+            ScriptParser: 解析结果
+            
+        Raises:
+            OSError: 文件读取失败
+            ValueError: 读取 .zst 文件但未安装 zstandard
+        """
+        parser = cls(generator, rollback, max_errors)
+        parser.parse_file(file_path)
+        return parser
+    
+    @classmethod
+    def detect_rollback(cls, file_path, generator=None):
+        """根据第一个段标题或命令判断脚本是否为删号脚本
+        
+        Args:
+            file_path: 脚本文件路径
+            generator: 脚本生成器，使用其段标题和模板
+            
+        Returns:
+            bool: 是否为删号脚本
+            
+        Raises:
+            OSError: 文件读取失败
+            ValueError: 读取 .zst 文件但未安装 zstandard
+        """
+        generator = generator or ScriptGenerator()
+        headers = {
+            header.strip("\n"): rollback
+            for rollback, sections in ((False, generator.SECTIONS), (True, generator.ROLLBACK_SECTIONS))
+            for _, header, _ in sections
+        }
+        prefixes = [
+            (generator._compile_template(key, rollback).literals[0], rollback)
+            for rollback, sections in ((False, generator.SECTIONS), (True, generator.ROLLBACK_SECTIONS))
+            for _, _, keys in sections for key in keys
+        ]
+        
+        with cls._open_text(file_path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if line in headers:
+                    return headers[line]
+                # 最长的前缀最具体，如删号模板 RMV NEWPUI 与放号模板前缀不同
+                matches = [(len(prefix), rollback) for prefix, rollback in prefixes if prefix and line.startswith(prefix)]
+                if matches:
+                    return max(matches)[1]
+                if not line.startswith("//"):
+                    return False
+        return False
+    
+    @staticmethod
+    def _open_text(file_path):
+        """按后缀打开（压缩的）脚本文件
+        
+        Args:
+            file_path: 脚本文件路径
+            
+        Returns:
+            文本文件对象
+        """
+        lower = file_path.lower()
+        if lower.endswith('.gz'):
+            return gzip.open(file_path, 'rt', encoding='utf-8', newline='')
+        if lower.endswith('.zst'):
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("读取 zstd 压缩文件需要安装 zstandard 包")
+            raw = zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True)
+            return io.TextIOWrapper(raw, encoding='utf-8', newline='')
+        return open(file_path, 'r', encoding='utf-8', newline='')
+    
+    def parse_file(self, file_path):
+        """解析脚本文件
+        
+        Args:
+            file_path: 脚本文件路径
+            
+        Raises:
+            OSError: 文件读取失败
+        """
+        with self._open_text(file_path) as f:
+            line_number = 1
+            while True:
+                # 读满一块后补齐到行尾
+                text = f.read(self.CHUNK_SIZE)
+                if not text:
+                    break
+                if not text.endswith("\n"):
+                    text += f.readline()
+                
+                self.feed(text, line_number)
+                line_number += text.count("\n")
+    
+    def parse_chunks(self, chunks):
+        """解析脚本数据块，如 ScriptGenerator.iter_full_script 或 LineIndex.iter_chunks 的输出
+        
+        Args:
+            chunks: 文本块的可迭代对象，块边界可以在行中间
+        """
+        line_number = 1
+        pending = []
+        size = 0
+        for chunk in chunks:
+            pending.append(chunk)
+            size += len(chunk)
+            if size < self.CHUNK_SIZE:
+                continue
+            
+            # 在最后一个换行处切分，剩余部分留到下一块
+            text = "".join(pending)
+            end = text.rfind("\n") + 1
+            if end:
+                self.feed(text[:end], line_number)
+                line_number += text.count("\n", 0, end)
+            pending = [text[end:]]
+            size = len(pending[0])
+        
+        text = "".join(pending)
+        if text:
+            self.feed(text, line_number)
+    
+    def feed(self, text, first_line=1):
+        """解析一块文本
+        
+        Args:
+            text: 文本，应在行边界处结束
+            first_line: 第一行的行号，用于错误报告
+        """
+        if "\r" in text:
+            text = text.replace("\r\n", "\n")
+        
+        lines = text.split("\n")
+        if lines[-1] == "":
+            lines.pop()
+        self.line_count += len(lines)
+        
+        # 空行和段标题以外的行都应是命令
+        commands = len(lines) - lines.count("") - text.count("\n//") - text.startswith("//")
+        if not commands:
+            return
+        
+        # 块中首次出现的模板先解析一行得到参数
+        self._learn(text, first_line)
+        
+        # 各模板的命令行在一块中通常是连续的，整块匹配后检查行数是否对得上
+        found = {}
+        matched = 0
+        for key, pattern in self.patterns.items():
+            if pattern.bound is None or pattern.bound_prefix not in text:
+                continue
+            values = pattern.bound.findall(text)
+            if values:
+                found[key] = values
+                matched += len(values)
+        
+        if matched == commands:
+            # 先转换含号码字段的模板，只有别名ID或反转号码的模板需要用到其号码前缀
+            phones = {}
+            for key in sorted(found, key=lambda key: self.patterns[key].number_field != 'phone'):
+                phones[key] = self._block_phones(self.patterns[key], found[key])
+                if phones[key] is None:
+                    break
+            else:
+                for key, values in phones.items():
+                    self.key_lines[key] += len(values)
+                    self._add(key, values)
+                return
+        
+        for offset, line in enumerate(lines):
+            self._feed_line(line, first_line + offset)
+    
+    def _learn(self, text, first_line):
+        """从块中找出尚未得到参数的模板的第一行命令，解析其参数
+        
+        Args:
+            text: 文本块
+            first_line: 第一行的行号
+        """
+        for key, pattern in self.patterns.items():
+            if pattern.params is not None or not pattern.prefix:
+                continue
+            
+            # 只检查开头的几处，找不到时由逐行解析处理
+            position = text.find(pattern.prefix)
+            for _ in range(16):
+                if position < 0:
+                    break
+                start = text.rfind("\n", 0, position) + 1
+                end = text.find("\n", position)
+                if end < 0:
+                    end = len(text)
+                match = pattern.generic.fullmatch(text, start, end)
+                if match:
+                    line_number = first_line + text.count("\n", 0, start)
+                    self._set_params(pattern, match, line_number, text[start:end])
+                    break
+                position = text.find(pattern.prefix, end)
+    
+    def _set_params(self, pattern, match, line_number, line):
+        """记录模板的网元参数，并检查与其它模板中同名参数是否一致
+        
+        Args:
+            pattern: 解析规则
+            match: 通用正则的匹配结果
+            line_number: 行号
+            line: 行文本
+        """
+        params = {name: match.group(name) for name in pattern.param_names}
+        pattern.bind(params)
+        for name, value in params.items():
+            expected, key = self._param_values.setdefault(name, (value, pattern.key))
+            if value != expected:
+                self._error(line_number, line, f"参数 {name} 为 {value}，与 {key} 命令中的 {expected} 不一致")
+    
+    def _block_phones(self, pattern, values):
+        """整块匹配结果转换为号码列表，并检查派生的号码字段
+        
+        Args:
+            pattern: 解析规则
+            values: 绑定正则 findall 的结果
+            
+        Returns:
+            list: 号码列表；别名ID或反转号码与号码不符时返回None，由调用方逐行解析
+        """
+        if len(pattern.number_names) <= 1:
+            return self._to_phones(pattern.number_field, values)
+        
+        columns = dict(zip(pattern.number_names, map(list, zip(*values))))
+        phones = self._to_phones(pattern.number_field, columns[pattern.number_field])
+        expected = self.generator._number_columns(phones, set(columns))
+        if any(columns[name] != expected[name] for name in columns if name != pattern.number_field):
+            return None
+        return phones
+    
+    def _to_phones(self, field, values):
+        """将号码字段的取值转换为号码
+        
+        Args:
+            field: 字段名，phone、alias_id 或 reversed_number
+            values: 取值列表
+            
+        Returns:
+            list: 号码列表
+        """
+        if field == 'phone' or not values:
+            if values and self._prefix is None:
+                self._prefix = '+' if values[0].startswith('+') else ''
+            return values
+        prefix = self._prefix or ""
+        if field == 'reversed_number':
+            values = [value.replace('.', '')[::-1] for value in values]
+        return [prefix + value for value in values] if prefix else values
+    
+    def _feed_line(self, line, line_number):
+        """逐行解析
+        
+        Args:
+            line: 行文本
+            line_number: 行号
+        """
+        content = line.strip()
+        if not content or content.startswith("//"):
+            return
+        
+        for pattern in self.patterns.values():
+            if content.startswith(pattern.prefix):
+                match = pattern.generic.fullmatch(content)
+                if match:
+                    break
+        else:
+            self._error(line_number, line, "无法识别的命令")
+            return
+        
+        variant = 1
+        if pattern.params is None:
+            self._set_params(pattern, match, line_number, content)
+        else:
+            params = {name: match.group(name) for name in pattern.param_names}
+            if params != pattern.params:
+                for name, value in params.items():
+                    if value != pattern.params[name]:
+                        self._error(line_number, line, f"参数 {name} 为 {value}，与前文的 {pattern.params[name]} 不一致")
+                        self.param_error_count += 1
+                variant = pattern.variant(params)
+                if variant is None:
+                    self._error(line_number, line, f"{pattern.key} 的参数组合超过 {MAX_VARIANTS} 种，该行按最后一种记录")
+                    variant = MAX_VARIANTS
+        
+        if pattern.number_field is None:
+            self.key_lines[pattern.key] += 1
+            return
+        phone = self._to_phones(pattern.number_field, [match.group(pattern.number_field)])[0]
+        if len(pattern.number_names) > 1:
+            expected = self.generator._number_columns([phone], set(pattern.number_names))
+            for name in pattern.number_names:
+                if name != pattern.number_field and match.group(name) != expected[name][0]:
+                    self._error(line_number, line, f"{name} 与号码 {phone} 不符")
+        
+        self.key_lines[pattern.key] += 1
+        self._add(pattern.key, [phone], variant)
+    
+    def _add(self, key, phones, variant=1):
+        """记录一批号码的覆盖情况和重复号码
+        
+        Args:
+            key: 模板键
+            phones: 号码列表
+            variant: 这批命令的参数组合编号
+        """
+        if not phones:
+            return
+        
+        # 前缀和位数一致时整批转换，否则逐个分组
+        first = phones[0]
+        width = len(first)
+        plus = "".join(phones).count('+')
+        if plus in (0, len(phones)) and all(map(width.__eq__, map(len, phones))):
+            prefix = '+' if plus else ''
+            groups = {(prefix, width - len(prefix)): list(map(int, phones))}
+        else:
+            groups = {}
+            for phone in phones:
+                prefix, digits, value = parse_start_number(phone)
+                groups.setdefault((prefix, digits), []).append(value)
+        
+        for (prefix, width), values in groups.items():
+            if self._prefix is None:
+                self._prefix = prefix
+            
+            # 一批号码通常在同一页内，否则按页拆分
+            page = values[0] >> PAGE_BITS
+            if min(values) >> PAGE_BITS == page == max(values) >> PAGE_BITS:
+                pages = {page: values}
+            else:
+                pages = {}
+                for value in values:
+                    pages.setdefault(value >> PAGE_BITS, []).append(value)
+            
+            for page, page_values in pages.items():
+                coverage = self._coverage.get((prefix, width, page))
+                if coverage is None:
+                    coverage = self._coverage[(prefix, width, page)] = _Coverage(prefix, width, self.patterns)
+                seen = coverage.add(key, page_values, variant)
+                if seen:
+                    self.duplicates[key] += len(seen)
+                    room = self.max_errors - len(self.duplicate_samples)
+                    self.duplicate_samples.extend((key, format_number(prefix, width, value)) for value in seen[:room])
+    
+    def _error(self, line_number, line, message):
+        """记录错误行
+        
+        Args:
+            line_number: 行号
+            line: 行文本
+            message: 错误原因
+        """
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line_number, line.strip(), message))
+    
+    def section_lines(self):
+        """各网元的命令行数
+        
+        Returns:
+            dict: 网元名称 -> 命令行数
+        """
+        counts = {}
+        for key, pattern in self.patterns.items():
+            counts[pattern.section] = counts.get(pattern.section, 0) + self.key_lines[key]
+        return counts
+    
+    def script_params(self):
+        """脚本中各网元参数的取值，取首次出现的值
+        
+        Returns:
+            dict: 参数名 -> 取值，按 PARAM_NAMES 的顺序排列，未出现的参数不包含在内
+        """
+        return {name: self._param_values[name][0] for name in PARAM_NAMES if name in self._param_values}
+    
+    def missing(self):
+        """各模板缺失的号码，即出现在其它模板中、但该模板中没有命令的号码
+        
+        Returns:
+            dict: 模板键 -> [(首号码, 尾号码, 数量), ...]，只包含有缺失的模板
+        """
+        runs = {}
+        for group in sorted(self._coverage):
+            coverage = self._coverage[group]
+            union = coverage.union()
+            for key, pattern in self.patterns.items():
+                if pattern.number_field is not None:
+                    runs.setdefault(key, []).extend(
+                        (coverage.prefix, coverage.width, start, count)
+                        for start, count in coverage.runs(coverage.missing(key, union))
+                    )
+        
+        result = {}
+        for key, key_runs in runs.items():
+            for prefix, width, start, count in self._merge_runs(key_runs):
+                result.setdefault(key, []).append((
+                    format_number(prefix, width, start),
+                    format_number(prefix, width, start + count - 1),
+                    count,
+                ))
+        return result
+    
+    @staticmethod
+    def _merge_runs(runs):
+        """合并在页边界处相接的号码区间
+        
+        Args:
+            runs: 按前缀、位数和起始数值排列的 (前缀, 位数, 起始数值, 数量) 列表
+            
+        Returns:
+            list: 合并后的区间，格式同 runs
+        """
+        merged = []
+        for prefix, width, start, count in runs:
+            if merged:
+                last_prefix, last_width, last_start, last_count = merged[-1]
+                if (last_prefix, last_width) == (prefix, width) and last_start + last_count == start:
+                    merged[-1] = (prefix, width, last_start, last_count + count)
+                    continue
+            merged.append((prefix, width, start, count))
+        return merged
+    
+    def number_groups(self):
+        """脚本中各组号码的范围，每组为一页，不跨越页边界
+        
+        Returns:
+            dict: (前缀, 位数, 页号) -> (最小数值, 最大数值 + 1)
+        """
+        return {
+            key: (coverage.base, coverage.base + coverage.size)
+            for key, coverage in self._coverage.items() if coverage.base is not None
+        }
+    
+    def variants(self, key, group, start, end):
+        """某模板一段号码的参数组合编号
+        
+        Args:
+            key: 模板键
+            group: number_groups 中的 (前缀, 位数, 页号)
+            start: 起始数值，与 end 应在该页内
+            end: 结束数值（不含）
+            
+        Returns:
+            bytes: 每个号码1字节，0 表示脚本中没有该号码的这条命令，否则为 variant_params 的编号
+        """
+        coverage = self._coverage.get(group)
+        if coverage is None or coverage.base is None:
+            return bytes(end - start)
+        return coverage.window(key, start, end)
+    
+    def variant_params(self, key, variant):
+        """参数组合编号对应的网元参数
+        
+        Args:
+            key: 模板键
+            variant: 组合编号，从1开始
+            
+        Returns:
+            dict: 网元参数字典
+        """
+        return self.patterns[key].variants[variant - 1]
+    
+    def number_runs(self):
+        """脚本中出现的全部号码
+        
+        Returns:
+            NumberRuns: 号码集合，每个连续区间一个号码段
+        """
+        runs = []
+        for group in sorted(self._coverage):
+            coverage = self._coverage[group]
+            runs.extend((coverage.prefix, coverage.width, start, count) for start, count in coverage.runs(coverage.union()))
+        return NumberRuns([NumberRange(*run) for run in self._merge_runs(runs)])
+    
+    def jobs(self):
+        """将脚本还原为任务描述，每个号码连续且参数相同的区间一个任务
+        
+        各号码的参数取其各条命令的参数组合，例如合并输出的清单脚本中 lata 不同的任务会分别还原。
+        
+        Returns:
+            list: 任务字典列表，包含 start_number、count 和 params，格式与任务记录相同
+        """
+        defaults = self.script_params()
+        keys = [key for key, pattern in self.patterns.items() if pattern.number_field is not None]
+        
+        runs = []
+        for group in sorted(self._coverage):
+            coverage = self._coverage[group]
+            sources = tuple(bytes(coverage.maps[key]) for key in keys)
+            for first, last, variants in segments(coverage.union(), sources):
+                params = dict(defaults)
+                for key, variant in zip(keys, variants):
+                    if variant:
+                        params.update(self.variant_params(key, variant))
+                params = {name: params[name] for name in PARAM_NAMES if name in params}
+                
+                # 与上一区间相接且参数相同时合并，如跨越覆盖索引页边界的区间
+                start = coverage.base + first
+                if runs and runs[-1][:2] == (coverage.prefix, coverage.width) and runs[-1][4] == params \
+                        and runs[-1][2] + runs[-1][3] == start:
+                    runs[-1][3] += last - first
+                else:
+                    runs.append([coverage.prefix, coverage.width, start, last - first, params])
+        
+        return [
+            {"start_number": format_number(prefix, width, start), "count": count, "params": params}
+            for prefix, width, start, count, params in runs
+        ]
+    
+    @property
+    def ok(self):
+        """脚本是否没有错误、重复和缺失"""
+        return not self.error_count and not any(self.duplicates.values()) and not self.missing()
+    
+    @property
+    def restorable(self):
+        """脚本能否还原为任务描述：除参数与前文不同外没有错误、重复和缺失，参数不同的号码由 jobs 分别还原"""
+        return (self.error_count == self.param_error_count
+                and not any(self.duplicates.values()) and not self.missing())
+    
+    def summary(self):
+        """生成解析结果说明
+        
+        Returns:
+            str: 说明文字
+        """
+        sections = "，".join(f"{name.upper()} {count} 行" for name, count in self.section_lines().items())
+        missing = sum(count for runs in self.missing().values() for _, _, count in runs)
+        return (f"共 {self.line_count} 行（{sections}），号码 {len(self.number_runs())} 个，"
+                f"缺失 {missing} 条，重复 {sum(self.duplicates.values())} 条，错误 {self.error_count} 行")
+    
+    def report(self):
+        """生成校验报告
+        
+        Returns:
+            str: 各模板行数、缺失区间、重复号码、参数和错误行
+        """
+        lines = [self.summary(), ""]
+        lines.append("各模板命令行数:")
+        lines.extend(f"  {key}\t{count}" for key, count in self.key_lines.items())
+        
+        missing = self.missing()
+        if missing:
+            lines.append("缺失号码:")
+            for key, runs in missing.items():
+                lines.extend(f"  {key}\t{first}-{last}\t{count}" for first, last, count in runs)
+        
+        if self.duplicate_samples:
+            lines.append("重复号码:")
+            lines.extend(f"  {key}\t{phone}" for key, phone in self.duplicate_samples)
+            total = sum(self.duplicates.values())
+            if total > len(self.duplicate_samples):
+                lines.append(f"  另有 {total - len(self.duplicate_samples)} 条重复未列出")
+        
+        lines.append("参数:")
+        lines.extend(f"  {name}\t{value}" for name, value in self.script_params().items())
+        
+        if self.errors:
+            lines.append("错误:")
+            lines.extend(f"  {line_number}\t{message}\t{line}" for line_number, line, message in self.errors)
+            if self.error_count > len(self.errors):
+                lines.append(f"  另有 {self.error_count - len(self.errors)} 行错误未列出")
+        return "\n".join(lines) 
\ No newline at end of file
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+参数校验规则模块
+
+网元参数和批量任务字段的类型、取值范围、格式以及字段之间的约束以规则表描述，
+在创建 ParamSchema 时编译一次，之后单个参数字典和大批量清单行都按同一组规则校验，
+并返回全部错误及其所在的行和字段。
+"""
+
+import re
+
+from src.core.template import NUMBER_FIELDS, PARAM_NAMES
+
+# 域名：字母、数字、点、连字符，以至少两个字母的顶级域结尾
+DOMAIN_PATTERN = r'[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+
+# 电话号码：可选的+号，后跟8-15位数字
+PHONE_PATTERN = r'\+?\d{8,15}'
+
+class FieldRule:
+    """单个字段的校验规则"""
+    
+    __slots__ = ('name', 'label', 'kind', 'required', 'pattern', 'minimum', 'maximum', 'message')
+    
+    def __init__(self, name, label, kind='str', required=True, pattern=None, minimum=None, maximum=None, message=None):
+        """初始化规则
+        
+        Args:
+            name: 字段名
+            label: 字段说明，用于错误消息
+            kind: 字段类型，str 或 int
+            required: 是否必填
+            pattern: 格式正则表达式（字符串或已编译），需完整匹配，可选
+            minimum: int 字段的最小值，可选
+            maximum: int 字段的最大值，可选
+            message: 格式不符时的错误消息，默认为 "<label>格式无效"
+        """
+        self.name = name
+        self.label = label
+        self.kind = kind
+        self.required = required
+        self.minimum = minimum
+        self.maximum = maximum
+        self.message = message or f"{label}格式无效"
+        
+        # int 字段未指定格式时只允许数字，可带符号
+        if pattern is None and kind == 'int':
+            pattern = r'[+-]?\d+'
+        self.pattern = re.compile(pattern) if pattern else None
+    
+    def check(self, value):
+        """校验字段值
+        
+        Args:
+            value: 字段值
+            
+        Returns:
+            str: 错误消息，通过时返回None
+        """
+        if value is None or value == "":
+            return f"缺少必填参数: {self.name}" if self.required else None
+        
+        if self.kind == 'int':
+            if not isinstance(value, int):
+                if not isinstance(value, str) or not self.pattern.fullmatch(value.strip()):
+                    return self.message
+                value = int(value)
+            if self.minimum is not None and self.maximum is not None:
+                if not self.minimum <= value <= self.maximum:
+                    return f"{self.label}必须在{self.minimum}-{self.maximum}之间"
+            elif self.minimum is not None and value < self.minimum:
+                return f"{self.label}不能小于{self.minimum}"
+            elif self.maximum is not None and value > self.maximum:
+                return f"{self.label}不能大于{self.maximum}"
+            return None
+        
+        if self.pattern is not None and not self.pattern.fullmatch(str(value)):
+            return self.message
+        return None
+
+def _cfn_under_domain(domain, cfn):
+    """CFN 必须是域名本身或其子域名，域名不区分大小写"""
+    domain = domain.lower()
+    cfn = cfn.lower()
+    if cfn == domain or cfn.endswith("." + domain):
+        return None
+    return f"CFN 必须位于域名 {domain} 之下"
+
+# 网元参数规则，按 PARAM_NAMES 的顺序排列。
+# 与早期只检查域名和数字字段的校验相比，新增的限制为：cfn 须为域名格式且位于 domain 之下，
+# scscf 须为主机名（可带 :端口），密码不能包含 MML 分隔符，cc 为 1-999，sifc_id 和 lata 不能为负数
+PARAM_RULES = (
+    FieldRule('domain', "域名", pattern=DOMAIN_PATTERN),
+    FieldRule('cfn', "CFN", pattern=DOMAIN_PATTERN),
+    # 密码直接写入 MML 命令，不能包含分隔符
+    FieldRule('password', "密码", pattern=r'[^\s,;"]+', message="密码不能包含空白、逗号、分号或引号"),
+    FieldRule('sifc_id', "SIFC ID", kind='int', minimum=0),
+    FieldRule('scscf', "SCSCF", pattern=r'[a-zA-Z0-9._-]+(?::\d{1,5})?', message="SCSCF 应为主机名，可带 :端口"),
+    FieldRule('cc', "国家码", kind='int', minimum=1, maximum=999),
+    FieldRule('lata', "LATA", kind='int', minimum=0),
+)
+
+# 字段之间的约束：(出错时报告的字段, 涉及的字段, 检查函数)，涉及的字段都有值且格式正确时才检查
+CROSS_RULES = (
+    ('cfn', ('domain', 'cfn'), _cfn_under_domain),
+)
+
+class ParamSchema:
+    """编译后的参数校验规则
+    
+    多行校验按列进行：每个字段只对不同的取值各校验一次，格式检查先用 C 层的正则批量筛选，
+    批量清单中大部分任务共用相同的默认参数，代价只与不同取值的数量有关。
+    """
+    
+    def __init__(self, required=PARAM_NAMES, max_count=None, job_fields=False):
+        """编译校验规则
+        
+        Args:
+            required: 必填的网元参数名，未列出的参数只在有值时校验格式
+            max_count: 号码数量上限，job_fields 为True时使用
+            job_fields: 是否同时校验任务的 start_number 和 count 字段
+        """
+        required = frozenset(required)
+        self.rules = [
+            FieldRule(rule.name, rule.label, rule.kind, rule.name in required,
+                      rule.pattern, rule.minimum, rule.maximum, rule.message)
+            for rule in PARAM_RULES
+        ]
+        if job_fields:
+            self.rules += [
+                FieldRule('start_number', "起始号码", pattern=PHONE_PATTERN),
+                FieldRule('count', "号码数量", kind='int', minimum=1, maximum=None if max_count is None else int(max_count)),
+            ]
+    
+    @classmethod
+    def for_generator(cls, generator, max_count=None, job_fields=False):
+        """根据生成器当前模板引用的参数创建校验规则，相同的参数组合共用编译结果
+        
+        Args:
+            generator: 脚本生成器，已应用模板集
+            max_count: 号码数量上限
+            job_fields: 是否校验 start_number 和 count 字段
+            
+        Returns:
+            ParamSchema: 校验规则
+        """
+        required = set()
+        for rollback, templates in ((False, generator.templates), (True, generator.rollback_templates)):
+            for key in templates:
+                required |= generator._compile_template(key, rollback).fields
+        required = frozenset(required) - frozenset(NUMBER_FIELDS)
+        
+        cache_key = (required, None if max_count is None else int(max_count), job_fields)
+        schema = _compiled_schemas.get(cache_key)
+        if schema is None:
+            schema = _compiled_schemas[cache_key] = cls(required, max_count, job_fields)
+        return schema
+    
+    @staticmethod
+    def _column_errors(rule, values):
+        """校验一列字段值
+        
+        Args:
+            rule: 字段规则
+            values: 各行的字段值列表
+            
+        Returns:
+            dict: 出错的字段值 -> 错误消息；有不可哈希的字段值时返回None，由调用方逐行检查
+        """
+        try:
+            unique = set(values)
+        except TypeError:
+            # 不可哈希的值（如 JSON 中的列表）逐行检查
+            return None
+        
+        # 字符串字段先批量筛出不匹配格式的值
+        candidates = unique
+        if rule.kind == 'str' and rule.pattern is not None:
+            match = rule.pattern.fullmatch
+            candidates = [value for value in unique if value.__class__ is not str or not match(value)]
+        
+        messages = {}
+        for value in candidates:
+            message = rule.check(value)
+            if message:
+                messages[value] = message
+        return messages
+    
+    def validate_rows(self, rows):
+        """校验多行参数，一次返回全部错误
+        
+        Args:
+            rows: 参数字典列表；job_fields 为True时每行还应包含 start_number 和 count
+            
+        Returns:
+            list: 错误列表，每项为 (行序号, 字段名, 错误消息)，按行和字段顺序排列，行序号从0开始
+        """
+        rows = rows if isinstance(rows, list) else list(rows)
+        columns = {}
+        failed = {}
+        errors = []
+        
+        for order, rule in enumerate(self.rules):
+            values = columns[rule.name] = [row.get(rule.name) for row in rows]
+            messages = self._column_errors(rule, values)
+            if messages is None:
+                found = [(index, rule.check(value)) for index, value in enumerate(values)]
+                found = [(index, message) for index, message in found if message]
+            elif messages:
+                found = [(index, messages[value]) for index, value in enumerate(values) if value in messages]
+            else:
+                continue
+            
+            bad_rows = failed.setdefault(rule.name, set())
+            for index, message in found:
+                bad_rows.add(index)
+                errors.append((index, order, rule.name, message))
+        
+        # 字段之间的约束，同样对不同的取值组合各检查一次
+        for order, (name, fields, check) in enumerate(CROSS_RULES, len(self.rules)):
+            if any(field not in columns for field in fields):
+                continue
+            skip = set().union(*(failed.get(field, ()) for field in fields))
+            combos = list(zip(*(columns[field] for field in fields)))
+            messages = {}
+            for combo in set(combo for index, combo in enumerate(combos) if index not in skip and all(combo)):
+                message = check(*combo)
+                if message:
+                    messages[combo] = message
+            if messages:
+                errors.extend(
+                    (index, order, name, messages[combo])
+                    for index, combo in enumerate(combos) if index not in skip and combo in messages
+                )
+        
+        errors.sort()
+        return [(index, name, message) for index, _, name, message in errors]
+    
+    def validate(self, params):
+        """校验单个参数字典
+        
+        Args:
+            params: 参数字典；job_fields 为True时还应包含 start_number 和 count
+            
+        Returns:
+            list: 错误列表，每项为 (字段名, 错误消息)，全部通过时为空列表
+        """
+        errors = []
+        for rule in self.rules:
+            message = rule.check(params.get(rule.name))
+            if message:
+                errors.append((rule.name, message))
+        
+        failed = {name for name, _ in errors}
+        for name, fields, check in CROSS_RULES:
+            combo = [params.get(field) for field in fields]
+            if failed.isdisjoint(fields) and all(combo):
+                message = check(*combo)
+                if message:
+                    errors.append((name, message))
+        return errors
+
+# 已编译的校验规则：(必填参数, 数量上限, 是否校验任务字段) -> ParamSchema
+_compiled_schemas = {} 
\ No newline at end of file
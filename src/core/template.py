@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+命令模板编译模块
+"""
+
+import os
+import json
+import string
+
+# 逐号码变化的字段，其余字段均为单次任务内不变的常量参数
+NUMBER_FIELDS = ('phone', 'alias_id', 'reversed_number')
+
+# 网元参数字段
+PARAM_NAMES = ('domain', 'cfn', 'password', 'sifc_id', 'scscf', 'cc', 'lata')
+
+# 已加载的模板集：文件绝对路径 -> (修改时间, 文件大小, TemplateSet)
+_loaded_template_sets = {}
+
+class CompiledTemplate:
+    """已编译的命令模板，将模板拆分为固定片段和字段占位"""
+    
+    __slots__ = ('key', 'source', 'literals', 'names', 'fields')
+    
+    def __init__(self, key, source):
+        """编译模板
+        
+        Args:
+            key: 模板键，如 uspp_pvi
+            source: str.format 风格的模板字符串
+            
+        Raises:
+            ValueError: 模板包含不支持的占位写法
+        """
+        self.key = key
+        self.source = source
+        
+        literals = []
+        names = []
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(source):
+            literals.append(literal)
+            if field_name is None:
+                continue
+            if not field_name.isidentifier() or format_spec or conversion:
+                raise ValueError(f"模板 {key} 包含不支持的占位: {{{field_name}}}")
+            names.append(field_name)
+        
+        # 保证片段数量比占位数量多一个
+        if len(literals) == len(names):
+            literals.append("")
+        
+        self.literals = tuple(literals)
+        self.names = tuple(names)
+        self.fields = frozenset(names)
+    
+    def bind(self, params):
+        """绑定任务常量参数
+        
+        Args:
+            params: 参数字典
+            
+        Returns:
+            BoundTemplate: 仅剩逐号码字段的模板
+            
+        Raises:
+            KeyError: 缺少模板引用的参数
+        """
+        fragments = [self.literals[0]]
+        slots = []
+        for name, literal in zip(self.names, self.literals[1:]):
+            if name in NUMBER_FIELDS:
+                slots.append(name)
+                fragments.append(literal)
+            else:
+                fragments[-1] += format(params[name]) + literal
+        return BoundTemplate(self.key, fragments, slots)
+
+class BoundTemplate:
+    """已绑定常量参数的模板，渲染时只需填入逐号码字段"""
+    
+    __slots__ = ('key', 'fragments', 'slots', 'pattern')
+    
+    def __init__(self, key, fragments, slots):
+        """初始化绑定模板
+        
+        Args:
+            key: 模板键
+            fragments: 固定片段列表，比占位多一个
+            slots: 逐号码字段名列表
+        """
+        self.key = key
+        self.fragments = tuple(fragments)
+        self.slots = tuple(slots)
+        # 预先拼好 % 格式串，渲染时无需再解析模板
+        self.pattern = "%s".join(fragment.replace("%", "%%") for fragment in fragments)
+    
+    def render(self, values):
+        """渲染单行命令
+        
+        Args:
+            values: 逐号码字段字典，如 {'phone': '+861088889001'}
+            
+        Returns:
+            str: 命令行
+        """
+        return self.pattern % tuple(values[slot] for slot in self.slots)
+    
+    def render_lines(self, columns, count):
+        """批量渲染多行命令
+        
+        Args:
+            columns: 逐号码字段名到值列表的映射
+            count: 行数
+            
+        Returns:
+            list: 命令行列表
+        """
+        if not self.slots:
+            return [self.pattern % ()] * count
+        return list(map(self.pattern.__mod__, zip(*[columns[slot] for slot in self.slots]))) 
+
+class TemplateSet:
+    """从文件加载的模板集，如某厂商 MML 方言或某网元软件版本的命令模板
+    
+    模板集只需包含要覆盖的模板，加载时即完成编译和占位检查。文件格式为 JSON：
+    {"name": "...", "version": "...", "templates": {...}, "rollback_templates": {...}}
+    """
+    
+    __slots__ = ('name', 'version', 'path', 'templates', 'rollback_templates')
+    
+    def __init__(self, name, templates, rollback_templates=None, version="", path=None):
+        """编译并检查模板集
+        
+        Args:
+            name: 模板集名称
+            templates: 放号模板字典，模板键 -> 模板字符串
+            rollback_templates: 删号模板字典，可选
+            version: 模板集版本
+            path: 来源文件路径，可选
+            
+        Raises:
+            ValueError: 模板写法无效或引用了未知参数
+        """
+        self.name = name
+        self.version = version
+        self.path = path
+        self.templates = self._compile_all(templates or {})
+        self.rollback_templates = self._compile_all(rollback_templates or {})
+    
+    def _compile_all(self, sources):
+        """编译模板字典
+        
+        Args:
+            sources: 模板键 -> 模板字符串
+            
+        Returns:
+            dict: 模板键 -> CompiledTemplate
+        """
+        available = frozenset(NUMBER_FIELDS) | frozenset(PARAM_NAMES)
+        compiled_templates = {}
+        for key, source in sources.items():
+            if not isinstance(source, str):
+                raise ValueError(f"模板集 {self.name} 的模板 {key} 必须为字符串")
+            compiled = CompiledTemplate(key, source)
+            unknown = compiled.fields - available
+            if unknown:
+                raise ValueError(f"模板集 {self.name} 的模板 {key} 引用了未知参数: {', '.join(sorted(unknown))}")
+            compiled_templates[key] = compiled
+        return compiled_templates
+    
+    @classmethod
+    def from_file(cls, file_path):
+        """从 JSON 文件读取并编译模板集
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            TemplateSet: 模板集
+            
+        Raises:
+            OSError: 文件读取失败
+            ValueError: 文件格式或模板无效
+        """
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        if not isinstance(data, dict) or not isinstance(data.get('templates', {}), dict):
+            raise ValueError(f"模板集文件格式无效: {file_path}")
+        
+        name = data.get('name') or os.path.splitext(os.path.basename(file_path))[0]
+        return cls(
+            name, data.get('templates'), data.get('rollback_templates'),
+            str(data.get('version', "")), file_path
+        )
+    
+    @classmethod
+    def load(cls, file_path):
+        """加载模板集，文件未变化时复用已编译的结果
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            TemplateSet: 模板集
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        cached = _loaded_template_sets.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        
+        template_set = cls.from_file(path)
+        _loaded_template_sets[path] = (stat.st_mtime_ns, stat.st_size, template_set)
+        return template_set 
\ No newline at end of file
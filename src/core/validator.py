@@ -7,9 +7,20 @@
 
 import re
 
+from src.core.generator import ScriptGenerator
+from src.core.schema import DOMAIN_PATTERN, PHONE_PATTERN, ParamSchema
+
+# 预编译的格式
+_PHONE = re.compile(PHONE_PATTERN)
+_DOMAIN = re.compile(DOMAIN_PATTERN)
+
 class InputValidator:
     """输入验证器类，用于验证用户输入的参数"""
     
+    # 号码数量的默认范围，上限可通过配置项 max_count 调整
+    MIN_COUNT = 1
+    MAX_COUNT = 10000000
+    
     @staticmethod
     def validate_phone_number(phone):
         """验证电话号码格式
@@ -21,8 +32,7 @@ class InputValidator:
             bool: 是否有效
         """
         # 验证格式：可选的+号，后跟8-15位数字
-        pattern = r'^\+?\d{8,15}$'
-        return bool(re.match(pattern, phone))
+        return bool(_PHONE.fullmatch(phone))
     
     @staticmethod
     def validate_domain(domain):
@@ -35,52 +45,50 @@ class InputValidator:
             bool: 是否有效
         """
         # 简单域名验证：字母、数字、点、连字符
-        pattern = r'^[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, domain))
+        return bool(_DOMAIN.fullmatch(domain))
     
     @staticmethod
-    def validate_count(count_str):
+    def validate_count(count_str, max_count=None):
         """验证号码数量
         
         Args:
             count_str: 号码数量字符串
+            max_count: 数量上限，默认为 MAX_COUNT
             
         Returns:
             bool: 是否有效
         """
+        if max_count is None:
+            max_count = InputValidator.MAX_COUNT
+        
         try:
             count = int(count_str)
-            return 1 <= count <= 10000  # 限制合理范围
-        except ValueError:
+            return InputValidator.MIN_COUNT <= count <= int(max_count)  # 限制合理范围
+        except (TypeError, ValueError):
             return False
     
+    # 未指定生成器时使用默认模板的生成器
+    _default_generator = None
+    
     @staticmethod
-    def validate_params(params):
+    def validate_params(params, generator=None):
         """验证参数字典
         
+        与批量清单相同，必填参数为生成器当前模板集实际引用的参数。
+        
         Args:
             params: 参数字典
+            generator: 脚本生成器，已应用模板集；默认使用默认模板
             
         Returns:
-            tuple: (是否有效, 错误消息)
+            tuple: (是否有效, 错误消息)，有多个错误时以分号连接
         """
-        required_fields = ['domain', 'cfn', 'password', 'sifc_id', 'scscf', 'cc', 'lata']
-        
-        # 检查必填字段
-        for field in required_fields:
-            if field not in params or not params[field]:
-                return False, f"缺少必填参数: {field}"
-        
-        # 验证域名
-        if not InputValidator.validate_domain(params['domain']):
-            return False, "域名格式无效"
-        
-        # 验证数字字段
-        try:
-            int(params['sifc_id'])
-            int(params['cc'])
-            int(params['lata'])
-        except ValueError:
-            return False, "数字参数格式无效"
+        if generator is None:
+            if InputValidator._default_generator is None:
+                InputValidator._default_generator = ScriptGenerator()
+            generator = InputValidator._default_generator
         
+        errors = ParamSchema.for_generator(generator).validate(params)
+        if errors:
+            return False, "；".join(message for _, message in errors)
         return True, "" 
\ No newline at end of file
@@ -9,15 +9,21 @@ import os
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QPushButton, QMessageBox, QTabWidget, QFileDialog,
-    QLabel, QStatusBar, QAction, QMenu, QToolBar
+    QLabel, QStatusBar, QAction, QMenu, QToolBar, QProgressBar
 )
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import Qt, QSize, QThread
 from PyQt5.QtGui import QIcon, QFont
 
 from src.ui.widgets import LabeledInput, NumberInput, ScriptPreview, ParameterForm
+from src.ui.workers import GenerationWorker
 from src.core.generator import ScriptGenerator
+from src.core.layout import ScriptLayout
+from src.core.template import TemplateSet
+from src.core.exclusion import ExclusionIndex
 from src.core.validator import InputValidator
 from src.utils.config import ConfigManager
+from src.utils.cache import ScriptCache
+from src.utils.ledger import ProvisioningLedger
 from src.utils.file_handler import FileHandler
 from src.utils.logger import Logger
 
@@ -35,12 +41,40 @@ class MainWindow(QMainWindow):
         # 初始化配置
         self.config_manager = ConfigManager()
         
-        # 初始化生成器
+        # 初始化生成器，并应用配置中的模板集
         self.generator = ScriptGenerator()
+        for template_file in self.config_manager.get_config("template_files", []):
+            try:
+                self.generator.apply_template_set(TemplateSet.load(template_file))
+                self.logger.info(f"加载模板集: {template_file}")
+            except (OSError, ValueError) as e:
+                self.logger.error(f"加载模板集错误: {template_file}, {str(e)}")
+        
+        # 初始化脚本缓存，重复生成相同任务时直接读取
+        self.script_cache = ScriptCache(
+            max_size=int(self.config_manager.get_config("cache_max_mb", 512)) * 1024 * 1024
+        )
         
         # 初始化验证器
         self.validator = InputValidator()
         
+        # 放号台账，记录已生成的号码段
+        self.ledger = ProvisioningLedger()
+        
+        # 排除号码索引，使用上次加载的排除号码文件
+        self.exclusions = None
+        exclusion_file = self.config_manager.get_config("exclusion_file", "")
+        if exclusion_file:
+            try:
+                self.exclusions = ExclusionIndex.load(exclusion_file)
+            except (OSError, ValueError) as e:
+                self.logger.error(f"读取排除号码错误: {exclusion_file}, {str(e)}")
+        
+        # 后台生成线程和工作对象
+        self.generation_thread = None
+        self.generation_worker = None
+        self.generation_job = None
+        
         # 设置窗口属性
         self.setWindowTitle("IMS号码生成器 by ZHN")
         self.setMinimumSize(800, 600)
@@ -85,23 +119,34 @@ class MainWindow(QMainWindow):
         # 创建号码设置
         self.number_form = ParameterForm("号码设置")
         self.number_form.add_input("start_number", "起始号码", "+861088889001")
-        self.number_form.add_number_input("count", "号码数量", 10, 1, 1000)
+        self.number_form.add_number_input("count", "号码数量", 10, 1, self._max_count())
         
         # 创建生成按钮
         self.generate_button = QPushButton("生成脚本")
         self.generate_button.setMinimumHeight(40)
         self.generate_button.clicked.connect(self.generate_script)
         
+        # 创建取消按钮
+        self.cancel_button = QPushButton("取消生成")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_generation)
+        
         # 添加到左侧布局
         left_layout.addWidget(self.param_form)
         left_layout.addWidget(self.number_form)
         left_layout.addWidget(self.generate_button)
+        left_layout.addWidget(self.cancel_button)
         
         # 创建右侧布局
         right_layout = QVBoxLayout()
         
         # 创建脚本预览
         self.script_preview = ScriptPreview()
+        self.script_preview.save_requested.connect(self.save_script)
+        
+        # 大批量任务的脚本不在界面线程中拼接全文，每个号码对应每个模板一行
+        threshold = int(self.config_manager.get_config("large_job_threshold", 100000))
+        self.script_preview.max_text_lines = threshold * len(self.generator.templates)
         
         # 添加到右侧布局
         right_layout.addWidget(self.script_preview)
@@ -118,6 +163,13 @@ class MainWindow(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("就绪")
         
+        # 创建进度条
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.setVisible(False)
+        self.status_bar.addPermanentWidget(self.progress_bar)
+        
         # 创建菜单栏
         self._create_menu()
     
@@ -134,6 +186,11 @@ class MainWindow(QMainWindow):
         new_action.triggered.connect(self.new_script)
         file_menu.addAction(new_action)
         
+        # 创建打开操作
+        open_action = QAction("打开...", self)
+        open_action.triggered.connect(self.open_script)
+        file_menu.addAction(open_action)
+        
         # 创建保存操作
         save_action = QAction("保存", self)
         save_action.triggered.connect(self.save_script)
@@ -142,6 +199,19 @@ class MainWindow(QMainWindow):
         # 添加分隔符
         file_menu.addSeparator()
         
+        # 创建加载排除号码操作
+        load_exclusions_action = QAction("加载排除号码...", self)
+        load_exclusions_action.triggered.connect(self.load_exclusions)
+        file_menu.addAction(load_exclusions_action)
+        
+        # 创建清除排除号码操作
+        clear_exclusions_action = QAction("清除排除号码", self)
+        clear_exclusions_action.triggered.connect(self.clear_exclusions)
+        file_menu.addAction(clear_exclusions_action)
+        
+        # 添加分隔符
+        file_menu.addSeparator()
+        
         # 创建退出操作
         exit_action = QAction("退出", self)
         exit_action.triggered.connect(self.close)
@@ -203,8 +273,85 @@ class MainWindow(QMainWindow):
         # 保存配置
         self.config_manager.update_config(config)
     
+    def _max_count(self):
+        """获取号码数量上限
+        
+        Returns:
+            int: 号码数量上限
+        """
+        max_count = int(self.config_manager.get_config("max_count", self.validator.MAX_COUNT))
+        
+        # 数量输入框最大只支持32位整数
+        return min(max_count, 2**31 - 1)
+    
+    def _confirm_overlaps(self, start_number, count):
+        """检查号码段是否与台账中的历史任务重叠，重叠时询问是否继续
+        
+        Args:
+            start_number: 起始号码
+            count: 号码数量
+            
+        Returns:
+            bool: 是否继续生成
+        """
+        overlaps = self.ledger.find_overlaps(start_number, count, self.exclusions)
+        if not overlaps:
+            return True
+        
+        description = self.ledger.describe_overlaps(overlaps)
+        self.logger.warning(f"号码重叠: 起始号码={start_number}, 数量={count}, {description}")
+        
+        answer = QMessageBox.warning(
+            self, "号码重叠",
+            f"{description}\n\n是否仍然生成？",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        return answer == QMessageBox.Yes
+    
+    def _confirm_large_job(self, start_number, count, params):
+        """大批量任务确认：显示预估大小和耗时，并可直接写入文件
+        
+        Args:
+            start_number: 起始号码
+            count: 号码数量
+            params: 参数字典
+            
+        Returns:
+            bool: 是否继续显示预览
+        """
+        estimate = self.generator.estimate_job(start_number, count, params, exclusions=self.exclusions)
+        size_mb = estimate['bytes'] / 1024 / 1024
+        
+        answer = QMessageBox.question(
+            self, "大批量任务",
+            f"本次将生成 {count} 个号码，共约 {estimate['lines']} 行。\n"
+            f"预计文件大小: {size_mb:.1f} MB\n"
+            f"预计生成耗时: {estimate['seconds']:.1f} 秒\n\n"
+            "是否直接生成到文件？选择\"否\"仅预览，不生成完整脚本。",
+            QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel,
+            QMessageBox.Yes
+        )
+        
+        if answer == QMessageBox.Cancel:
+            return False
+        
+        if answer == QMessageBox.Yes:
+            file_path, _ = QFileDialog.getSaveFileName(
+                self, "保存脚本", "", "文本文件 (*.txt);;所有文件 (*)"
+            )
+            if not file_path:
+                return False
+            self._start_generation(start_number, count, params, file_path, self.exclusions)
+        
+        return True
+    
     def generate_script(self):
         """生成脚本"""
+        # 已有任务在运行时不重复启动
+        if self.generation_thread is not None:
+            return
+        
         try:
             # 获取参数
             params = self.param_form.get_values()
@@ -214,7 +361,7 @@ class MainWindow(QMainWindow):
             count = self.number_form.get_values()["count"]
             
             # 验证参数
-            valid, error_msg = self.validator.validate_params(params)
+            valid, error_msg = self.validator.validate_params(params, self.generator)
             if not valid:
                 QMessageBox.warning(self, "参数错误", error_msg)
                 return
@@ -225,18 +372,52 @@ class MainWindow(QMainWindow):
                 return
             
             # 验证数量
-            if not self.validator.validate_count(str(count)):
-                QMessageBox.warning(self, "数量错误", "号码数量必须在1-10000之间")
+            max_count = self._max_count()
+            if not self.validator.validate_count(str(count), max_count):
+                QMessageBox.warning(self, "数量错误", f"号码数量必须在1-{max_count}之间")
+                return
+            
+            # 号码段不变时只重新渲染受参数变化影响的模板块
+            current_layout = self.script_preview.get_layout()
+            same_range = (
+                current_layout is not None and current_layout.start_number == start_number
+                and current_layout.count == count and current_layout.exclusions is self.exclusions
+            )
+            
+            # 新号码段与历史任务重叠时先确认
+            if not same_range and not self._confirm_overlaps(start_number, count):
+                return
+            
+            # 大批量任务先估算并直接写入文件
+            if count > int(self.config_manager.get_config("large_job_threshold", 100000)):
+                if not self._confirm_large_job(start_number, count, params):
+                    return
+            
+            if same_range:
+                keys = self.script_preview.update_layout_params(params)
+                self.status_bar.showMessage(
+                    f"已更新 {len(keys)} 个模板块，共 {current_layout.line_count} 行"
+                )
+                self._save_config()
+                self.logger.info(
+                    f"更新脚本参数: 起始号码={start_number}, 数量={count}, "
+                    f"重新渲染={', '.join(keys) or '无'}"
+                )
                 return
             
-            # 生成脚本
-            script = self.generator.generate_full_script(start_number, count, params)
+            # 构建脚本布局，预览只按需渲染可见行
+            script_layout = ScriptLayout(
+                self.generator, start_number, count, params, self.script_cache, self.exclusions
+            )
             
             # 显示脚本
-            self.script_preview.set_text(script)
+            self.script_preview.set_layout(script_layout)
             
-            # 更新状态栏
-            self.status_bar.showMessage(f"已生成 {count} 个号码的脚本")
+            # 更新状态栏，显示被排除的号码数量
+            message = f"已生成 {script_layout.number_count} 个号码的脚本，共 {script_layout.line_count} 行"
+            if script_layout.excluded:
+                message += f"（已排除 {script_layout.excluded} 个号码）"
+            self.status_bar.showMessage(message)
             
             # 保存配置
             self._save_config()
@@ -251,6 +432,162 @@ class MainWindow(QMainWindow):
             # 记录日志
             self.logger.error(f"生成脚本错误: {str(e)}")
     
+    def _start_generation(self, start_number, count, params, file_path, exclusions=None):
+        """启动后台任务，将脚本生成并写入文件
+        
+        Args:
+            start_number: 起始号码
+            count: 号码数量
+            params: 参数字典
+            file_path: 输出文件路径
+            exclusions: 排除索引 ExclusionIndex，可选
+        """
+        self.generation_job = (start_number, count, params, exclusions)
+        
+        # 创建线程和工作对象
+        self.generation_thread = QThread(self)
+        self.generation_worker = GenerationWorker(
+            self.generator, start_number, count, params, file_path, self.script_cache, exclusions
+        )
+        self.generation_worker.moveToThread(self.generation_thread)
+        
+        # 连接信号
+        self.generation_thread.started.connect(self.generation_worker.run)
+        self.generation_worker.progress.connect(self._on_generation_progress)
+        self.generation_worker.finished.connect(self._on_generation_finished)
+        self.generation_worker.failed.connect(self._on_generation_failed)
+        self.generation_worker.cancelled.connect(self._on_generation_cancelled)
+        
+        # 更新界面状态
+        self.generate_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.status_bar.showMessage(f"正在生成 {count} 个号码的脚本...")
+        
+        self.generation_thread.start()
+    
+    def _finish_generation(self):
+        """结束后台任务并恢复界面状态"""
+        if self.generation_thread is not None:
+            self.generation_thread.quit()
+            self.generation_thread.wait()
+            self.generation_worker.deleteLater()
+            self.generation_thread.deleteLater()
+        
+        self.generation_thread = None
+        self.generation_worker = None
+        
+        self.generate_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        self.progress_bar.setVisible(False)
+    
+    def _on_generation_progress(self, key, done, total):
+        """更新生成进度
+        
+        Args:
+            key: 模板键
+            done: 当前模板已完成号码数
+            total: 号码总数
+        """
+        order = [name for _, _, keys in self.generator.SECTIONS for name in keys]
+        if not total or key not in order:
+            return
+        
+        # 按模板顺序折算整体进度
+        overall = (order.index(key) * total + done) / (len(order) * total)
+        self.progress_bar.setValue(int(overall * self.progress_bar.maximum()))
+        self.status_bar.showMessage(f"正在生成 {key}: {done}/{total}")
+    
+    def _on_generation_finished(self, result):
+        """后台任务完成
+        
+        Args:
+            result: 保存的文件路径
+        """
+        self._finish_generation()
+        
+        # 记入放号台账
+        start_number, count, params, exclusions = self.generation_job
+        try:
+            self.ledger.record_job(start_number, count, params, exclusions, output=result)
+        except Exception as e:
+            self.logger.error(f"记录放号台账错误: {str(e)}")
+        
+        # 显示提示
+        QMessageBox.information(self, "保存成功", f"脚本已保存到: {result}")
+        
+        # 更新状态栏
+        self.status_bar.showMessage(f"脚本已保存到: {result}")
+        
+        # 记录日志
+        self.logger.info(f"保存脚本: {result}")
+    
+    def _on_generation_failed(self, error_msg):
+        """生成失败
+        
+        Args:
+            error_msg: 错误消息
+        """
+        self._finish_generation()
+        
+        # 显示错误
+        QMessageBox.critical(self, "生成错误", error_msg)
+        
+        # 记录日志
+        self.logger.error(f"生成脚本错误: {error_msg}")
+    
+    def _on_generation_cancelled(self):
+        """生成已取消"""
+        self._finish_generation()
+        
+        # 更新状态栏
+        self.status_bar.showMessage("已取消生成")
+        
+        # 记录日志
+        self.logger.info("取消生成脚本")
+    
+    def cancel_generation(self):
+        """取消正在进行的生成任务"""
+        if self.generation_worker is not None:
+            self.generation_worker.cancel()
+            self.cancel_button.setEnabled(False)
+            self.status_bar.showMessage("正在取消...")
+    
+    def load_exclusions(self):
+        """加载排除号码文件"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "加载排除号码", "", "文本文件 (*.txt);;所有文件 (*)"
+        )
+        
+        if not file_path:
+            return
+        
+        try:
+            self.exclusions = ExclusionIndex.load(file_path)
+        except (OSError, ValueError) as e:
+            # 显示错误
+            QMessageBox.critical(self, "排除号码错误", str(e))
+            
+            # 记录日志
+            self.logger.error(f"读取排除号码错误: {str(e)}")
+            return
+        
+        # 记住排除号码文件，下次启动时自动加载
+        self.config_manager.set_config("exclusion_file", file_path)
+        
+        # 更新状态栏
+        self.status_bar.showMessage(f"已加载排除号码: {len(self.exclusions)} 个")
+        
+        # 记录日志
+        self.logger.info(f"加载排除号码: {file_path}, {len(self.exclusions)} 个")
+    
+    def clear_exclusions(self):
+        """清除排除号码"""
+        self.exclusions = None
+        self.config_manager.set_config("exclusion_file", "")
+        self.status_bar.showMessage("已清除排除号码")
+    
     def new_script(self):
         """新建脚本"""
         # 清空脚本预览
@@ -259,8 +596,68 @@ class MainWindow(QMainWindow):
         # 更新状态栏
         self.status_bar.showMessage("已新建脚本")
     
+    def open_script(self):
+        """打开脚本文件，按需读取可见行，适用于数 GB 的脚本"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "打开脚本", "", "文本文件 (*.txt);;所有文件 (*)"
+        )
+        
+        if not file_path:
+            return
+        
+        success, result = FileHandler.load_script(file_path, lazy=True)
+        if not success:
+            # 显示错误
+            QMessageBox.critical(self, "打开错误", result)
+            
+            # 记录日志
+            self.logger.error(f"打开脚本错误: {result}")
+            return
+        
+        self.script_preview.set_line_index(result)
+        
+        # 更新状态栏
+        self.status_bar.showMessage(f"已打开脚本: {file_path}, 共 {result.line_count} 行")
+        
+        # 记录日志
+        self.logger.info(f"打开脚本: {file_path}, {result.line_count} 行")
+    
     def save_script(self):
         """保存脚本"""
+        # 已有任务在运行时不重复启动
+        if self.generation_thread is not None:
+            return
+        
+        # 生成器输出直接在后台写入文件
+        script_layout = self.script_preview.get_layout()
+        if script_layout is not None:
+            file_path, _ = QFileDialog.getSaveFileName(
+                self, "保存脚本", "", "文本文件 (*.txt);;所有文件 (*)"
+            )
+            if file_path:
+                self._start_generation(
+                    script_layout.start_number, script_layout.count, script_layout.params, file_path,
+                    script_layout.exclusions
+                )
+            return
+        
+        # 已打开的脚本文件按原字节分块复制，不读入全文，也不改变编码和换行符
+        line_index = self.script_preview.get_line_index()
+        if line_index is not None:
+            file_path, _ = QFileDialog.getSaveFileName(
+                self, "保存脚本", "", "文本文件 (*.txt);;所有文件 (*)"
+            )
+            if not file_path:
+                return
+            success, result = FileHandler.write_script_chunks(line_index.iter_bytes(), file_path, binary=True)
+            if success:
+                self.status_bar.showMessage(f"脚本已保存到: {result}")
+                self.logger.info(f"保存脚本: {result}")
+            else:
+                QMessageBox.critical(self, "保存错误", result)
+                self.logger.error(f"保存脚本错误: {result}")
+            return
+        
         # 获取脚本内容
         script = self.script_preview.get_text()
         
@@ -320,6 +717,12 @@ class MainWindow(QMainWindow):
         Args:
             event: 关闭事件
         """
+        # 停止后台生成任务
+        if self.generation_worker is not None:
+            self.generation_worker.cancel()
+            self.generation_thread.quit()
+            self.generation_thread.wait()
+        
         # 保存配置
         self._save_config()
         
@@ -8,11 +8,16 @@
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QLineEdit, QSpinBox, QComboBox,
     QHBoxLayout, QVBoxLayout, QFormLayout, QGroupBox,
-    QPushButton, QTextEdit, QFileDialog, QMessageBox
+    QPushButton, QFileDialog, QMessageBox,
+    QListView, QAbstractItemView, QApplication
 )
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal, QAbstractListModel, QModelIndex, QVariant
 from PyQt5.QtGui import QFont, QIcon
 
+from src.core.layout import ScriptLayout
+from src.utils.file_handler import FileHandler
+from src.utils.line_index import LineIndex
+
 class LabeledInput(QWidget):
     """带标签的输入框控件"""
     
@@ -106,8 +111,88 @@ class NumberInput(QWidget):
         """
         self.input.setValue(int(value))
 
+class _TextLines:
+    """普通文本的行视图，与 ScriptLayout 提供相同的按行访问接口"""
+    
+    def __init__(self, text):
+        """初始化
+        
+        Args:
+            text: 文本内容
+        """
+        self.text = text
+        self.lines = text.split("\n") if text else []
+        self.line_count = len(self.lines)
+        self.sections = []
+    
+    def line_at(self, index):
+        """获取指定行的文本
+        
+        Args:
+            index: 行号
+            
+        Returns:
+            str: 行文本
+        """
+        return self.lines[index]
+
+class ScriptLineModel(QAbstractListModel):
+    """脚本行数据模型，视图只请求可见行，行内容按需渲染"""
+    
+    def __init__(self, parent=None):
+        """初始化模型
+        
+        Args:
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.source = _TextLines("")
+    
+    def set_source(self, source):
+        """设置数据源
+        
+        Args:
+            source: 提供 line_count 和 line_at 的对象，如 ScriptLayout、LineIndex
+        """
+        previous = self.source
+        self.beginResetModel()
+        self.source = source
+        self.endResetModel()
+        
+        # 释放之前打开的脚本文件映射
+        if isinstance(previous, LineIndex) and previous is not source:
+            previous.close()
+    
+    def refresh_rows(self, first, last):
+        """通知视图指定范围的行内容已变化
+        
+        Args:
+            first: 起始行号
+            last: 结束行号（包含）
+        """
+        self.dataChanged.emit(self.index(first, 0), self.index(last, 0))
+    
+    def rowCount(self, parent=QModelIndex()):
+        """返回行数"""
+        if parent.isValid():
+            return 0
+        return self.source.line_count
+    
+    def data(self, index, role=Qt.DisplayRole):
+        """返回指定行的显示文本"""
+        if role == Qt.DisplayRole and index.isValid():
+            return self.source.line_at(index.row())
+        return QVariant()
+
 class ScriptPreview(QWidget):
-    """脚本预览控件"""
+    """脚本预览控件
+    
+    使用虚拟化列表显示脚本，只渲染可见行，数百万行的脚本也可以立即显示。
+    复制和保存直接基于生成器输出，不依赖控件中的文本。
+    """
+    
+    # 请求保存信号，连接后由接收方负责保存
+    save_requested = pyqtSignal()
     
     def __init__(self, parent=None):
         """初始化控件
@@ -117,6 +202,9 @@ class ScriptPreview(QWidget):
         """
         super().__init__(parent)
         
+        # 复制和获取全文的行数上限，超过时应保存到文件；None 表示不限制
+        self.max_text_lines = None
+        
         # 创建布局
         layout = QVBoxLayout(self)
         
@@ -125,10 +213,17 @@ class ScriptPreview(QWidget):
         title.setAlignment(Qt.AlignCenter)
         title.setFont(QFont("Arial", 12, QFont.Bold))
         
-        # 创建文本编辑器
-        self.text_edit = QTextEdit()
-        self.text_edit.setReadOnly(True)
-        self.text_edit.setFont(QFont("Courier New", 10))
+        # 创建网元跳转下拉框
+        self.section_combo = QComboBox()
+        self.section_combo.activated.connect(self.jump_to_section)
+        
+        # 创建虚拟化列表视图
+        self.model = ScriptLineModel(self)
+        self.list_view = QListView()
+        self.list_view.setModel(self.model)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.list_view.setFont(QFont("Courier New", 10))
         
         # 创建按钮布局
         button_layout = QHBoxLayout()
@@ -139,7 +234,7 @@ class ScriptPreview(QWidget):
         
         # 创建保存按钮
         self.save_button = QPushButton("保存到文件")
-        self.save_button.clicked.connect(self.save_to_file)
+        self.save_button.clicked.connect(self._on_save_clicked)
         
         # 添加按钮到布局
         button_layout.addWidget(self.copy_button)
@@ -147,33 +242,129 @@ class ScriptPreview(QWidget):
         
         # 添加控件到布局
         layout.addWidget(title)
-        layout.addWidget(self.text_edit)
+        layout.addWidget(self.section_combo)
+        layout.addWidget(self.list_view)
         layout.addLayout(button_layout)
     
+    def set_layout(self, script_layout):
+        """显示生成器的脚本布局
+        
+        Args:
+            script_layout: ScriptLayout 对象
+        """
+        self.model.set_source(script_layout)
+        
+        # 更新网元跳转列表
+        self.section_combo.clear()
+        for name, line in script_layout.sections:
+            self.section_combo.addItem(f"{name.upper()} 网元 (第 {line + 1} 行)", line)
+    
+    def update_layout_params(self, params):
+        """更新当前脚本布局的参数，只刷新受影响的模板块
+        
+        Args:
+            params: 新参数字典
+            
+        Returns:
+            list: 重新渲染的模板键，未显示脚本布局时返回None
+        """
+        script_layout = self.get_layout()
+        if script_layout is None:
+            return None
+        
+        spans = script_layout.update_params(params)
+        for _, first, last in spans:
+            self.model.refresh_rows(first, last)
+        return [key for key, _, _ in spans]
+    
+    def set_line_index(self, line_index):
+        """显示已打开的脚本文件
+        
+        Args:
+            line_index: LineIndex 对象
+        """
+        self.model.set_source(line_index)
+        self.section_combo.clear()
+    
+    def get_layout(self):
+        """获取当前显示的脚本布局
+        
+        Returns:
+            ScriptLayout: 脚本布局，显示普通文本或脚本文件时返回None
+        """
+        if isinstance(self.model.source, ScriptLayout):
+            return self.model.source
+        return None
+    
+    def get_line_index(self):
+        """获取当前显示的脚本文件
+        
+        Returns:
+            LineIndex: 行索引，未显示脚本文件时返回None
+        """
+        if isinstance(self.model.source, LineIndex):
+            return self.model.source
+        return None
+    
+    def jump_to_section(self, combo_index):
+        """跳转到指定网元段
+        
+        Args:
+            combo_index: 下拉框序号
+        """
+        line = self.section_combo.itemData(combo_index)
+        if line is None:
+            return
+        index = self.model.index(line, 0)
+        self.list_view.scrollTo(index, QAbstractItemView.PositionAtTop)
+        self.list_view.setCurrentIndex(index)
+    
     def set_text(self, text):
         """设置文本内容
         
         Args:
             text: 文本内容
         """
-        self.text_edit.setPlainText(text)
+        self.model.set_source(_TextLines(text))
+        self.section_combo.clear()
     
     def get_text(self):
         """获取文本内容
         
+        显示脚本布局时由生成器重新生成完整脚本，显示脚本文件时读取整个文件。
+        
         Returns:
             str: 文本内容
+            
+        Raises:
+            ValueError: 脚本行数超过 max_text_lines
         """
-        return self.text_edit.toPlainText()
+        source = self.model.source
+        if isinstance(source, _TextLines):
+            return source.text
+        if self.max_text_lines is not None and source.line_count > self.max_text_lines:
+            raise ValueError(f"脚本共 {source.line_count} 行，超过 {self.max_text_lines} 行，请保存到文件")
+        return "".join(source.iter_chunks())
     
     def copy_to_clipboard(self):
-        """复制内容到剪贴板"""
-        self.text_edit.selectAll()
-        self.text_edit.copy()
+        """复制内容到剪贴板，脚本过大时提示保存到文件"""
+        try:
+            text = self.get_text()
+        except ValueError as e:
+            QMessageBox.warning(self, "提示", str(e))
+            return
+        QApplication.clipboard().setText(text)
         
         # 显示提示
         QMessageBox.information(self, "提示", "已复制到剪贴板")
     
+    def _on_save_clicked(self):
+        """保存按钮处理，有接收方时交由接收方保存"""
+        if self.receivers(self.save_requested) > 0:
+            self.save_requested.emit()
+        else:
+            self.save_to_file()
+    
     def save_to_file(self):
         """保存内容到文件"""
         # 获取保存路径
@@ -184,17 +375,28 @@ class ScriptPreview(QWidget):
         if not file_path:
             return
         
-        try:
-            # 写入文件
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(self.get_text())
-            
+        # 脚本布局直接由生成器写入文件
+        script_layout = self.get_layout()
+        if script_layout is not None:
+            success, result = FileHandler.write_script_job(
+                script_layout.start_number, script_layout.count, script_layout.params,
+                file_path, generator=script_layout.generator, cache=script_layout.cache,
+                exclusions=script_layout.exclusions
+            )
+        elif self.get_line_index() is not None:
+            # 按原字节复制打开的脚本文件，不改变编码和换行符
+            success, result = FileHandler.write_script_chunks(
+                self.get_line_index().iter_bytes(), file_path, binary=True
+            )
+        else:
+            success, result = FileHandler.save_script(self.get_text(), file_path)
+        
+        if success:
             # 显示提示
-            QMessageBox.information(self, "提示", f"已保存到文件: {file_path}")
-        
-        except Exception as e:
+            QMessageBox.information(self, "提示", f"已保存到文件: {result}")
+        else:
             # 显示错误
-            QMessageBox.critical(self, "错误", f"保存失败: {str(e)}")
+            QMessageBox.critical(self, "错误", f"保存失败: {result}")
 
 class ParameterForm(QGroupBox):
     """参数表单控件"""
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+后台任务模块，在工作线程中生成脚本，避免阻塞界面
+"""
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from src.utils.file_handler import FileHandler
+
+class GenerationCancelled(Exception):
+    """生成任务被用户取消"""
+
+class GenerationWorker(QObject):
+    """脚本生成工作对象，需移动到 QThread 中运行
+    
+    脚本直接写入文件，不在内存中拼接，完成信号携带文件路径。
+    """
+    
+    # 进度信号：模板键, 已完成号码数, 号码总数
+    progress = pyqtSignal(str, int, int)
+    
+    # 完成信号：保存的文件路径
+    finished = pyqtSignal(str)
+    
+    # 失败信号：错误消息
+    failed = pyqtSignal(str)
+    
+    # 取消信号
+    cancelled = pyqtSignal()
+    
+    def __init__(self, generator, start_number, count, params, file_path, cache=None,
+                 exclusions=None, parent=None):
+        """初始化工作对象
+        
+        Args:
+            generator: 脚本生成器
+            start_number: 起始号码
+            count: 号码数量
+            params: 参数字典
+            file_path: 输出文件路径
+            cache: 脚本缓存 ScriptCache，可选
+            exclusions: 排除索引 ExclusionIndex，可选
+            parent: 父对象
+        """
+        super().__init__(parent)
+        
+        self.generator = generator
+        self.start_number = start_number
+        self.count = count
+        self.params = params
+        self.file_path = file_path
+        self.cache = cache
+        self.exclusions = exclusions
+        self._cancel_requested = False
+    
+    def cancel(self):
+        """请求取消，生成器在下一个数据块处停止"""
+        self._cancel_requested = True
+    
+    def _on_progress(self, key, done, total):
+        """生成器进度回调
+        
+        Args:
+            key: 模板键
+            done: 已完成号码数
+            total: 号码总数
+        """
+        if self._cancel_requested:
+            raise GenerationCancelled()
+        self.progress.emit(key, done, total)
+    
+    def run(self):
+        """执行生成任务，将脚本直接写入文件"""
+        success, result = FileHandler.write_script_job(
+            self.start_number, self.count, self.params, self.file_path,
+            generator=self.generator, progress=self._on_progress, cache=self.cache,
+            exclusions=self.exclusions
+        )
+        
+        if success:
+            self.finished.emit(result)
+        elif self._cancel_requested:
+            self.cancelled.emit()
+        else:
+            self.failed.emit(result) 
\ No newline at end of file
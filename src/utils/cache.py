@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+脚本缓存模块
+
+按模板块缓存生成结果，缓存键为（缓存格式版本、起始号码、号码数量、模板内容、模板引用的参数）的哈希，
+参数只影响引用它的模板块，例如只修改 lata 时只有 SSS 的 OSU SBR 块需要重新生成。
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+
+from src.utils.logger import Logger
+
+# 缓存格式版本，计入缓存键。模板渲染、号码格式或块内换行方式等输出变化时必须加1，
+# 否则模板和参数不变的旧缓存块会被当作新结果使用
+CACHE_FORMAT_VERSION = 1
+
+class ScriptCache:
+    """基于文件的脚本块缓存，按最近使用时间淘汰"""
+    
+    # 读取缓存文件的块大小
+    READ_SIZE = 1024 * 1024
+    
+    def __init__(self, cache_dir=None, max_size=512*1024*1024):
+        """初始化缓存
+        
+        Args:
+            cache_dir: 缓存目录，默认为 ~/Documents/IMS-number-maker/cache
+            max_size: 缓存总大小上限（字节）
+        """
+        self.cache_dir = cache_dir or os.path.expanduser("~/Documents/IMS-number-maker/cache")
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+        
+        self.max_size = max_size
+        self.logger = Logger()
+        
+        # 命中统计
+        self.hits = 0
+        self.misses = 0
+    
+    def block_key(self, generator, key, start_number, count, params, excluded=()):
+        """计算模板块的缓存键
+        
+        Args:
+            generator: 脚本生成器
+            key: 模板键
+            start_number: 起始号码
+            count: 号码数量
+            params: 参数字典
+            excluded: 号码段内被排除的区间列表
+            
+        Returns:
+            str: 十六进制哈希
+        """
+        referenced = {name: params.get(name) for name in sorted(generator.template_params(key))}
+        content = json.dumps(
+            [CACHE_FORMAT_VERSION, start_number, int(count), key, generator.templates[key], referenced, list(excluded)],
+            ensure_ascii=False, sort_keys=True
+        )
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+    
+    def _path(self, digest):
+        """获取缓存文件路径"""
+        return os.path.join(self.cache_dir, f"{digest}.txt")
+    
+    def _open_cached(self, path):
+        """打开缓存文件并更新访问时间
+        
+        不先检查文件是否存在再打开，文件可能在两步之间被其它进程淘汰。
+        
+        Args:
+            path: 缓存文件路径
+            
+        Returns:
+            文件对象，缓存未命中时返回None
+        """
+        try:
+            f = open(path, 'r', encoding='utf-8', newline='')
+        except FileNotFoundError:
+            return None
+        
+        # 更新访问时间，用于按最近使用淘汰；文件已打开，此时被删除也不影响读取
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return f
+    
+    def _iter_cached(self, f):
+        """读取已打开的缓存文件
+        
+        Args:
+            f: _open_cached 返回的文件对象，读完后关闭
+            
+        Yields:
+            str: 脚本数据块
+        """
+        with f:
+            while True:
+                chunk = f.read(self.READ_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+    
+    def _iter_and_store(self, chunks, path):
+        """边输出边写入缓存，完整生成后才放入缓存目录，随后淘汰超出上限的旧缓存
+        
+        块大小超过缓存上限时停止写入并删除临时文件，数据块照常输出，
+        大号码段不会先在缓存目录写满整块再被淘汰。
+        
+        Args:
+            chunks: 脚本数据块的可迭代对象
+            path: 缓存文件路径
+            
+        Yields:
+            str: 脚本数据块
+        """
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+        f = open(fd, 'wb')
+        try:
+            size = 0
+            for chunk in chunks:
+                if f is not None:
+                    data = chunk.encode('utf-8')
+                    size += len(data)
+                    if size > self.max_size:
+                        f.close()
+                        f = None
+                        os.remove(temp_path)
+                        temp_path = None
+                    else:
+                        f.write(data)
+                yield chunk
+            
+            if f is None:
+                self.logger.debug(f"脚本缓存: 模板块超过缓存上限 {self.max_size} 字节，不缓存")
+                return
+            f.close()
+            f = None
+            os.replace(temp_path, path)
+            temp_path = None
+            self.evict()
+        finally:
+            if f is not None:
+                f.close()
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def iter_block(self, generator, key, start_number, count, params, progress=None, exclusions=None,
+                   rollback_sink=None):
+        """获取单个模板块，缓存未命中时生成并写入缓存
+        
+        Args:
+            generator: 脚本生成器
+            key: 模板键
+            start_number: 起始号码
+            count: 号码数量
+            params: 参数字典
+            progress: 进度回调，见 ScriptGenerator.iter_block
+            exclusions: 排除索引 ExclusionIndex，可选
+            rollback_sink: 删号命令接收函数，见 ScriptGenerator.iter_block；缓存只保存放号命令，
+                命中时单独生成该模板的删号命令
+                
+        Yields:
+            str: 脚本数据块
+        """
+        phone_numbers = generator._parse_number_range(start_number, count, exclusions)
+        excluded = []
+        if exclusions is not None:
+            excluded = exclusions.intervals_in(phone_numbers.start, phone_numbers.end)
+        path = self._path(self.block_key(generator, key, start_number, count, params, excluded))
+        
+        cached = self._open_cached(path)
+        if cached is not None:
+            self.hits += 1
+            yield from self._iter_cached(cached)
+            if rollback_sink is not None and key in generator.rollback_templates:
+                for chunk in generator.iter_block(key, phone_numbers, params, rollback=True):
+                    rollback_sink(key, chunk)
+            if progress:
+                progress(key, len(phone_numbers), len(phone_numbers))
+            return
+        
+        self.misses += 1
+        chunks = generator.iter_block(key, phone_numbers, params, progress, rollback_sink=rollback_sink)
+        yield from self._iter_and_store(chunks, path)
+    
+    def iter_full_script(self, generator, start_number, count, params, progress=None, exclusions=None,
+                         rollback_sink=None):
+        """流式生成完整脚本，各模板块优先从缓存读取
+        
+        Args:
+            generator: 脚本生成器
+            start_number: 起始号码
+            count: 号码数量
+            params: 参数字典
+            progress: 进度回调，见 ScriptGenerator.iter_full_script
+            exclusions: 排除索引 ExclusionIndex，可选
+            rollback_sink: 删号命令接收函数，见 iter_block
+            
+        Yields:
+            str: 脚本数据块，与 ScriptGenerator.iter_full_script 的输出一致
+        """
+        hits, misses = self.hits, self.misses
+        
+        for _, header, keys in generator.SECTIONS:
+            yield header
+            for index, key in enumerate(keys):
+                if index:
+                    yield "\n\n"
+                yield from self.iter_block(
+                    generator, key, start_number, count, params, progress, exclusions, rollback_sink
+                )
+        
+        self.logger.info(
+            f"脚本缓存: 命中 {self.hits - hits} 个模板块, 未命中 {self.misses - misses} 个 "
+            f"(累计命中 {self.hits}, 未命中 {self.misses})"
+        )
+    
+    def evict(self):
+        """淘汰最久未使用的缓存文件，直到总大小不超过上限
+        
+        Returns:
+            int: 删除的文件数
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".txt"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        
+        if removed:
+            self.logger.debug(f"脚本缓存: 淘汰 {removed} 个文件，当前大小 {total} 字节")
+        return removed
+    
+    def clear(self):
+        """清空缓存"""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".txt"):
+                os.remove(os.path.join(self.cache_dir, name)) 
\ No newline at end of file
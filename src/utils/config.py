@@ -28,6 +28,11 @@ class ConfigManager:
             "lata": "10",
             "last_start_number": "+861088889001",
             "last_count": "10",
+            "max_count": "10000000",
+            "large_job_threshold": "100000",
+            "cache_max_mb": "512",
+            "template_files": [],
+            "exclusion_file": "",
             "last_save_dir": self._get_default_save_dir()
         }
         
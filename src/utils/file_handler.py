@@ -6,7 +6,251 @@
 """
 
 import os
+import gzip
+import json
+import hashlib
 import datetime
+import tempfile
+from itertools import accumulate, chain
+
+from src.core.generator import ScriptGenerator
+from src.utils.line_index import LineIndex
+
+# 压缩格式对应的文件后缀
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+# 进程的 umask 只能通过设置来读取，在导入时（其它线程启动之前）读取一次，避免运行中临时修改
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def _publish_file(temp_path, file_path):
+    """将写完的临时文件替换为目标文件
+    
+    mkstemp 创建的临时文件仅属主可读写，替换前恢复为普通新建文件的权限。
+    
+    Args:
+        temp_path: 临时文件路径
+        file_path: 目标文件路径
+    """
+    os.chmod(temp_path, 0o666 & ~_UMASK)
+    os.replace(temp_path, file_path)
+
+class _HashingWriter:
+    """写入文件的同时计算 sha256 和字节数"""
+    
+    def __init__(self, raw):
+        """初始化
+        
+        Args:
+            raw: 二进制文件对象
+        """
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+    
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.raw.write(data)
+    
+    def flush(self):
+        self.raw.flush()
+
+class _PartWriter:
+    """按行数或字节数切分输出文件，每个分片写完后才以正式文件名出现"""
+    
+    def __init__(self, directory, base_name, compression=None, max_lines=None, max_bytes=None):
+        """初始化
+        
+        Args:
+            directory: 输出目录
+            base_name: 文件名前缀，分片文件名为 <前缀>_<序号>.txt
+            compression: 压缩格式，gzip、zstd 或 None
+            max_lines: 每个分片的最大行数，None 表示不限
+            max_bytes: 每个分片的最大字节数（压缩前），None 表示不限
+        """
+        self.directory = directory
+        self.base_name = base_name
+        self.compression = compression
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        
+        # 已完成的分片信息
+        self.parts = []
+        
+        self._raw = None
+        self._hasher = None
+        self._stream = None
+        self._temp_path = None
+        self._path = None
+        self._lines = 0
+        self._bytes = 0
+    
+    def _open_part(self):
+        """打开新的分片"""
+        suffix = ".txt" + COMPRESSION_SUFFIXES.get(self.compression, "")
+        self._path = os.path.join(self.directory, f"{self.base_name}_{len(self.parts) + 1:03d}{suffix}")
+        fd, self._temp_path = tempfile.mkstemp(
+            prefix=f".{os.path.basename(self._path)}.", suffix=".tmp", dir=self.directory
+        )
+        self._raw = open(fd, 'wb')
+        self._hasher = _HashingWriter(self._raw)
+        self._stream = FileHandler._compressed_stream(self._hasher, self.compression)
+        self._lines = 0
+        self._bytes = 0
+    
+    def _close_part(self):
+        """完成当前分片并记录分片信息"""
+        if self._stream is not self._hasher:
+            self._stream.close()
+        self._raw.close()
+        _publish_file(self._temp_path, self._path)
+        self._temp_path = None
+        self.parts.append({
+            'file': os.path.basename(self._path),
+            'lines': self._lines,
+            'bytes': self._hasher.size,
+            'sha256': self._hasher.sha256.hexdigest(),
+        })
+        self._stream = None
+    
+    def _fit(self, lines):
+        """计算当前分片还能写入的行数，并编码这些行
+        
+        Args:
+            lines: 待写入的行列表
+            
+        Returns:
+            tuple: (行数, 编码后的数据)，当前分片已满时行数为0
+        """
+        room = len(lines)
+        if self.max_lines:
+            room = min(room, self.max_lines - self._lines)
+        if room <= 0:
+            return 0, b""
+        
+        separator = "\n" if self._lines else ""
+        data = (separator + "\n".join(lines[:room])).encode('utf-8')
+        if not self.max_bytes or self._bytes + len(data) <= self.max_bytes:
+            return room, data
+        
+        # 超出字节数限制时逐行计算切分位置；空分片至少写入一行
+        allowed = self.max_bytes - self._bytes - len(separator)
+        sizes = accumulate(len(line.encode('utf-8')) + 1 for line in lines[:room])
+        room = next(index for index, size in enumerate(sizes) if size - 1 > allowed)
+        if not room and not self._lines:
+            room = 1
+        if not room:
+            return 0, b""
+        return room, (separator + "\n".join(lines[:room])).encode('utf-8')
+    
+    def write_lines(self, lines):
+        """写入若干行，超出限制时自动切换到新分片
+        
+        Args:
+            lines: 行列表，不含换行符
+        """
+        while lines:
+            if self._stream is None:
+                self._open_part()
+            room, data = self._fit(lines)
+            if not room:
+                self._close_part()
+                continue
+            
+            self._stream.write(data)
+            self._lines += room
+            self._bytes += len(data)
+            lines = lines[room:]
+    
+    def write_chunks(self, chunks):
+        """按行写入脚本数据块，分片只在行边界处切分
+        
+        Args:
+            chunks: 脚本数据块的可迭代对象
+        """
+        pending = ""
+        for chunk in chunks:
+            parts = chunk.split("\n")
+            if len(parts) == 1:
+                pending += parts[0]
+                continue
+            parts[0] = pending + parts[0]
+            pending = parts.pop()
+            self.write_lines(parts)
+        self.write_lines([pending])
+    
+    def close(self):
+        """完成最后一个分片"""
+        if self._stream is not None:
+            self._close_part()
+    
+    def abort(self):
+        """放弃当前分片并删除临时文件"""
+        if self._raw is not None and not self._raw.closed:
+            self._raw.close()
+        if self._temp_path and os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+class _RollbackSpool:
+    """按模板键暂存删号数据块的临时文件
+    
+    放号脚本生成过程中同时产生的删号命令按模板分别写入临时文件，
+    全部生成后再按删号顺序拼接，内存占用与号码数量无关。
+    """
+    
+    def __init__(self, directory=None):
+        """初始化
+        
+        Args:
+            directory: 临时文件所在目录，默认为系统临时目录
+        """
+        self.directory = directory
+        self.files = {}
+    
+    def write(self, key, chunk):
+        """写入一个删号数据块，可直接作为 rollback_sink 使用
+        
+        Args:
+            key: 模板键
+            chunk: 删号数据块
+        """
+        spool = self.files.get(key)
+        if spool is None:
+            spool = self.files[key] = tempfile.TemporaryFile(
+                'w+', encoding='utf-8', newline='', dir=self.directory
+            )
+        spool.write(chunk)
+    
+    def iter_chunks(self, key, chunk_size=1024*1024):
+        """读回某个模板的全部删号数据块
+        
+        Args:
+            key: 模板键
+            chunk_size: 每次读取的字符数
+            
+        Yields:
+            str: 数据块
+        """
+        spool = self.files.get(key)
+        if spool is None:
+            return
+        spool.seek(0)
+        yield from iter(lambda: spool.read(chunk_size), "")
+    
+    def blocks(self):
+        """获取各模板的删号数据块，供 ScriptGenerator.iter_rollback_sections 使用
+        
+        Returns:
+            dict: 模板键到数据块迭代器的映射
+        """
+        return {key: self.iter_chunks(key) for key in self.files}
+    
+    def close(self):
+        """关闭并删除临时文件"""
+        for spool in self.files.values():
+            spool.close()
+        self.files = {}
 
 class FileHandler:
     """文件处理类，用于保存和加载脚本文件"""
@@ -25,8 +269,7 @@ class FileHandler:
         try:
             # 如果未指定路径，则自动生成
             if not file_path:
-                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                file_path = f"ims_script_{timestamp}.txt"
+                file_path = FileHandler._default_file_path()
             
             # 确保目录存在
             directory = os.path.dirname(file_path)
@@ -43,20 +286,365 @@ class FileHandler:
             return False, str(e)
     
     @staticmethod
-    def load_script(file_path):
+    def _default_file_path():
+        """生成默认的脚本文件名
+        
+        Returns:
+            str: 文件路径
+        """
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"ims_script_{timestamp}.txt"
+    
+    @staticmethod
+    def compression_for(file_path):
+        """根据文件后缀判断压缩格式
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            str: gzip、zstd，不压缩时为None
+        """
+        for compression, suffix in COMPRESSION_SUFFIXES.items():
+            if file_path and file_path.endswith(suffix):
+                return compression
+        return None
+    
+    @staticmethod
+    def _compressed_stream(raw, compression):
+        """在二进制文件对象上包装压缩流
+        
+        Args:
+            raw: 二进制文件对象
+            compression: 压缩格式，gzip、zstd 或 None
+            
+        Returns:
+            压缩流，关闭时不会关闭 raw；不压缩时返回 raw 本身
+            
+        Raises:
+            ValueError: 压缩格式不支持或缺少依赖
+        """
+        if not compression:
+            return raw
+        if compression == 'gzip':
+            return gzip.GzipFile(filename="", mode='wb', compresslevel=6, fileobj=raw, mtime=0)
+        if compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("zstd 压缩需要安装 zstandard 包")
+            return zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+        raise ValueError(f"不支持的压缩格式: {compression}")
+    
+    @staticmethod
+    def _write_chunks(fd, chunks, compression, buffer_size, binary=False):
+        """将脚本数据块写入已打开的文件描述符或路径
+        
+        Args:
+            fd: 文件描述符或文件路径
+            chunks: 脚本数据块的可迭代对象
+            compression: 压缩格式，gzip、zstd 或 None
+            buffer_size: 写缓冲区大小（字节）
+            binary: 数据块是否为 bytes，为 True 时原样写入，不编码也不转换换行符
+        """
+        if not compression and not binary:
+            with open(fd, 'w', encoding='utf-8', buffering=buffer_size) as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            return
+        
+        with open(fd, 'wb', buffering=buffer_size) as raw:
+            stream = FileHandler._compressed_stream(raw, compression)
+            for chunk in chunks:
+                stream.write(chunk if binary else chunk.encode('utf-8'))
+            stream.close()
+    
+    @staticmethod
+    def write_script_chunks(chunks, file_path=None, buffer_size=1024*1024, compression=None, binary=False):
+        """将流式生成的脚本数据块写入文件，不在内存中保留完整脚本
+        
+        脚本先写入同目录下的临时文件，全部写完后再原子替换为目标文件，
+        中途失败不会留下不完整的脚本。目标为设备或管道等非普通文件时直接写入。
+        
+        Args:
+            chunks: 脚本数据块的可迭代对象，如 ScriptGenerator.iter_full_script 的结果
+            file_path: 文件路径，如果为None则自动生成
+            buffer_size: 写缓冲区大小（字节）
+            compression: 压缩格式，gzip 或 zstd；None 时按文件后缀（.gz、.zst）判断
+            binary: 数据块是否为 bytes，如 LineIndex.iter_bytes 的结果，为 True 时按原字节写入
+            
+        Returns:
+            tuple: (是否成功, 文件路径或错误消息)
+        """
+        temp_path = None
+        try:
+            # 如果未指定路径，则自动生成
+            if not file_path:
+                file_path = FileHandler._default_file_path()
+            
+            compression = compression or FileHandler.compression_for(file_path)
+            
+            # 设备、管道等不能被替换，直接写入
+            if os.path.exists(file_path) and not os.path.isfile(file_path):
+                FileHandler._write_chunks(file_path, chunks, compression, buffer_size, binary)
+                return True, file_path
+            
+            # 确保目录存在
+            directory = os.path.dirname(file_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            
+            # 在目标目录创建临时文件，保证可以原子替换
+            fd, temp_path = tempfile.mkstemp(
+                prefix=f".{os.path.basename(file_path)}.", suffix=".tmp", dir=directory or None
+            )
+            
+            # 分块写入
+            FileHandler._write_chunks(fd, chunks, compression, buffer_size, binary)
+            
+            _publish_file(temp_path, file_path)
+            temp_path = None
+            
+            return True, file_path
+        
+        except Exception as e:
+            return False, str(e)
+        
+        finally:
+            # 清理失败时残留的临时文件
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    @staticmethod
+    def write_script_job(start_number, count, params, file_path=None, workers=1,
+                         generator=None, buffer_size=1024*1024, progress=None, cache=None,
+                         exclusions=None, compression=None, rollback_path=None):
+        """边生成边写入脚本文件，不在内存中保留完整脚本
+        
+        指定 rollback_path 时，删号脚本在同一次生成中产生：每批号码的逐号码字段只计算一次，
+        同时渲染放号和删号命令，删号命令先按模板暂存到临时文件，放号脚本写完后再按删号顺序写出。
+        
+        Args:
+            start_number: 起始号码，如 +861088889001
+            count: 号码数量
+            params: 参数字典
+            file_path: 文件路径，如果为None则自动生成
+            workers: 生成脚本使用的工作进程数
+            generator: 脚本生成器，如果为None则新建
+            buffer_size: 写缓冲区大小（字节）
+            progress: 进度回调，见 ScriptGenerator.iter_full_script
+            cache: 脚本缓存 ScriptCache，指定时单进程生成优先从缓存读取
+            exclusions: 排除索引 ExclusionIndex，可选
+            compression: 压缩格式，见 write_script_chunks，同样用于删号脚本
+            rollback_path: 删号脚本文件路径，可选
+            
+        Returns:
+            tuple: (是否成功, 文件路径或错误消息)；删号脚本写入失败时同样返回失败
+        """
+        if generator is None:
+            generator = ScriptGenerator()
+        
+        def make_chunks(rollback_sink):
+            if cache is not None and workers <= 1:
+                return cache.iter_full_script(generator, start_number, count, params, progress, exclusions, rollback_sink)
+            return generator.iter_full_script(start_number, count, params, workers, progress, exclusions, rollback_sink)
+        
+        return FileHandler.write_with_rollback(make_chunks, file_path, rollback_path, generator, buffer_size, compression)
+    
+    @staticmethod
+    def write_with_rollback(make_chunks, file_path=None, rollback_path=None, generator=None,
+                            buffer_size=1024*1024, compression=None):
+        """写入放号脚本，并可在同一次生成中写出对应的删号脚本
+        
+        Args:
+            make_chunks: 以删号命令接收函数（未指定 rollback_path 时为None）为参数、返回放号脚本数据块迭代器的函数，
+                接收函数的用法见 ScriptGenerator.iter_block
+            file_path: 放号脚本文件路径，如果为None则自动生成
+            rollback_path: 删号脚本文件路径，可选
+            generator: 脚本生成器，用于按删号顺序拼接各模板块
+            buffer_size: 写缓冲区大小（字节）
+            compression: 压缩格式，见 write_script_chunks，同样用于删号脚本
+            
+        Returns:
+            tuple: (是否成功, 文件路径或错误消息)；删号脚本写入失败时同样返回失败
+        """
+        if not rollback_path:
+            return FileHandler.write_script_chunks(make_chunks(None), file_path, buffer_size, compression)
+        if generator is None:
+            generator = ScriptGenerator()
+        
+        # 删号数据块暂存在删号脚本所在目录
+        directory = os.path.dirname(os.path.abspath(rollback_path))
+        spool = _RollbackSpool(directory if os.path.isdir(directory) else None)
+        try:
+            success, result = FileHandler.write_script_chunks(make_chunks(spool.write), file_path, buffer_size, compression)
+            
+            # 放号脚本完整写出后才写删号脚本
+            if success:
+                rollback_success, rollback_result = FileHandler.write_script_chunks(
+                    generator.iter_rollback_sections(spool.blocks()), rollback_path, buffer_size, compression
+                )
+                if not rollback_success:
+                    return False, f"删号脚本写入失败: {rollback_result}"
+            return success, result
+        finally:
+            spool.close()
+    
+    @staticmethod
+    def write_split_job(start_number, count, params, output_dir, max_lines=None, max_bytes=None,
+                        compression=None, generator=None, progress=None, exclusions=None,
+                        base_name="ims_script"):
+        """按网元分别生成脚本文件，并按行数或大小切分为多个分片
+        
+        每个网元（USPP、ENUM、SSS）单独输出，分片只在行边界处切分，边生成边写入。
+        全部完成后在输出目录写入 manifest.json，列出各分片的行数、字节数和 sha256。
+        
+        Args:
+            start_number: 起始号码
+            count: 号码数量
+            params: 参数字典
+            output_dir: 输出目录
+            max_lines: 每个分片的最大行数，None 表示不限
+            max_bytes: 每个分片压缩前的最大字节数，None 表示不限
+            compression: 压缩格式，gzip、zstd 或 None
+            generator: 脚本生成器，如果为None则新建
+            progress: 进度回调，见 ScriptGenerator.iter_full_script
+            exclusions: 排除索引 ExclusionIndex，可选
+            base_name: 文件名前缀，分片文件名为 <前缀>_<网元>_<序号>.txt
+            
+        Returns:
+            tuple: (是否成功, 清单文件路径或错误消息)
+        """
+        if generator is None:
+            generator = ScriptGenerator()
+        
+        writer = None
+        written = []
+        try:
+            if not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+            
+            phone_numbers = generator._parse_number_range(start_number, count, exclusions)
+            
+            sections = []
+            for name, _, _ in generator.SECTIONS:
+                writer = _PartWriter(
+                    output_dir, f"{base_name}_{name}", compression, max_lines, max_bytes
+                )
+                chunks = generator.iter_section(name, phone_numbers, params, progress)
+                
+                # 单独成文件时去掉段标题前的空行
+                first = next(chunks).lstrip("\n")
+                writer.write_chunks(chain([first], chunks))
+                writer.close()
+                
+                written.extend(part['file'] for part in writer.parts)
+                sections.append({'section': name, 'parts': writer.parts})
+                writer = None
+            
+            manifest = {
+                'start_number': start_number,
+                'count': int(count),
+                'numbers': len(phone_numbers),
+                'params': dict(params),
+                'compression': compression,
+                'max_lines': max_lines,
+                'max_bytes': max_bytes,
+                'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+                'sections': sections,
+            }
+            manifest_path = os.path.join(output_dir, "manifest.json")
+            with open(manifest_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=4, ensure_ascii=False)
+            
+            return True, manifest_path
+        
+        except Exception as e:
+            # 删除未完成任务的分片
+            if writer is not None:
+                writer.abort()
+                written.extend(part['file'] for part in writer.parts)
+            for file_name in written:
+                path = os.path.join(output_dir, file_name)
+                if os.path.exists(path):
+                    os.remove(path)
+            return False, str(e)
+    
+    @staticmethod
+    def save_job_record(job, file_path):
+        """保存任务记录，供下次生成增量脚本时使用
+        
+        Args:
+            job: 任务字典，包含 start_number、count、params
+            file_path: 文件路径
+            
+        Returns:
+            tuple: (是否成功, 文件路径或错误消息)
+        """
+        try:
+            directory = os.path.dirname(file_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            
+            record = {
+                "start_number": job["start_number"],
+                "count": int(job["count"]),
+                "params": dict(job["params"]),
+            }
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(record, f, indent=4, ensure_ascii=False)
+            
+            return True, file_path
+        
+        except Exception as e:
+            return False, str(e)
+    
+    @staticmethod
+    def load_job_record(file_path):
+        """加载任务记录
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            tuple: (是否成功, 任务字典或错误消息)
+        """
+        try:
+            if not os.path.exists(file_path):
+                return False, f"文件不存在: {file_path}"
+            
+            with open(file_path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            
+            for key in ("start_number", "count", "params"):
+                if key not in record:
+                    return False, f"任务记录缺少字段: {key}"
+            
+            return True, record
+        
+        except Exception as e:
+            return False, str(e)
+    
+    @staticmethod
+    def load_script(file_path, lazy=False):
         """从文件加载脚本内容
         
         Args:
             file_path: 文件路径
+            lazy: 为True时不读取全文，返回基于 mmap 的行索引 LineIndex，适用于数 GB 的脚本
             
         Returns:
-            tuple: (是否成功, 脚本内容或错误消息)
+            tuple: (是否成功, 脚本内容、LineIndex 或错误消息)
         """
         try:
             # 检查文件是否存在
             if not os.path.exists(file_path):
                 return False, f"文件不存在: {file_path}"
             
+            # 只建立行偏移表，行内容在访问时解码
+            if lazy:
+                return True, LineIndex(file_path)
+            
             # 读取文件
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
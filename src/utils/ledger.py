@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+放号台账模块
+
+记录每次生成的放号任务及其号码区间，生成新任务前检查号码段是否与历史任务重叠，
+避免重复放号。台账保存在配置目录下的 SQLite 数据库中。
+"""
+
+import os
+import json
+import sqlite3
+import datetime
+from bisect import bisect_right
+from contextlib import closing
+
+from src.core.number_range import parse_start_number
+
+class ProvisioningLedger:
+    """放号台账
+    
+    号码区间以半开区间 [start, end) 连同号码前缀和数字位数保存，并按 (前缀, 位数, 起点) 建立索引。
+    只有前缀和位数都相同的号码才是同一号码，如 0861… 与 861…、+861… 与 861… 互不重叠。
+    查询重叠时只需扫描起点落在 [查询起点 - 最长区间长度, 查询终点) 内的记录，与历史号码总量无关。
+    """
+    
+    def __init__(self, db_path=None):
+        """初始化台账
+        
+        Args:
+            db_path: 数据库文件路径，默认为 ~/Documents/IMS-number-maker/ledger.db
+        """
+        self.db_path = db_path or os.path.join(os.path.expanduser("~/Documents/IMS-number-maker"), "ledger.db")
+        directory = os.path.dirname(self.db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        
+        with closing(self._connect()) as conn, conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at TEXT NOT NULL,
+                    name TEXT,
+                    start_number TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    params TEXT NOT NULL,
+                    output TEXT
+                );
+                CREATE TABLE IF NOT EXISTS intervals (
+                    job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+                    prefix TEXT NOT NULL DEFAULT '',
+                    width INTEGER NOT NULL DEFAULT 0,
+                    start INTEGER NOT NULL,
+                    end INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+            """)
+            self._upgrade(conn)
+            conn.execute("CREATE INDEX IF NOT EXISTS intervals_number ON intervals(prefix, width, start)")
+    
+    @staticmethod
+    def _upgrade(conn):
+        """升级旧版台账：区间表补充前缀和位数，取值按所属任务的起始号码推算
+        
+        Args:
+            conn: 数据库连接
+        """
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(intervals)")}
+        if 'prefix' in columns:
+            return
+        conn.execute("ALTER TABLE intervals ADD COLUMN prefix TEXT NOT NULL DEFAULT ''")
+        conn.execute("ALTER TABLE intervals ADD COLUMN width INTEGER NOT NULL DEFAULT 0")
+        conn.execute("DROP INDEX IF EXISTS intervals_start")
+        jobs = conn.execute("SELECT id, start_number FROM jobs").fetchall()
+        conn.executemany(
+            "UPDATE intervals SET prefix = ?, width = ? WHERE job_id = ?",
+            [parse_start_number(start_number)[:2] + (job_id,) for job_id, start_number in jobs]
+        )
+    
+    def _connect(self):
+        """打开数据库连接"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+    
+    @staticmethod
+    def job_intervals(start_number, count, exclusions=None):
+        """计算任务实际生成的号码区间
+        
+        Args:
+            start_number: 起始号码
+            count: 号码数量
+            exclusions: 排除索引 ExclusionIndex，可选
+            
+        Returns:
+            list: (前缀, 位数, 起点, 终点) 列表，起点、终点为半开区间
+        """
+        prefix, width, start = parse_start_number(start_number)
+        end = start + int(count)
+        if exclusions is None:
+            return [(prefix, width, start, end)] if count else []
+        
+        # 去掉被排除的区间
+        intervals = []
+        current = start
+        for excluded_start, excluded_end in exclusions.intervals_in(start, end):
+            if current < excluded_start:
+                intervals.append((prefix, width, current, excluded_start))
+            current = excluded_end
+        if current < end:
+            intervals.append((prefix, width, current, end))
+        return intervals
+    
+    def record_job(self, start_number, count, params, exclusions=None, name=None, output=None, intervals=None):
+        """记录已生成的任务
+        
+        Args:
+            start_number: 起始号码
+            count: 号码数量
+            params: 参数字典
+            exclusions: 排除索引 ExclusionIndex，被排除的号码不计入台账
+            name: 任务名称，可选
+            output: 输出文件路径，可选
+            intervals: 实际生成的号码区间，如导入的号码列表，省略时根据起始号码和数量计算
+            
+        Returns:
+            int: 任务编号
+        """
+        if intervals is None:
+            intervals = self.job_intervals(start_number, count, exclusions)
+        longest = max((end - start for _, _, start, end in intervals), default=0)
+        
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (created_at, name, start_number, count, params, output) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    datetime.datetime.now().isoformat(timespec='seconds'), name, start_number, int(count),
+                    json.dumps(params, ensure_ascii=False, sort_keys=True), output
+                )
+            )
+            job_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO intervals (job_id, prefix, width, start, end) VALUES (?, ?, ?, ?, ?)",
+                [(job_id,) + tuple(interval) for interval in intervals]
+            )
+            # 记录最长区间长度，用于限定重叠查询的扫描范围
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('max_length', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+                (longest,)
+            )
+        return job_id
+    
+    def find_overlaps(self, start_number, count, exclusions=None, intervals=None):
+        """查找与历史任务重叠的号码区间
+        
+        Args:
+            start_number: 起始号码
+            count: 号码数量
+            exclusions: 排除索引 ExclusionIndex，可选
+            intervals: 要检查的号码区间，省略时根据起始号码和数量计算
+            
+        Returns:
+            list: 重叠记录，每项为 dict，包含 job_id、name、created_at、start_number、prefix、width、start、end，
+                其中 start、end 为重叠部分的半开区间
+        """
+        if intervals is None:
+            intervals = self.job_intervals(start_number, count, exclusions)
+        if not intervals:
+            return []
+        
+        overlaps = []
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'max_length'").fetchone()
+            if not row:
+                return []
+            max_length = row[0]
+            
+            # 每组前缀、位数一次查询覆盖该组全部区间的历史记录，再按起点二分找出与之相交的区间；
+            # 导入的号码列表可能包含大量区间，不逐个查询
+            groups = {}
+            for prefix, width, start, end in sorted(intervals):
+                groups.setdefault((prefix, width), []).append((start, end))
+            
+            for (prefix, width), group in groups.items():
+                starts = [start for start, _ in group]
+                low, high = group[0][0], max(end for _, end in group)
+                rows = conn.execute(
+                    "SELECT jobs.id, jobs.name, jobs.created_at, jobs.start_number, intervals.start, intervals.end "
+                    "FROM intervals JOIN jobs ON jobs.id = intervals.job_id "
+                    "WHERE intervals.prefix = ? AND intervals.width = ? "
+                    "AND intervals.start >= ? AND intervals.start < ? AND intervals.end > ? "
+                    "ORDER BY intervals.start",
+                    (prefix, width, low - max_length, high, low)
+                )
+                for job_id, name, created_at, job_start_number, job_start, job_end in rows:
+                    position = max(bisect_right(starts, job_start) - 1, 0)
+                    while position < len(group) and group[position][0] < job_end:
+                        start, end = group[position]
+                        if end > job_start:
+                            overlaps.append({
+                                'job_id': job_id,
+                                'name': name,
+                                'created_at': created_at,
+                                'start_number': job_start_number,
+                                'prefix': prefix,
+                                'width': width,
+                                'start': max(job_start, start),
+                                'end': min(job_end, end),
+                            })
+                        position += 1
+        return overlaps
+    
+    @staticmethod
+    def overlap_count(overlaps):
+        """统计重叠号码数量，同一号码与多个历史任务重叠时只计一次
+        
+        Args:
+            overlaps: find_overlaps 的结果
+            
+        Returns:
+            int: 重叠号码数量
+        """
+        total = 0
+        group = covered = None
+        for prefix, width, start, end in sorted(
+            (overlap['prefix'], overlap['width'], overlap['start'], overlap['end']) for overlap in overlaps
+        ):
+            if (prefix, width) != group:
+                group, covered = (prefix, width), None
+            if covered is not None:
+                start = max(start, covered)
+            if start < end:
+                total += end - start
+            covered = end if covered is None else max(covered, end)
+        return total
+    
+    @staticmethod
+    def describe_overlaps(overlaps, limit=5):
+        """生成重叠情况的说明文字
+        
+        Args:
+            overlaps: find_overlaps 的结果
+            limit: 最多列出的历史任务数
+            
+        Returns:
+            str: 说明文字
+        """
+        jobs = {}
+        for overlap in overlaps:
+            jobs.setdefault(overlap['job_id'], overlap)
+        
+        lines = [f"{ProvisioningLedger.overlap_count(overlaps)} 个号码已在 {len(jobs)} 个历史任务中生成过"]
+        for overlap in list(jobs.values())[:limit]:
+            name = f" ({overlap['name']})" if overlap['name'] else ""
+            lines.append(f"- 任务 {overlap['job_id']}{name}: {overlap['created_at']}, 起始号码 {overlap['start_number']}")
+        if len(jobs) > limit:
+            lines.append(f"- 另有 {len(jobs) - limit} 个任务")
+        return "\n".join(lines) 
\ No newline at end of file
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+脚本文件行索引模块
+
+通过 mmap 访问大脚本文件，只保存每行的起始偏移，行内容在访问时才解码，
+数 GB 的脚本也可以按行随机访问。偏移表保存在脚本旁的 .idx 文件中，文件未变化时直接复用。
+"""
+
+import os
+import mmap
+import struct
+from array import array
+from itertools import accumulate, islice
+
+class LineIndex:
+    """脚本文件的行索引，提供与 ScriptLayout 相同的 line_count 和 line_at 接口"""
+    
+    # 建立索引时每次扫描的字节数
+    BLOCK_SIZE = 16 * 1024 * 1024
+    
+    # 索引文件头：标识、版本、脚本文件大小、脚本修改时间
+    INDEX_MAGIC = b"IMSIDX"
+    INDEX_VERSION = 1
+    INDEX_HEADER = struct.Struct("<6sHQQ")
+    
+    def __init__(self, file_path, use_sidecar=True):
+        """打开脚本文件并建立或加载行索引
+        
+        Args:
+            file_path: 脚本文件路径
+            use_sidecar: 是否读写 .idx 索引文件
+            
+        Raises:
+            OSError: 文件读取失败
+        """
+        self.file_path = file_path
+        self.index_path = file_path + ".idx"
+        
+        self._file = open(file_path, 'rb')
+        stat = os.fstat(self._file.fileno())
+        self.size = stat.st_size
+        self._mtime = stat.st_mtime_ns
+        
+        # 空文件无法映射
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        
+        self.offsets = self._load_sidecar() if use_sidecar else None
+        if self.offsets is None:
+            self.offsets = self._build()
+            if use_sidecar:
+                self._save_sidecar()
+        
+        # 最后一个偏移为文件末尾
+        self.line_count = len(self.offsets) - 1
+    
+    def _build(self):
+        """扫描文件建立行偏移表
+        
+        Returns:
+            array: 各行起始偏移，末尾附加文件长度
+        """
+        offsets = array('Q', [0])
+        for position in range(0, self.size, self.BLOCK_SIZE):
+            block = self._mm[position:position + self.BLOCK_SIZE]
+            # 块内以换行结束的各段长度累加，即为下一行的起始偏移；块末不完整的行由下一块继续
+            lengths = [len(line) + 1 for line in block.split(b"\n")]
+            lengths.pop()
+            offsets.extend(islice(accumulate(lengths, initial=position), 1, None))
+        
+        # 文件以换行结尾时最后一个偏移即为文件末尾，否则补上
+        if offsets[-1] != self.size or not self.size:
+            offsets.append(self.size)
+        return offsets
+    
+    def _load_sidecar(self):
+        """加载索引文件，脚本文件已变化时返回None
+        
+        Returns:
+            array: 行偏移表，或None
+        """
+        try:
+            with open(self.index_path, 'rb') as f:
+                header = f.read(self.INDEX_HEADER.size)
+                magic, version, size, mtime = self.INDEX_HEADER.unpack(header)
+                if (magic, version, size, mtime) != (self.INDEX_MAGIC, self.INDEX_VERSION, self.size, self._mtime):
+                    return None
+                offsets = array('Q')
+                offsets.frombytes(f.read())
+                return offsets
+        except (OSError, struct.error, ValueError):
+            return None
+    
+    def _save_sidecar(self):
+        """保存索引文件，目录不可写时忽略"""
+        temp_path = self.index_path + ".tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(self.INDEX_HEADER.pack(self.INDEX_MAGIC, self.INDEX_VERSION, self.size, self._mtime))
+                self.offsets.tofile(f)
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def line_at(self, index):
+        """获取指定行的文本
+        
+        Args:
+            index: 行号，从0开始
+            
+        Returns:
+            str: 行文本，不含换行符
+        """
+        if not 0 <= index < self.line_count:
+            raise IndexError("行号超出范围")
+        
+        start = self.offsets[index]
+        end = self.offsets[index + 1]
+        line = self._mm[start:end]
+        if line.endswith(b"\n"):
+            line = line[:-1]
+        if line.endswith(b"\r"):
+            line = line[:-1]
+        return line.decode('utf-8', errors='replace')
+    
+    def iter_lines(self, start=0, stop=None):
+        """按顺序遍历行
+        
+        Args:
+            start: 起始行号
+            stop: 结束行号（不含），默认到文件末尾
+            
+        Yields:
+            str: 行文本
+        """
+        stop = self.line_count if stop is None else min(stop, self.line_count)
+        for index in range(start, stop):
+            yield self.line_at(index)
+    
+    def iter_chunks(self, chunk_size=1024*1024):
+        """按块读取并解码整个文件
+        
+        Args:
+            chunk_size: 每块字节数，实际在行边界处切分
+            
+        Yields:
+            str: 文本块，按顺序拼接即为文件全文
+        """
+        position = 0
+        while position < self.size:
+            end = min(position + chunk_size, self.size)
+            if end < self.size:
+                # 在换行处切分，避免截断多字节字符
+                newline = self._mm.find(b"\n", end)
+                end = self.size if newline < 0 else newline + 1
+            yield self._mm[position:end].decode('utf-8', errors='replace')
+            position = end
+    
+    def iter_bytes(self, chunk_size=1024*1024):
+        """按块读取整个文件的原始字节，不解码
+        
+        Args:
+            chunk_size: 每块字节数
+            
+        Yields:
+            bytes: 数据块，按顺序拼接即为文件内容
+        """
+        for position in range(0, self.size, chunk_size):
+            yield self._mm[position:position + chunk_size]
+    
+    def close(self):
+        """关闭文件映射"""
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close() 
\ No newline at end of file
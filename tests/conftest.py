@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试公共夹具
+"""
+
+import os
+
+import pytest
+
+from src.core.generator import ScriptGenerator
+
+# 测试数据目录
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+# 默认网元参数
+PARAMS = {
+    'domain': 'dra.ims.sdt',
+    'cfn': 'cg.dra.ims.sdt',
+    'password': '123456',
+    'sifc_id': '100',
+    'scscf': 'scscfpool01',
+    'cc': '86',
+    'lata': '10',
+}
+
+@pytest.fixture
+def params():
+    """默认网元参数的副本"""
+    return dict(PARAMS)
+
+@pytest.fixture
+def generator():
+    """使用默认模板的脚本生成器"""
+    return ScriptGenerator() 
\ No newline at end of file
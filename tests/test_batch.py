@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+批量任务与放号台账测试
+"""
+
+import gzip
+
+from src.core.batch import BatchJob, BatchRunner
+from src.utils.ledger import ProvisioningLedger
+
+def test_job_overlaps_find_every_pair(params):
+    jobs = [
+        BatchJob('A', '+861088889001', 100, params),
+        BatchJob('B', '+861088889011', 10, params),
+        BatchJob('C', '+861088889001', 20, params),
+    ]
+    overlaps = BatchRunner(jobs).find_job_overlaps()
+    assert [(index, other, count) for index, _, other, _, count in overlaps] == [
+        (1, 0, 10), (2, 0, 20), (2, 1, 10),
+    ]
+
+def test_ledger_separates_prefix_and_width(params, tmp_path):
+    ledger = ProvisioningLedger(str(tmp_path / "ledger.db"))
+    ledger.record_job('861088889001', 10, params)
+    assert ledger.find_overlaps('0861088889001', 10) == []
+    assert ledger.find_overlaps('+861088889001', 10) == []
+    overlaps = ledger.find_overlaps('861088889005', 10)
+    assert ProvisioningLedger.overlap_count(overlaps) == 6
+
+def test_merged_output_is_compressed(generator, params, tmp_path):
+    jobs = [
+        BatchJob('a', '+861088889001', 5, params),
+        BatchJob('b', '+861088889006', 5, dict(params, lata='12')),
+    ]
+    merged = tmp_path / "merged.txt.gz"
+    results = BatchRunner(jobs, workers=1).run(merged_path=str(merged))
+    assert all(success for _, success, _ in results)
+    
+    with gzip.open(merged, 'rt', encoding='utf-8', newline='') as f:
+        script = f.read()
+    assert script == "\n\n".join(
+        generator.generate_full_script(job.start_number, job.count, job.params) for job in jobs
+    ) 
\ No newline at end of file
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+脚本比较测试：由两个脚本比较得到的增量脚本与按任务描述生成的增量脚本（--delta-from）一致
+"""
+
+import pytest
+
+from src.core.diff import ScriptDiff
+from src.core.parser import ScriptParser
+from tests.conftest import PARAMS
+
+def job(start_number, count, **changes):
+    return {"start_number": start_number, "count": count, "params": dict(PARAMS, **changes)}
+
+def parse(generator, job):
+    parser = ScriptParser(generator)
+    parser.parse_chunks(generator.iter_full_script(job['start_number'], job['count'], job['params']))
+    return parser
+
+@pytest.mark.parametrize("old, new", [
+    (job('+861088889001', 100), job('+861088889051', 100, lata='11', scscf='pool02')),
+    (job('+861088889001', 100), job('+861088889001', 100)),
+    (job('+861088889001', 100), job('+861088889001', 50, lata='11')),
+    (job('+861088889001', 100), job('861088889001', 100)),
+    (job('+861088889001', 30), job('+861088889001', 60, domain='x.ims.sdt')),
+])
+def test_delta_matches_generator(generator, old, new):
+    diff = ScriptDiff(parse(generator, old), parse(generator, new))
+    assert "".join(diff.iter_delta_script()) == generator.generate_delta_script(old, new)
+
+def test_identical_scripts(generator):
+    old = job('+861088889001', 20)
+    diff = ScriptDiff(parse(generator, old), parse(generator, old))
+    assert diff.identical
+    assert diff.counts() == {} 
\ No newline at end of file
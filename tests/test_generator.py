@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+脚本生成器测试：流式输出与原实现一致，多进程与串行一致
+"""
+
+import os
+
+import pytest
+
+from tests.conftest import DATA_DIR
+
+def read_data(name):
+    with open(os.path.join(DATA_DIR, name), 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+# 原逐行拼接实现生成的脚本，数据文件由未引入流式生成前的代码输出
+@pytest.mark.parametrize("start_number, count, name", [
+    ('+861088889001', 5, 'full_plus_5.txt'),
+    ('861088889998', 4, 'full_carry_4.txt'),
+])
+def test_streaming_matches_legacy_output(generator, params, start_number, count, name):
+    expected = read_data(name)
+    assert "".join(generator.iter_full_script(start_number, count, params)) == expected
+    assert generator.generate_full_script(start_number, count, params) == expected
+
+def test_empty_job(generator, params):
+    script = generator.generate_full_script('+861088889001', 0, params)
+    assert "ADD" not in script
+
+@pytest.mark.parametrize("count", [1, 7, 1000])
+def test_workers_match_serial(generator, params, count):
+    # 降低阈值和分段大小，让小任务也走多进程并跨越多个分段
+    generator.PARALLEL_THRESHOLD = 1
+    generator.PARALLEL_CHUNK_SIZE = 3
+    
+    serial_rollback = {}
+    parallel_rollback = {}
+    
+    def sink(blocks):
+        return lambda key, chunk: blocks.setdefault(key, []).append(chunk)
+    
+    serial = "".join(generator.iter_full_script('+861088889001', count, params, rollback_sink=sink(serial_rollback)))
+    parallel = "".join(generator.iter_full_script(
+        '+861088889001', count, params, workers=2, rollback_sink=sink(parallel_rollback)
+    ))
+    assert parallel == serial
+    assert ("".join(generator.iter_rollback_sections(parallel_rollback))
+            == "".join(generator.iter_rollback_sections(serial_rollback))) 
\ No newline at end of file
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+导入与解析测试：号码列表导入后生成的脚本可以解析还原
+"""
+
+from src.core.importer import NumberImporter
+from src.core.parser import ScriptParser
+
+def parse_text(generator, text):
+    parser = ScriptParser(generator)
+    parser.parse_chunks([text])
+    return parser
+
+def test_job_round_trip(generator, params):
+    script = generator.generate_full_script('+861088889001', 50, params)
+    parser = parse_text(generator, script)
+    assert parser.ok
+    assert parser.jobs() == [{"start_number": '+861088889001', "count": 50, "params": params}]
+
+def test_merged_jobs_keep_their_params(generator, params):
+    # 合并输出的清单脚本中参数不同的任务分别还原
+    other = dict(params, lata='12')
+    script = "\n\n".join([
+        generator.generate_full_script('+861088889001', 10, params),
+        generator.generate_full_script('+861088889011', 10, other),
+    ])
+    parser = parse_text(generator, script)
+    assert parser.restorable
+    assert parser.jobs() == [
+        {"start_number": '+861088889001', "count": 10, "params": params},
+        {"start_number": '+861088889011', "count": 10, "params": other},
+    ]
+
+def test_invalid_line_is_not_restorable(generator, params):
+    script = generator.generate_full_script('+861088889001', 5, params) + "\nBOGUS LINE;\n"
+    parser = parse_text(generator, script)
+    assert parser.error_count == 1
+    assert not parser.restorable
+
+def test_importer_parser_round_trip(generator, params, tmp_path):
+    numbers = tmp_path / "numbers.txt"
+    numbers.write_text("+861088889001\n+861088889003\n+861088889002\n+861088889010-+861088889012\n+861088889003\n",
+                       encoding='utf-8')
+    importer = NumberImporter.load(str(numbers))
+    runs = importer.number_runs()
+    assert importer.error_count == 0
+    assert importer.duplicates == 1
+    assert len(runs) == 6
+    
+    script = "".join(generator.iter_number_script(runs, params))
+    parser = parse_text(generator, script)
+    assert parser.ok
+    assert list(parser.number_runs()) == list(runs) 
\ No newline at end of file
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+参数校验测试
+"""
+
+import pytest
+
+from src.core.schema import ParamSchema
+from src.core.template import TemplateSet
+from src.core.validator import InputValidator
+
+def errors(generator, params):
+    return [name for name, _ in ParamSchema.for_generator(generator).validate(params)]
+
+def test_default_params_are_valid(generator, params):
+    assert errors(generator, params) == []
+    assert InputValidator.validate_params(params, generator) == (True, "")
+
+@pytest.mark.parametrize("scscf", ['scscfpool01', 'scscf01.ims.example.com', 'scscf01.ims.example.com:5060'])
+def test_scscf_accepts_host_and_port(generator, params, scscf):
+    assert errors(generator, dict(params, scscf=scscf)) == []
+
+@pytest.mark.parametrize("scscf", ['scscf pool', 'scscf:port', 'scscf:123456'])
+def test_scscf_rejects_invalid(generator, params, scscf):
+    assert errors(generator, dict(params, scscf=scscf)) == ['scscf']
+
+def test_cfn_compared_case_insensitively(generator, params):
+    assert errors(generator, dict(params, domain='IMS.example.com', cfn='cg.ims.example.com')) == []
+    assert errors(generator, dict(params, domain='ims.example.com', cfn='cg.other.com')) == ['cfn']
+
+def test_missing_required_param(generator, params):
+    del params['password']
+    assert errors(generator, params) == ['password']
+
+def test_required_params_follow_templates(generator, params):
+    # 模板集不再引用 cc、lata 时两者不必填写
+    generator.apply_template_set(TemplateSet(
+        "no-sbr", {'sss_osu_sbr': 'ADD OSU SBR:PUI="tel:{phone}";'}
+    ))
+    del params['cc'], params['lata']
+    assert errors(generator, params) == []
+    assert InputValidator.validate_params(params, generator)[0]
+
+def test_validate_rows_reports_every_row(generator, params):
+    schema = ParamSchema.for_generator(generator, max_count=100, job_fields=True)
+    rows = [
+        dict(params, start_number='+861088889001', count=10),
+        dict(params, start_number='abc', count=10),
+        dict(params, start_number='+861088889001', count=1000, scscf='bad host'),
+    ]
+    assert [(index, name) for index, name, _ in schema.validate_rows(rows)] == [
+        (1, 'start_number'), (2, 'scscf'), (2, 'count'),
+    ] 
\ No newline at end of file